@@ -16,8 +16,6 @@ from flask_cors import CORS
 
 from config import settings
 from core.utils.path_utils import PathUtils
-from core.services.animation_service import AnimationService
-from core.services.transition_service import TransitionService
 from api.routes import register_blueprints
 
 # 配置日志
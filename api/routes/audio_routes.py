@@ -8,12 +8,41 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 
-from core.services.audio_service import AudioService
+from core.services.render_cache import RenderCache
+from core.services.tts_backends import TTS_BACKENDS, list_tts_backends
 from core.utils.path_utils import PathUtils
+from core.utils.rate_limiter import RateLimiter
+from config import settings
+from api.services import services
 
 # 创建蓝图
 audio_bp = Blueprint('audio', __name__, url_prefix='/api/audio')
-audio_service = AudioService()
+
+def create_audio_service():
+    """按部署配置创建音频服务"""
+    from core.services.audio_service import AudioService
+    audio_service = AudioService()
+    audio_service.backend = settings.AUDIO_SETTINGS.get('backend', audio_service.backend)
+    tts_cache_settings = settings.AUDIO_SETTINGS.get('tts_cache', {})
+    if tts_cache_settings.get('enabled', True):
+        audio_service.tts_cache = RenderCache(audio_service.tts_cache.cache_dir,
+                                              tts_cache_settings.get('max_size_mb', 256) * 1024 * 1024)
+    else:
+        audio_service.tts_cache = None
+    tts_batch_settings = settings.AUDIO_SETTINGS.get('batch', {})
+    audio_service.batch_workers = tts_batch_settings.get('workers', audio_service.batch_workers)
+    audio_service.rate_limiter = RateLimiter(tts_batch_settings.get('requests_per_second', 2.0))
+    audio_service.max_concurrent_requests = tts_batch_settings.get('max_concurrent_requests',
+                                                                   audio_service.max_concurrent_requests)
+    audio_service.max_retries = tts_batch_settings.get('max_retries', audio_service.max_retries)
+    tts_chunk_settings = settings.AUDIO_SETTINGS.get('chunking', {})
+    audio_service.chunk_sentences = tts_chunk_settings.get('enabled', audio_service.chunk_sentences)
+    audio_service.chunk_max_chars = tts_chunk_settings.get('max_chars', audio_service.chunk_max_chars)
+    audio_service.chunk_workers = tts_chunk_settings.get('workers', audio_service.chunk_workers)
+    return audio_service
+
+# 音频服务在第一次使用时创建
+services.register('audio', create_audio_service)
 path_utils = PathUtils()
 
 @audio_bp.route('/create', methods=['POST'])
@@ -25,7 +54,8 @@ def create_audio():
     - text: 要转换为音频的文本
     - voice: (可选) 语音类型，默认为'zh-cn'
     - speed: (可选) 语速，范围0.5-2.0，默认为1.0
-    - format: (可选) 输出格式，默认为'mp3'
+    - format: (可选) 输出格式，'mp3'或'wav'，默认为'mp3'
+    - backend: (可选) 合成后端，'gtts'、'espeak'或'stub'，默认使用部署配置（TTS_BACKEND）
     
     响应:
     {
@@ -33,8 +63,11 @@ def create_audio():
         "filename": "audio_xxx.mp3",
         "path": "/path/to/audio_xxx.mp3",
         "url": "/audio/audio_xxx.mp3",
-        "full_url": "http://localhost:8000/audio/audio_xxx.mp3"
+        "full_url": "http://localhost:8000/audio/audio_xxx.mp3",
+        "backend": "gtts",
+        "segments": [{"index": 0, "text": "第一句。", "start": 0.0, "end": 1.2}, ...]
     }
+    多句的长文本分句合成，segments 为各句在音频中的起止时间（秒）；只有一句时为null
     """
     try:
         # 获取请求数据
@@ -45,10 +78,32 @@ def create_audio():
                 "error": "缺少必要参数 'text'"
             }), 400
         
+        audio_service = services.get('audio')
         text = data['text']
         voice = data.get('voice', 'zh-cn')  # 默认中文
         speed = data.get('speed', 1.0)  # 默认语速1.0
         format_type = data.get('format', 'mp3')  # 默认格式mp3
+        backend = data.get('backend') or audio_service.backend
+        
+        try:
+            speed = float(speed)
+        except (TypeError, ValueError):
+            speed = None
+        if speed is None or not 0.5 <= speed <= 2.0:
+            return jsonify({
+                "success": False,
+                "error": "参数 'speed' 的范围为0.5-2.0"
+            }), 400
+        if format_type not in ('mp3', 'wav'):
+            return jsonify({
+                "success": False,
+                "error": "参数 'format' 只支持 mp3 或 wav"
+            }), 400
+        if backend not in TTS_BACKENDS:
+            return jsonify({
+                "success": False,
+                "error": f"未知的合成后端: {backend}，可选: {', '.join(TTS_BACKENDS)}"
+            }), 400
         
         # 生成唯一文件名
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -60,9 +115,8 @@ def create_audio():
         os.makedirs(audio_dir, exist_ok=True)
         
         # 生成音频文件
-        # 注意：目前AudioService实现只支持中文，并使用mp3格式
-        # 如果需要支持更多参数，需要扩展AudioService
-        audio_path = audio_service.generate_speech(text, filename)
+        audio_path = audio_service.generate_speech(text, filename, voice=voice, speed=speed,
+                                                   audio_format=format_type, backend=backend)
         
         if not audio_path:
             return jsonify({
@@ -72,7 +126,6 @@ def create_audio():
         
         # 构建URL路径 - 使用/audio/路径而不是/uploads/
         relative_path = f"/audio/{os.path.basename(audio_path)}"
-        from config import settings
         full_url = f"{settings.API_BASE_URL}{relative_path}"
         
         return jsonify({
@@ -80,7 +133,9 @@ def create_audio():
             "filename": os.path.basename(audio_path),
             "path": str(audio_path),
             "url": relative_path,
-            "full_url": full_url
+            "full_url": full_url,
+            "backend": backend,
+            "segments": audio_service.get_speech_segments(audio_path)
         })
         
     except Exception as e:
@@ -88,4 +143,35 @@ def create_audio():
         return jsonify({
             "success": False,
             "error": f"创建音频失败: {str(e)}"
-        }), 500 
\ No newline at end of file
+        }), 500 
+
+@audio_bp.route('/cache/stats', methods=['GET'])
+def get_tts_cache_stats():
+    """
+    获取语音合成缓存的统计信息
+    
+    返回:
+        命中数、未命中数、命中率、淘汰数、条目数和占用空间
+    """
+    audio_service = services.get('audio')
+    if not audio_service.tts_cache:
+        return jsonify({"success": True, "enabled": False})
+    return jsonify({
+        "success": True,
+        "enabled": True,
+        "stats": audio_service.tts_cache.stats()
+    })
+
+@audio_bp.route('/backends', methods=['GET'])
+def get_tts_backends():
+    """
+    获取可用的语音合成后端
+    
+    返回:
+        后端列表（名称、是否为在线服务、当前环境是否可用）和默认后端
+    """
+    return jsonify({
+        "success": True,
+        "default": services.get('audio').backend,
+        "backends": list_tts_backends()
+    })
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, send_file, abort
+from flask import Blueprint, Response, request, jsonify, send_file, abort, stream_with_context
 import os
 import json
 import uuid
@@ -6,22 +6,122 @@ from pathlib import Path
 from datetime import datetime
 import traceback
 import logging
+import atexit
 
 from core.models.image_item import ImageItem
-from core.services.video_service import VideoService
+from core.services.render_cache import RenderCache
+from core.services.job_service import JobService, QueueFullError
+from core.services.render_worker_pool import RenderWorkerPool
 from core.utils.path_utils import PathUtils
+from core.utils.system_resources import SystemResources
 from config import settings
+from api.services import services
 
 # 初始化路由蓝图
 video_bp = Blueprint('video', __name__, url_prefix='/api/video')
 
-# 初始化服务
-video_service = VideoService()
+# 初始化服务（视频和动画服务依赖 moviepy 和 OpenCV，第一次渲染时才创建）
+render_cache_settings = settings.VIDEO_SETTINGS.get('render_cache', {})
+if render_cache_settings.get('enabled', True):
+    render_cache = RenderCache(max_bytes=render_cache_settings.get('max_size_mb', 2048) * 1024 * 1024)
+else:
+    render_cache = None
+render_job_settings = settings.VIDEO_SETTINGS.get('jobs', {})
+# 渲染槽位数：未配置时按CPU核心数和内存计算，每个槽位平分CPU核心用于分段并行渲染
+render_slots = render_job_settings.get('workers') or SystemResources.render_slots(
+    render_job_settings.get('cores_per_slot', 4), render_job_settings.get('memory_per_slot_mb', 1536))
+video_service_options = {
+    'encoder': settings.VIDEO_SETTINGS.get('encoder', 'moviepy'),
+    'encoder_options': settings.VIDEO_SETTINGS.get('encoder_options', {}),
+    'parallel_workers': max(1, SystemResources.cpu_count() // render_slots)
+}
+
+def create_video_service():
+    """按部署配置创建视频服务"""
+    from core.services.video_service import VideoService
+    video_service = VideoService()
+    for name, value in video_service_options.items():
+        setattr(video_service, name, value)
+    video_service.render_cache = render_cache
+    return video_service
+
+services.register('video', create_video_service)
+services.register('animation', 'core.services.animation_service:AnimationService')
+job_service = JobService(max_workers=render_slots,
+                         max_jobs=render_job_settings.get('max_jobs', 1000),
+                         result_validator=lambda result: os.path.exists(result.get('video_path', '')),
+                         max_queue=render_job_settings.get('max_queue', 16))
+# 渲染工作进程池：蓝图注册到应用并占用本机的渲染槽位后启动（每台主机一个池），未启用时在本进程中渲染
+worker_pool_settings = settings.VIDEO_SETTINGS.get('worker_pool', {})
+if worker_pool_settings.get('enabled', True):
+    render_pool = RenderWorkerPool(
+        render_slots,
+        service_options={
+            **video_service_options,
+            'render_cache_max_bytes': render_cache.max_bytes if render_cache else None
+        },
+        max_jobs_per_worker=worker_pool_settings.get('max_jobs_per_worker', 50),
+        max_rss_mb=worker_pool_settings.get('max_rss_mb', 2048),
+        start_method=worker_pool_settings.get('start_method', 'spawn'),
+        render_cache=render_cache)
+else:
+    render_pool = None
+job_events_keepalive = render_job_settings.get('events_keepalive', 15)
+job_dedup_ttl = render_job_settings.get('dedup_ttl', 600)
 path_utils = PathUtils()
 
 # 设置日志
 logger = logging.getLogger("video-routes")
 
+# 本机渲染槽位的文件锁，持有锁的API进程负责全部槽位和等待队列
+render_slots_lock = None
+
+def claim_render_slots():
+    """
+    在 Gunicorn 中运行时独占本机的渲染槽位
+    
+    槽位、等待队列和任务都在API进程的内存中计算，多个工作进程会让这些上限按进程数成倍放大，
+    /capacity 也只能反映其中一个进程。以多个工作进程启动时，第一个之后的进程在这里报错，
+    Gunicorn 随之停止启动。开发服务器（包括调试模式的重载进程）不检查。
+    """
+    global render_slots_lock
+    if not os.environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        return
+    try:
+        import fcntl
+    except ImportError:
+        return
+    lock_path = path_utils.get_data_dir() / 'render_slots.lock'
+    lock_file = open(lock_path, 'a')
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        raise RuntimeError(f"本机的渲染槽位已被另一个API进程占用（{lock_path}），"
+                           f"渲染任务、槽位和队列只在一个进程中管理，请以 --workers 1 启动 Gunicorn")
+    render_slots_lock = lock_file
+
+@video_bp.record_once
+def start_render_pool(state):
+    """蓝图注册到应用时占用本机的渲染槽位，并预先启动渲染工作进程（只导入路由模块时不启动）"""
+    claim_render_slots()
+    if render_pool:
+        render_pool.start()
+        atexit.register(render_pool.shutdown)
+
+def call_video_service(method, progress_callback=None, **kwargs):
+    """
+    执行视频服务的渲染方法：启用工作进程池时在预热好的工作进程中执行，否则在本进程中执行
+    
+    Args:
+        method: VideoService 的方法名
+        progress_callback: 进度回调
+        **kwargs: 方法参数
+    """
+    if render_pool:
+        return render_pool.call(method, progress_callback=progress_callback, **kwargs)
+    return getattr(services.get('video'), method)(progress_callback=progress_callback, **kwargs)
+
 def get_full_url(relative_url):
     """获取完整URL，包含域名和端口
     
@@ -36,6 +136,107 @@ def get_full_url(relative_url):
     host = request.host_url.rstrip('/')
     return f"{host}{relative_url}"
 
+def is_true(value):
+    """请求参数是否为真（布尔值，或 1/true/yes 字符串）"""
+    return value is True or str(value).lower() in ('1', 'true', 'yes')
+
+def wants_sync(request_data):
+    """
+    请求是否同步渲染
+    
+    请求体或查询参数中的 sync 优先，其次是 async（为真时提交为后台任务），
+    都未指定时使用部署配置（默认同步，与旧客户端的行为一致）。
+    """
+    value = request_data.get('sync', request.args.get('sync'))
+    if value is not None:
+        return is_true(value)
+    value = request_data.get('async', request.args.get('async'))
+    if value is not None:
+        return not is_true(value)
+    return render_job_settings.get('sync_default', True)
+
+def build_video_result(result_path, message, base_url):
+    """构建视频渲染结果（同步响应和任务结果使用相同的格式）"""
+    # 获取实际生成的文件名
+    actual_filename = os.path.basename(result_path)
+    relative_url = f"/videos/{actual_filename}"
+    return {
+        "success": True,
+        "video_path": result_path,
+        "video_url": relative_url,
+        "video_full_url": f"{base_url}{relative_url}",
+        "message": message
+    }
+
+def build_request_fingerprint(kind, parts):
+    """
+    计算规范化渲染请求的指纹：素材按文件内容摘要，其余为规范化后的渲染参数
+    
+    Args:
+        kind: 任务类型
+        parts: 规范化的请求内容（素材文件应先转换为 RenderCache.file_digest）
+    """
+    return RenderCache.make_key({'kind': kind, **parts})
+
+def run_render(kind, render, message, request_data, fingerprint):
+    """
+    执行渲染：默认在请求中同步渲染并直接返回结果，async为真时提交为后台任务并返回202和任务ID
+    
+    指纹相同的请求会合并：渲染中的任务直接附加，已完成且视频仍存在的任务立即返回结果。
+    客户端提供 Idempotency-Key 请求头时按该键去重，同一个键用于内容不同的请求返回422。
+    排队的任务数达到上限时立即返回429，Retry-After 头为预计的等待秒数。
+    
+    Args:
+        kind: 任务类型
+        render: 执行渲染并返回视频路径的函数，接受可选的 progress_callback 参数
+        message: 成功时的提示信息
+        request_data: 请求数据
+        fingerprint: 规范化请求的指纹，见 build_request_fingerprint
+    """
+    # 在请求上下文中确定URL前缀，后台线程中无法访问request
+    base_url = get_full_url('')
+    idempotency_key = request.headers.get('Idempotency-Key')
+    if idempotency_key:
+        dedup_key, reuse_ttl = f"idempotency:{idempotency_key}", None
+    else:
+        dedup_key, reuse_ttl = fingerprint, job_dedup_ttl
+    
+    try:
+        job, created = job_service.find_or_submit(
+            dedup_key, fingerprint, kind,
+            lambda progress_callback: build_video_result(render(progress_callback), message, base_url),
+            reuse_ttl=reuse_ttl)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 422
+    except QueueFullError as e:
+        logger.warning(f"渲染队列已满，拒绝请求 ({kind})")
+        response = jsonify({"success": False, "error": str(e), "retry_after": e.retry_after,
+                            "capacity": job_service.capacity()})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 429
+    if created:
+        logger.info(f"已提交渲染任务 {job.id} ({kind})")
+    else:
+        logger.info(f"重复的渲染请求，复用任务 {job.id} ({job.state})")
+    
+    if wants_sync(request_data):
+        job_service.wait(job)
+    if job.state == job.SUCCEEDED:
+        return jsonify({**job.result, "job_id": job.id, "deduplicated": not created})
+    if job.state == job.FAILED:
+        return jsonify({"success": False, "job_id": job.id, "error": job.error}), 500
+    
+    status_url = f"/api/video/jobs/{job.id}"
+    return jsonify({
+        "success": True,
+        "job_id": job.id,
+        "state": job.state,
+        "deduplicated": not created,
+        "status_url": status_url,
+        "status_full_url": f"{base_url}{status_url}",
+        "events_url": f"{status_url}/events"
+    }), 202
+
 @video_bp.route('/create', methods=['POST'])
 def create_video():
     """
@@ -47,9 +248,10 @@ def create_video():
         - transition_duration: 转场持续时间
         - output_fps: 输出视频帧率
         - output_quality: 输出视频质量
+        - async: （可选）为真时提交为后台任务并返回202和任务ID，默认同步渲染并直接返回结果
     
     返回:
-        视频文件的URL
+        视频文件的URL；后台任务时返回202和任务ID，通过 /api/video/jobs/<job_id> 查询结果
     """
     try:
         # 获取请求数据
@@ -62,6 +264,9 @@ def create_video():
         if not images_data:
             return jsonify({"error": "未提供图片数据"}), 400
         
+        # 已渲染的片段文件（clip_path）只供桌面端导出复用，API请求不能引用服务器上的任意文件
+        images_data = [{key: value for key, value in img.items() if key != 'clip_path'} for img in images_data]
+        
         # 确保所有图片路径都存在
         for img in images_data:
             img_path = img.get('image_path')
@@ -78,6 +283,24 @@ def create_video():
         output_fps = int(request_data.get('output_fps', 30))
         output_quality = request_data.get('output_quality', 'medium')
         
+        # 各项与 VideoService.get_item_cache_parts 的组成相同（图片、动画、时长、音频），另加字幕文本；
+        # clip_path 已在上面去掉，渲染读取的每个输入都包含在指纹中
+        fingerprint = build_request_fingerprint('create', {
+            'items': [{
+                'image': RenderCache.file_digest(img['image_path']),
+                'animation': img.get('animation'),
+                'duration': round(float(img.get('duration', 5.0)), 6),
+                # 不存在的音频在渲染时会被忽略
+                'audio': RenderCache.file_digest(img['audio_path'])
+                         if img.get('audio_path') and os.path.exists(img['audio_path']) else None,
+                'text': img.get('text', '')
+            } for img in images_data],
+            'transition': transition,
+            'transition_duration': transition_duration,
+            'output_fps': output_fps,
+            'output_quality': output_quality
+        })
+        
         # 创建输出目录
         output_dir = path_utils.get_output_dir()
         
@@ -87,31 +310,21 @@ def create_video():
         output_path = os.path.join(output_dir, output_filename)
         
         # 创建视频
-        logger.info(f"开始创建视频，图片数: {len(images_data)}, 转场: {transition}")
-        
-        result_path = video_service.create_video(
-            items=images_data,
-            output_path=output_path,
-            transition=transition,
-            transition_duration=transition_duration,
-            advanced_options={
-                'output_quality': output_quality
-            }
-        )
-        
-        # 获取实际生成的文件名
-        actual_filename = os.path.basename(result_path)
-        # 返回结果
-        relative_url = f"/videos/{actual_filename}"
-        full_url = get_full_url(relative_url)
-        
-        return jsonify({
-            "success": True,
-            "video_path": result_path,
-            "video_url": relative_url,
-            "video_full_url": full_url,
-            "message": "视频创建成功"
-        })
+        def render(progress_callback=None):
+            logger.info(f"开始创建视频，图片数: {len(images_data)}, 转场: {transition}")
+            return call_video_service(
+                'create_video',
+                items=images_data,
+                output_path=output_path,
+                transition=transition,
+                transition_duration=transition_duration,
+                advanced_options={
+                    'output_quality': output_quality
+                },
+                progress_callback=progress_callback
+            )
+        
+        return run_render('create', render, "视频创建成功", request_data, fingerprint)
         
     except Exception as e:
         logger.error(f"创建视频时出错: {str(e)}")
@@ -170,6 +383,91 @@ def list_videos():
             "error": str(e)
         }), 500
 
+@video_bp.route('/cache/stats', methods=['GET'])
+def get_render_cache_stats():
+    """
+    获取渲染缓存的统计信息
+    
+    返回:
+        命中数、未命中数、命中率、淘汰数、条目数和占用空间
+    """
+    if not render_cache:
+        return jsonify({"success": True, "enabled": False})
+    return jsonify({
+        "success": True,
+        "enabled": True,
+        "stats": render_cache.stats()
+    })
+
+@video_bp.route('/capacity', methods=['GET'])
+def get_render_capacity():
+    """
+    获取本机渲染槽位和等待队列的占用情况（供负载均衡和自动扩缩容使用）
+    
+    服务只在一个API进程中运行（见 claim_render_slots），返回的数量即本机的总数。
+    
+    返回:
+        槽位数、执行中和排队中的任务数、队列上限、被拒绝的请求数和预计等待时间
+    """
+    return jsonify({"success": True, **job_service.capacity(),
+                    "worker_pool": render_pool.stats() if render_pool else None})
+
+@video_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    查询渲染任务的状态
+    
+    路径参数:
+        - job_id: 提交渲染时返回的任务ID
+    
+    返回:
+        任务状态（queued/running/succeeded/failed）、进度，
+        成功时 result 中包含视频URL，失败时 error 为错误信息
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": f"任务 {job_id} 不存在"
+        }), 404
+    return jsonify({"success": True, **job.to_dict()})
+
+@video_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """
+    以 Server-Sent Events 推送渲染任务的状态和进度
+    
+    路径参数:
+        - job_id: 提交渲染时返回的任务ID
+    
+    返回:
+        text/event-stream：任务每次变化时发送 progress 事件，结束时发送 done 事件后关闭，
+        事件数据与 /api/video/jobs/<job_id> 的响应相同；空闲时定期发送注释行保持连接
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "error": f"任务 {job_id} 不存在"
+        }), 404
+    
+    def generate():
+        version = None
+        while True:
+            current = job_service.wait_for_update(job, version, timeout=job_events_keepalive)
+            if current == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = current
+            event = "done" if job.finished else "progress"
+            data = json.dumps({"success": True, **job.to_dict()}, ensure_ascii=False)
+            yield f"event: {event}\nid: {version}\ndata: {data}\n\n"
+            if job.finished:
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @video_bp.route('/get/<filename>', methods=['GET'])
 def get_video(filename):
     """
@@ -210,9 +508,10 @@ def image2video():
         - animation_curve: 动画曲线类型（"线性", "缓入", "缓出"等，AnimationService中的预设）
         - output_fps: 输出视频帧率（默认30）
         - output_quality: 输出视频质量（low/medium/high）
+        - async: （可选）为真时提交为后台任务并返回202和任务ID，默认同步渲染并直接返回结果
     
     返回:
-        视频文件的URL
+        视频文件的URL；后台任务时返回202和任务ID，通过 /api/video/jobs/<job_id> 查询结果
     """
     try:
         # 获取请求数据
@@ -301,8 +600,16 @@ def image2video():
             output_fps = int(output_fps_value)
         output_quality = request_data.get('output_quality', 'medium')
         
+        fingerprint = build_request_fingerprint('image2video', {
+            'image': RenderCache.file_digest(image_path),
+            'audio': RenderCache.file_digest(audio_path),
+            'animation': [animation_scale, animation_position, animation_curve],
+            'output_fps': output_fps,
+            'output_quality': output_quality
+        })
+        
         # 创建自定义动画设置
-        animation = video_service.animation_service.combine_animation_settings(
+        animation = services.get('animation').combine_animation_settings(
             animation_scale, 
             animation_position, 
             animation_curve
@@ -325,29 +632,19 @@ def image2video():
         output_path = os.path.join(output_dir, output_filename)
         
         # 创建视频
-        logger.info(f"开始创建单图视频，图片: {image_path}, 音频: {audio_path}")
-        
-        result_path = video_service.create_video(
-            items=[image_item],
-            output_path=output_path,
-            advanced_options={
-                'output_quality': output_quality
-            }
-        )
-        
-        # 获取实际生成的文件名
-        actual_filename = os.path.basename(result_path)
-        # 返回结果
-        relative_url = f"/videos/{actual_filename}"
-        full_url = get_full_url(relative_url)
-        
-        return jsonify({
-            "success": True,
-            "video_path": result_path,
-            "video_url": relative_url,
-            "video_full_url": full_url,
-            "message": "单图音频视频创建成功"
-        })
+        def render(progress_callback=None):
+            logger.info(f"开始创建单图视频，图片: {image_path}, 音频: {audio_path}")
+            return call_video_service(
+                'create_video',
+                items=[image_item],
+                output_path=output_path,
+                advanced_options={
+                    'output_quality': output_quality
+                },
+                progress_callback=progress_callback
+            )
+        
+        return run_render('image2video', render, "单图音频视频创建成功", request_data, fingerprint)
         
     except Exception as e:
         logger.error(f"创建单图视频时出错: {str(e)}")
@@ -368,9 +665,10 @@ def videos2video():
         - transition_duration: 转场持续时间（秒）
         - output_fps: 输出视频帧率（可选，默认使用第一个视频的帧率）
         - output_quality: 输出视频质量（low/medium/high）
+        - async: （可选）为真时提交为后台任务并返回202和任务ID，默认同步渲染并直接返回结果
     
     返回:
-        合并后的视频文件URL
+        合并后的视频文件URL；后台任务时返回202和任务ID，通过 /api/video/jobs/<job_id> 查询结果
     """
     try:
         # 获取请求数据
@@ -431,6 +729,14 @@ def videos2video():
             output_fps = int(output_fps_value)
         output_quality = request_data.get('output_quality', 'medium')
         
+        fingerprint = build_request_fingerprint('videos2video', {
+            'videos': [RenderCache.file_digest(path) for path in video_paths],
+            'transition': transition,
+            'transition_duration': transition_duration,
+            'output_fps': output_fps,
+            'output_quality': output_quality
+        })
+        
         # 创建输出目录
         output_dir = path_utils.get_output_dir()
         
@@ -440,30 +746,20 @@ def videos2video():
         output_path = os.path.join(output_dir, output_filename)
         
         # 合并视频
-        logger.info(f"开始合并视频，视频数量: {len(video_paths)}, 转场: {transition}")
-        
-        result_path = video_service.combine_videos(
-            video_paths=video_paths,
-            output_path=output_path,
-            transition=transition,
-            transition_duration=transition_duration,
-            output_fps=output_fps,
-            output_quality=output_quality
-        )
-        
-        # 获取实际生成的文件名
-        actual_filename = os.path.basename(result_path)
-        # 返回结果
-        relative_url = f"/videos/{actual_filename}"
-        full_url = get_full_url(relative_url)
-        
-        return jsonify({
-            "success": True,
-            "video_path": result_path,
-            "video_url": relative_url,
-            "video_full_url": full_url,
-            "message": "视频合并成功"
-        })
+        def render(progress_callback=None):
+            logger.info(f"开始合并视频，视频数量: {len(video_paths)}, 转场: {transition}")
+            return call_video_service(
+                'combine_videos',
+                video_paths=video_paths,
+                output_path=output_path,
+                transition=transition,
+                transition_duration=transition_duration,
+                output_fps=output_fps,
+                output_quality=output_quality,
+                progress_callback=progress_callback
+            )
+        
+        return run_render('videos2video', render, "视频合并成功", request_data, fingerprint)
         
     except Exception as e:
         logger.error(f"合并视频时出错: {str(e)}")
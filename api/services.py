@@ -0,0 +1,10 @@
+"""
+API服务容器
+
+各路由模块在这里注册自己使用的服务，服务在第一次被请求使用时才创建，
+健康检查、上传和文件列表等请求不会加载 moviepy、OpenCV 等渲染依赖。
+"""
+
+from core.services.container import ServiceContainer
+
+services = ServiceContainer()
@@ -25,13 +25,68 @@ VIDEO_SETTINGS = {
     "default_duration": 5,
     "default_transition": "淡入淡出",
     "default_transition_duration": 0.7,
-    "default_quality": "medium"
+    "default_quality": "medium",
+    # 编码后端: moviepy（默认）或 ffmpeg_pipe（原始帧管道直接写入ffmpeg）
+    "encoder": os.environ.get("VIDEO_ENCODER", "moviepy"),
+    "encoder_options": {
+        "preset": os.environ.get("VIDEO_ENCODER_PRESET", "medium"),
+        "crf": int(os.environ.get("VIDEO_ENCODER_CRF", 23)),
+        "pix_fmt": "yuv420p",
+    },
+    # 渲染结果缓存（data/render_cache），按最久未使用淘汰以保持在磁盘预算内
+    "render_cache": {
+        "enabled": os.environ.get("RENDER_CACHE_ENABLED", "1") not in ("0", "false", "False"),
+        "max_size_mb": int(os.environ.get("RENDER_CACHE_MAX_MB", 2048)),
+    },
+    # 后台渲染任务：同时执行的任务数、保留的已结束任务数，以及未指定 sync/async 时是否同步渲染
+    # （默认同步，与旧客户端的行为一致；设为0时未指定的请求提交为后台任务，旧客户端会收到202而不是视频URL）
+    "jobs": {
+        # 渲染槽位数，0表示按CPU核心数和内存自动计算（每个槽位占用的核心数和内存见下）
+        "workers": int(os.environ.get("RENDER_JOB_WORKERS", 0)),
+        "cores_per_slot": float(os.environ.get("RENDER_CORES_PER_SLOT", 4)),
+        "memory_per_slot_mb": int(os.environ.get("RENDER_MEMORY_PER_SLOT_MB", 1536)),
+        # 最多排队等待的任务数，队列满时返回429
+        "max_queue": int(os.environ.get("RENDER_QUEUE_SIZE", 16)),
+        "max_jobs": int(os.environ.get("RENDER_JOB_HISTORY", 1000)),
+        "sync_default": os.environ.get("RENDER_SYNC_DEFAULT", "1") in ("1", "true", "True"),
+        # 任务进度事件流（SSE）空闲时发送保活注释的间隔（秒）
+        "events_keepalive": float(os.environ.get("RENDER_EVENTS_KEEPALIVE", 15)),
+        # 重复请求去重：内容相同的请求在渲染完成后多长时间内（秒）直接复用结果
+        "dedup_ttl": float(os.environ.get("RENDER_DEDUP_TTL", 600)),
+    },
+    # 预先启动的渲染工作进程（每个渲染槽位一个，每台主机只由一个API进程启动），执行一定数量的任务或内存超限后替换
+    "worker_pool": {
+        "enabled": os.environ.get("RENDER_WORKER_POOL", "1") not in ("0", "false", "False"),
+        "max_jobs_per_worker": int(os.environ.get("RENDER_WORKER_MAX_JOBS", 50)),
+        "max_rss_mb": int(os.environ.get("RENDER_WORKER_MAX_RSS_MB", 2048)),
+        "start_method": os.environ.get("RENDER_WORKER_START_METHOD", "spawn"),
+    }
 }
 
 # 音频服务设置
 AUDIO_SETTINGS = {
     "language": "zh",
     "speed": 1.0,
+    # 默认语音合成后端：gtts（在线）、espeak（本地离线）或 stub（确定性纯音，用于基准测试和CI）
+    "backend": os.environ.get("TTS_BACKEND", "gtts"),
+    # 语音合成缓存（data/tts_cache），相同文本和合成参数只合成一次
+    "tts_cache": {
+        "enabled": os.environ.get("TTS_CACHE_ENABLED", "1") not in ("0", "false", "False"),
+        "max_size_mb": int(os.environ.get("TTS_CACHE_MAX_MB", 256)),
+    },
+    # 长文本分句合成：每句单独缓存、并发合成后拼接为一条音轨
+    "chunking": {
+        "enabled": os.environ.get("TTS_CHUNK_ENABLED", "1") not in ("0", "false", "False"),
+        "max_chars": int(os.environ.get("TTS_CHUNK_MAX_CHARS", 100)),
+        "workers": int(os.environ.get("TTS_CHUNK_WORKERS", 4)),
+    },
+    # 批量合成：并发数、合成后端每秒请求数上限、同时进行的请求数上限和每次请求的失败重试次数
+    "batch": {
+        "workers": int(os.environ.get("TTS_BATCH_WORKERS", 4)),
+        "requests_per_second": float(os.environ.get("TTS_RATE_LIMIT", 2.0)),
+        "max_concurrent_requests": int(os.environ.get("TTS_MAX_CONCURRENT_REQUESTS", 4)),
+        "max_retries": int(os.environ.get("TTS_MAX_RETRIES", 3)),
+    },
 }
 
 # 日志配置
@@ -1,6 +1,26 @@
-from core.services.animation_service import AnimationService
-from core.services.transition_service import TransitionService
-from core.services.video_service import VideoService
-from core.services.audio_service import AudioService
+import importlib
 
-__all__ = ['AnimationService', 'TransitionService', 'VideoService', 'AudioService']
+from core.services.container import ServiceContainer
+
+# 服务类按需导入（PEP 562）：视频、动画、转场服务依赖 moviepy 和 OpenCV，
+# 只导入 core.services 下的轻量模块（如 render_cache、job_service）时不应加载它们
+_lazy_exports = {
+    'AnimationService': 'core.services.animation_service',
+    'TransitionService': 'core.services.transition_service',
+    'VideoService': 'core.services.video_service',
+    'AudioService': 'core.services.audio_service',
+}
+
+__all__ = ['AnimationService', 'TransitionService', 'VideoService', 'AudioService', 'ServiceContainer']
+
+
+def __getattr__(name):
+    if name in _lazy_exports:
+        value = getattr(importlib.import_module(_lazy_exports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_exports))
@@ -31,6 +31,18 @@ class AnimationService:
             "随机": None  # 随机曲线标记，实际函数会在运行时确定
         }
 
+        # 与曲线函数对应的ffmpeg表达式，{p} 为动画进度表达式
+        self.curve_expressions = {
+            "线性": "{p}",
+            "缓入": "pow({p},2)",
+            "缓出": "1-pow(1-{p},2)",
+            "缓入缓出": "3*pow({p},2)-2*pow({p},3)",
+            "强缓入": "pow({p},3)",
+            "强缓出": "1-pow(1-{p},3)",
+            "平滑弹入": "1-cos({p}*PI/2)",
+            "平滑弹出": "sin({p}*PI/2)"
+        }
+
         # 缩放预设选项
         self.scale_presets = {
             "无": [1.0, 1.0],
@@ -168,15 +180,280 @@ class AnimationService:
         Returns:
             曲线函数
         """
+        return self.curve_functions[self.resolve_curve_name(curve_name)]
+
+    def resolve_curve_name(self, curve_name: str) -> str:
+        """
+        将曲线名称解析为具体的曲线（"随机"时随机选择，未知名称时使用线性）
+        
+        Args:
+            curve_name: 曲线名称
+            
+        Returns:
+            具体的曲线名称
+        """
         if curve_name == "随机":
             # 当指定随机曲线时，随机选择一个曲线（除了"随机"本身）
             curve_options = list(self.curve_functions.keys())
             curve_options.remove("随机")
             selected_curve = random.choice(curve_options)
             print(f"随机选择曲线: '{selected_curve}'")
-            return self.curve_functions[selected_curve]
+            return selected_curve
+        
+        if curve_name not in self.curve_functions:
+            return "线性"
+        return curve_name
+
+    def resolve_animation_settings(self, animation_settings: Dict) -> Dict:
+        """
+        返回曲线已确定的动画设置副本，保证同一片段的各个渲染后端使用同一条曲线
+        
+        Args:
+            animation_settings: 动画设置字典
+            
+        Returns:
+            曲线已解析的动画设置
+        """
+        resolved = dict(animation_settings)
+        resolved['curve'] = self.resolve_curve_name(animation_settings.get('curve', '线性'))
+        return resolved
+
+    def compose_affine_matrix(self, width: int, height: int, scale: float,
+                              offset_x: float, offset_y: float,
+                              source_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        将缩放、防黑边缩放和平移合成为一个仿射矩阵，只需对源帧重采样一次
+
+        合成结果等价于先以中心缩放（M_scale）、再平移（M_translate）的两次warpAffine：
+        M = M_translate · M_scale
+
+        Args:
+            width: 输出帧宽度
+            height: 输出帧高度
+            scale: 当前缩放值
+            offset_x: 当前水平位移（相对宽度的比例）
+            offset_y: 当前垂直位移（相对高度的比例）
+            source_size: 源图像尺寸 (width, height)，与输出尺寸不同时，
+                矩阵会同时完成从源图像到输出尺寸的缩放
+
+        Returns:
+            2x3 的 float32 仿射矩阵
+        """
+        return self.compose_affine_matrices(width, height, np.array([scale]), np.array([offset_x]),
+                                            np.array([offset_y]), source_size)[0]
+
+    def compose_affine_matrices(self, width: int, height: int, scales: np.ndarray,
+                                offsets_x: np.ndarray, offsets_y: np.ndarray,
+                                source_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        compose_affine_matrix 的向量化版本，一次合成多帧的仿射矩阵
+
+        Args:
+            width: 输出帧宽度
+            height: 输出帧高度
+            scales: 每帧的缩放值
+            offsets_x: 每帧的水平位移（相对宽度的比例）
+            offsets_y: 每帧的垂直位移（相对高度的比例）
+            source_size: 源图像尺寸 (width, height)
+
+        Returns:
+            (N, 2, 3) 的 float32 仿射矩阵表
+        """
+        scales = np.asarray(scales, dtype=np.float64)
+        offsets_x = np.asarray(offsets_x, dtype=np.float64)
+        offsets_y = np.asarray(offsets_y, dtype=np.float64)
+
+        # 与原实现保持一致：只有缩放值不为1时才执行缩放（含防黑边缩放）
+        # 计算需要增加的缩放比例，确保移动后不会露出黑边
+        border_scales = np.maximum(1.0, np.maximum(1.0 + 2 * np.abs(offsets_x), 1.0 + 2 * np.abs(offsets_y)))
+        effective_scales = np.where(scales != 1.0, scales * border_scales, 1.0)
+
+        # 源图像到输出尺寸的缩放比例（M = M_translate · M_scale · M_resize）
+        ratio_x, ratio_y = 1.0, 1.0
+        if source_size:
+            ratio_x = width / source_size[0]
+            ratio_y = height / source_size[1]
+
+        matrices = np.zeros((len(scales), 2, 3), dtype=np.float64)
+        matrices[:, 0, 0] = effective_scales * ratio_x
+        matrices[:, 0, 2] = width * (1 - effective_scales) / 2 + offsets_x * width
+        matrices[:, 1, 1] = effective_scales * ratio_y
+        matrices[:, 1, 2] = height * (1 - effective_scales) / 2 + offsets_y * height
+        return matrices.astype(np.float32)
+
+    def build_motion_table(self, animation_settings: Dict, duration: float,
+                           fps: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        一次向量化计算每个输出帧的缩放和位移
+
+        第i帧对应时间 t=i/fps，帧数与moviepy按该帧率输出的帧数一致。
+
+        Args:
+            animation_settings: 动画设置（曲线应已确定）
+            duration: 动画时长（秒）
+            fps: 帧率，默认使用 self.default_fps
+
+        Returns:
+            (缩放, 水平位移, 垂直位移) 三个长度为帧数的数组
+        """
+        fps = fps or self.default_fps
+        start_scale, end_scale = animation_settings.get('scale', [1.0, 1.0])
+        (start_x, start_y), (end_x, end_y) = animation_settings.get('position', [(0, 0), (0, 0)])
+        curve_func = self.get_curve_function(animation_settings.get('curve', '线性'))
+
+        times = np.arange(0, duration, 1.0 / fps)
+        if len(times) == 0:
+            times = np.zeros(1)
+        progress = np.minimum(1.0, times / duration) if duration > 0 else np.ones_like(times)
+        values = np.broadcast_to(np.asarray(curve_func(progress), dtype=np.float64), progress.shape)
+
+        scales = start_scale + (end_scale - start_scale) * values
+        offsets_x = start_x + (end_x - start_x) * values
+        offsets_y = start_y + (end_y - start_y) * values
+        return scales, offsets_x, offsets_y
+
+    def build_transform_table(self, animation_settings: Dict, duration: float,
+                              output_size: Tuple[int, int], source_size: Optional[Tuple[int, int]] = None,
+                              fps: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        预先计算每个输出帧完整合成后的仿射矩阵
+
+        Args:
+            animation_settings: 动画设置（曲线应已确定）
+            duration: 动画时长（秒）
+            output_size: 输出帧尺寸 (width, height)
+            source_size: 源图像尺寸 (width, height)
+            fps: 帧率，默认使用 self.default_fps
+
+        Returns:
+            ((N, 2, 3) 的仿射矩阵表, 长度为N的布尔数组：该帧是否无需变换)
+        """
+        scales, offsets_x, offsets_y = self.build_motion_table(animation_settings, duration, fps)
+        width, height = output_size
+        matrices = self.compose_affine_matrices(width, height, scales, offsets_x, offsets_y, source_size)
+        same_size = source_size is None or tuple(source_size) == (width, height)
+        identity = (scales == 1.0) & (offsets_x == 0) & (offsets_y == 0) & same_size
+        return matrices, identity
+
+    def is_static(self, animation_settings: Optional[Dict]) -> bool:
+        """
+        判断动画设置是否没有实际运动（起止缩放和位移都相同）
+
+        Args:
+            animation_settings: 动画设置字典，None表示无动画
+
+        Returns:
+            没有运动时返回True
+        """
+        if not animation_settings:
+            return True
+        start_scale, end_scale = animation_settings.get('scale', [1.0, 1.0])
+        start_pos, end_pos = animation_settings.get('position', [(0, 0), (0, 0)])
+        return (float(start_scale) == float(end_scale)
+                and tuple(map(float, start_pos)) == tuple(map(float, end_pos)))
+
+    def get_max_scale(self, animation_settings: Dict) -> float:
+        """
+        获取动画过程中的最大有效缩放值（含防黑边缩放）
+
+        所有曲线在[0, 1]上单调，最大值一定出现在起点或终点，
+        用于决定渲染前源图像需要保留的分辨率。
+
+        Args:
+            animation_settings: 动画设置字典
+
+        Returns:
+            最大有效缩放值（不小于1.0）
+        """
+        start_scale, end_scale = animation_settings.get('scale', [1.0, 1.0])
+        start_pos, end_pos = animation_settings.get('position', [(0, 0), (0, 0)])
+        border_scale = max(1.0, *(1.0 + 2 * abs(v) for v in (*start_pos, *end_pos)))
+        return max(1.0, start_scale, end_scale) * border_scale
+
+    def build_ffmpeg_filter(self, animation_settings: Dict, duration: float, fps: float,
+                            output_size: Tuple[int, int], supersample: int = 1,
+                            frame_range: Optional[Tuple[int, int]] = None) -> Optional[str]:
+        """
+        将动画设置编译为ffmpeg的zoompan滤镜表达式，由ffmpeg原生完成缩放和平移
+        
+        输入为单张源图像，zoompan在其上逐帧输出 d 帧。动画进度、曲线、缩放、
+        防黑边缩放和位移都被展开为关于输出帧序号 on 的表达式。
+        
+        Args:
+            animation_settings: 曲线已解析的动画设置
+            duration: 动画时长（秒）
+            fps: 帧率
+            output_size: 输出尺寸 (width, height)
+            supersample: 源图像在zoompan前放大的倍数，用于减小整数像素裁剪带来的抖动
+            frame_range: 只渲染 [起始帧, 结束帧) 范围内的帧（用于分段并行渲染），None表示全部
             
-        return self.curve_functions.get(curve_name, self.curve_functions["线性"])
+        Returns:
+            滤镜字符串；动画无法用zoompan表达时返回None
+        """
+        curve_name = animation_settings.get('curve', '线性')
+        if curve_name not in self.curve_expressions:
+            return None
+        if not self._fits_zoompan(animation_settings, curve_name):
+            return None
+        
+        start_scale, end_scale = map(float, animation_settings.get('scale', [1.0, 1.0]))
+        start_pos, end_pos = animation_settings.get('position', [(0, 0), (0, 0)])
+        start_x, start_y = map(float, start_pos)
+        end_x, end_y = map(float, end_pos)
+        
+        frame_count = len(np.arange(0, duration, 1.0 / fps))
+        first_frame = 0
+        if frame_range:
+            first_frame, end_frame = frame_range
+            frame_count = end_frame - first_frame
+        progress = f"min(1,(on+{first_frame})/{duration * fps:.6f})" if duration > 0 else "1"
+        curve = "(" + self.curve_expressions[curve_name].format(p=progress) + ")"
+        
+        def lerp(start, end):
+            return f"({start:.6f}+({end - start:.6f})*{curve})"
+        
+        scale = lerp(start_scale, end_scale)
+        offset_x = lerp(start_x, end_x)
+        offset_y = lerp(start_y, end_y)
+        # 缩放值乘以防黑边缩放，保证可见区域始终在源图像内部
+        zoom = f"{scale}*max(1,max(1+2*abs({offset_x}),1+2*abs({offset_y})))"
+        # 可见区域左上角（源图像像素）：iw*((zoom-1)/2 - offset)/zoom
+        x = f"iw*(({zoom}-1)/2-{offset_x})/({zoom})"
+        y = f"ih*(({zoom}-1)/2-{offset_y})/({zoom})"
+        
+        width, height = output_size
+        filters = []
+        if supersample > 1:
+            filters.append(f"scale=iw*{supersample}:ih*{supersample}:flags=bicubic")
+        filters.append(f"zoompan=z='{zoom}':x='{x}':y='{y}':d={frame_count}"
+                       f":s={width}x{height}:fps={fps}")
+        return ",".join(filters)
+
+    def _fits_zoompan(self, animation_settings: Dict, curve_name: str) -> bool:
+        """
+        检查动画在整个过程中是否都能由zoompan实现
+        
+        zoompan要求缩放不小于1，且可见区域始终在源图像内部。OpenCV路径在缩放值
+        恰好为1时不做防黑边缩放，超出部分使用反射填充，zoompan无法实现；
+        这种情况只允许出现在动画的起点或终点（单帧），否则回退到OpenCV路径。
+        """
+        start_scale, end_scale = map(float, animation_settings.get('scale', [1.0, 1.0]))
+        start_pos, end_pos = animation_settings.get('position', [(0, 0), (0, 0)])
+        start_x, start_y = map(float, start_pos)
+        end_x, end_y = map(float, end_pos)
+        
+        values = self.curve_functions[curve_name](np.linspace(0, 1, 101))
+        scale = start_scale + (end_scale - start_scale) * values
+        offset_x = start_x + (end_x - start_x) * values
+        offset_y = start_y + (end_y - start_y) * values
+        border = np.maximum(1.0, np.maximum(1 + 2 * np.abs(offset_x), 1 + 2 * np.abs(offset_y)))
+        zoom = scale * border
+        if not (np.all(scale >= 1.0) and np.all(zoom <= 10.0)):
+            return False
+        
+        # 缩放值为1且有位移的帧（反射填充）只允许出现在起点或终点
+        reflected = np.flatnonzero((scale == 1.0) & ((offset_x != 0) | (offset_y != 0)))
+        return bool(np.all((reflected == 0) | (reflected == len(values) - 1)))
 
     def get_animation_settings(self, animation: Union[str, Dict]) -> Dict:
         """
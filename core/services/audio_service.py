@@ -1,55 +1,493 @@
+import json
 import os
+import random
+import re
+import shutil
+import threading
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from pathlib import Path
-from typing import Optional, List
-from gtts import gTTS
+from typing import Callable, Dict, Optional, List
 import subprocess
 import platform
 import os.path
+from .narration_track import NarrationTrack
+from .render_cache import RenderCache
+from .tts_backends import TTSBackend, get_tts_backend
 from ..utils.path_utils import PathUtils
+from ..utils.rate_limiter import RateLimiter
 
 class AudioService:
+    # 语音合成缓存的默认磁盘预算（字节）
+    DEFAULT_TTS_CACHE_BYTES = 256 * 1024 * 1024
+    
+    # 句末标点（中文和西文），后面可以跟引号或括号；西文句点后必须是空白或结尾，避免切开小数和缩写
+    SENTENCE_BREAK = re.compile(r'(?:[。！？；!?;…\n]+|\.(?=\s|$))[”’」』）)\]"\']*')
+    # 超长句子在分句标点处继续切分
+    CLAUSE_BREAK = re.compile(r'[，,、：:]')
+    # 分段时间戳文件的扩展名（与音频文件同名）
+    SEGMENTS_SUFFIX = '.segments.json'
+    # 拼接长文本语音时各输出格式使用的编码器
+    SPEECH_CODECS = {'mp3': 'libmp3lame', 'wav': 'pcm_s16le'}
+    
     def __init__(self):
         self.path_utils = PathUtils()
+        
+        # 语音合成参数：默认语言、默认合成后端（'gtts'、'espeak' 或 'stub'，请求可单独指定）及后端参数
+        self.language = 'zh-cn'
+        self.backend = 'gtts'
+        self.backend_options: Dict[str, dict] = {}
+        self._backends: Dict[str, TTSBackend] = {}
+        self._backends_lock = threading.Lock()
+        
+        # 语音合成缓存（data/tts_cache），按文本和合成参数寻址，设为None时禁用
+        self.tts_cache = RenderCache(self.path_utils.get_data_dir() / 'tts_cache', self.DEFAULT_TTS_CACHE_BYTES)
+        # 正在合成的缓存键，相同的并发请求等待同一次合成
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # 批量合成：并发数、合成后端的请求速率上限（每秒）、同时进行的合成请求数上限（所有项目和分句共享），
+        # 以及每次请求的失败重试次数和首次重试等待（秒，按指数退避）
+        self.batch_workers = 4
+        self.rate_limiter = RateLimiter(2.0)
+        self.max_concurrent_requests = 4
+        self.max_retries = 3
+        self.retry_backoff = 1.0
+        self._request_slots: Optional[threading.BoundedSemaphore] = None
+        
+        # 长文本分句合成：是否启用、每块最多字符数、并发合成的块数（所有文本共享一个线程池），以及拼接音轨的采样率
+        self.chunk_sentences = True
+        self.chunk_max_chars = 100
+        self.chunk_workers = 4
+        self.speech_sample_rate = 24000
+        self._chunk_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+    
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """统一全角/半角字符并合并空白，内容相同的文本得到相同的缓存键"""
+        return ' '.join(unicodedata.normalize('NFKC', text or '').split())
     
-    def generate_speech(self, text: str, filename: str, image_name: str = None) -> Optional[Path]:
+    @classmethod
+    def split_sentences(cls, text: str, max_chars: int = 100) -> List[str]:
         """
-        使用 Google Text-to-Speech 生成语音
+        在句末标点处把文本切分为句子，超过 max_chars 的句子再按逗号等分句标点切分
+        
+        切分结果拼接后与原文一致（只去掉块首尾的空白），修改其中一句只会改变这一句对应的块。
+        对已切分的块再次切分不一定得到它本身（如只有标点的片段），合成各块时不会再切分。
+        
+        Args:
+            text: 要切分的文本
+            max_chars: 每块最多字符数
+            
+        Returns:
+            文本块列表
+        """
+        sentences = []
+        pos = 0
+        for match in cls.SENTENCE_BREAK.finditer(text or ''):
+            sentence = text[pos:match.end()].strip()
+            pos = match.end()
+            if not sentence:
+                continue
+            if sentences and not any(ch.isalnum() for ch in sentence):
+                # 只有标点的片段并入上一句
+                sentences[-1] += sentence
+            else:
+                sentences.append(sentence)
+        tail = (text or '')[pos:].strip()
+        if tail:
+            sentences.append(tail)
+        
+        chunks = []
+        for sentence in sentences:
+            if len(sentence) <= max_chars:
+                chunks.append(sentence)
+                continue
+            # 在分句标点处切分，尽量让每块接近 max_chars
+            current = ''
+            start = 0
+            clauses = []
+            for match in cls.CLAUSE_BREAK.finditer(sentence):
+                clauses.append(sentence[start:match.end()])
+                start = match.end()
+            clauses.append(sentence[start:])
+            for clause in clauses:
+                if current and len(current) + len(clause) > max_chars:
+                    chunks.append(current.strip())
+                    current = ''
+                current += clause
+                # 没有标点的超长片段按长度硬切
+                while len(current) > max_chars:
+                    chunks.append(current[:max_chars].strip())
+                    current = current[max_chars:]
+            if current.strip():
+                chunks.append(current.strip())
+        return [chunk for chunk in chunks if chunk]
+    
+    def get_backend(self, name: Optional[str] = None) -> TTSBackend:
+        """
+        获取语音合成后端实例（按名称复用）
+        
+        Args:
+            name: 后端名称，None时使用默认后端 self.backend
+            
+        Returns:
+            语音合成后端实例
+            
+        Raises:
+            ValueError: 未知的后端名称
+        """
+        name = name or self.backend
+        with self._backends_lock:
+            backend = self._backends.get(name)
+            if backend is None:
+                backend = self._backends[name] = get_tts_backend(name, self.backend_options.get(name))
+        return backend
+    
+    def get_speech_cache_key(self, text: str, lang: Optional[str] = None, voice: Optional[str] = None,
+                             speed: float = 1.0, backend: Optional[str] = None,
+                             audio_format: str = 'mp3') -> str:
+        """
+        生成语音合成的缓存键
         
         Args:
             text: 要转换的文本
-            filename: 音频文件名（优先级低于image_name）
-            image_name: 关联的图片名称（如果提供，将使用此名称作为音频文件名）
+            lang: 语言
+            voice: 音色
+            speed: 语速
+            backend: 合成后端
+            audio_format: 输出格式
             
         Returns:
-            成功返回音频文件路径，失败返回 None
+            缓存键（sha256十六进制）
+        """
+        lang = lang or self.language
+        return RenderCache.make_key({
+            'kind': 'tts',
+            'text': self.normalize_text(text),
+            'lang': lang,
+            'voice': voice or lang,
+            'speed': round(float(speed), 3),
+            'backend': backend or self.backend,
+            'format': audio_format
+        })
+    
+    def synthesize(self, text: str, output_path: Path, lang: Optional[str] = None, voice: Optional[str] = None,
+                   speed: float = 1.0, audio_format: str = 'mp3', backend: Optional[str] = None) -> None:
+        """
+        调用合成后端把文本转换为语音文件（不经过缓存），失败时按 call_with_retry 重试
+        
+        Args:
+            text: 要转换的文本
+            output_path: 输出文件路径
+            lang: 语言
+            voice: 音色
+            speed: 语速
+            audio_format: 输出格式
+            backend: 合成后端名称，None时使用默认后端
+        """
+        tts_backend = self.get_backend(backend)
+        
+        def request():
+            # 同时进行的请求数受 max_concurrent_requests 限制；只有在线服务需要限速，本地后端直接合成
+            with self.get_request_slots():
+                if tts_backend.remote and self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                tts_backend.synthesize(text, output_path, lang or self.language, voice, speed, audio_format)
+        
+        # 只在单次请求这一层重试，上层（分句、批量）不再重试
+        self.call_with_retry(request)
+    
+    def get_request_slots(self) -> threading.BoundedSemaphore:
+        """获取限制同时进行的合成请求数的信号量（按 max_concurrent_requests 创建一次）"""
+        with self._executor_lock:
+            if self._request_slots is None:
+                self._request_slots = threading.BoundedSemaphore(max(1, self.max_concurrent_requests))
+            return self._request_slots
+    
+    def get_chunk_executor(self) -> ThreadPoolExecutor:
+        """获取所有文本共享的分句合成线程池（按 chunk_workers 创建一次）"""
+        with self._executor_lock:
+            if self._chunk_executor is None:
+                self._chunk_executor = ThreadPoolExecutor(max_workers=max(1, self.chunk_workers),
+                                                          thread_name_prefix='tts-chunk')
+            return self._chunk_executor
+    
+    def render_speech(self, text: str, output_path: Path, **options) -> Optional[List[dict]]:
         """
+        合成一段文本的语音（不经过整段缓存）
+        
+        多句的长文本按句子切分，各句在共享的分句线程池中并发合成并分别缓存，再无缝拼接为一条音轨，
+        分段时间戳写入与音频同名的 .segments.json 文件。
+        
+        Args:
+            text: 要转换的文本
+            output_path: 输出文件路径
+            **options: 合成参数（lang、voice、speed、audio_format、backend）
+            
+        Returns:
+            分段时间戳列表 [{index, text, start, end}]（秒）；文本只有一块时返回None
+        """
+        chunks = self.split_sentences(text, self.chunk_max_chars) if self.chunk_sentences else []
+        if len(chunks) <= 1:
+            self.synthesize(text, output_path, **options)
+            return None
+        
+        audio_format = options.get('audio_format', 'mp3')
+        codec = self.SPEECH_CODECS.get(audio_format)
+        if codec is None:
+            raise ValueError(f"不支持的音频格式: {audio_format}")
+        
+        # 各句使用后端的原生格式合成，拼接后只编码一次
+        chunk_options = dict(options, audio_format=self.get_backend(options.get('backend')).native_format)
+        temp_paths: List[Path] = []
+        workers = max(1, min(self.chunk_workers, len(chunks)))
+        print(f"分句合成语音: {len(chunks)}句, {workers}个并发")
         try:
-            # 获取音频目录
-            audio_dir = self.path_utils.get_data_dir() / 'audio'
-            os.makedirs(audio_dir, exist_ok=True)
+            executor = self.get_chunk_executor()
+            futures = [executor.submit(self._get_chunk_speech, chunk, chunk_options, temp_paths) for chunk in chunks]
+            # 等待所有块结束（包括失败后仍在进行的），再清理临时文件
+            wait(futures)
+            chunk_paths = [future.result() for future in futures]
             
-            # 如果提供了图片名称，使用它作为音频文件名
-            if image_name:
-                # 去除扩展名，如果有的话
-                image_base_name = os.path.splitext(os.path.basename(image_name))[0]
-                output_filename = f"{image_base_name}.mp3"
-            else:
-                output_filename = filename
+            track = NarrationTrack(sample_rate=self.speech_sample_rate, channels=1, codec=codec,
+                                   decode_workers=workers)
+            decoded = track.decode_all(chunk_paths)
+            segments = []
+            position = 0
+            for index, (chunk, chunk_path) in enumerate(zip(chunks, chunk_paths)):
+                samples = len(decoded[str(chunk_path)])
+                segments.append({
+                    'index': index,
+                    'text': chunk,
+                    'start': position / self.speech_sample_rate,
+                    'end': (position + samples) / self.speech_sample_rate
+                })
+                position += samples
+            track.encode((decoded[str(path)] for path in chunk_paths), output_path)
+        finally:
+            for temp_path in temp_paths:
+                if temp_path.exists():
+                    os.remove(temp_path)
+        
+        with open(self.get_segments_path(output_path), 'w', encoding='utf-8') as f:
+            json.dump(segments, f, ensure_ascii=False)
+        return segments
+    
+    def _get_chunk_speech(self, chunk: str, options: dict, temp_paths: List[Path]) -> str:
+        """合成一个文本块（启用缓存时每块单独缓存），返回音频路径"""
+        suffix = f".{options['audio_format']}"
+        if self.tts_cache is None:
+            temp_path = self.path_utils.get_temp_dir() / f"tts_{uuid.uuid4().hex}{suffix}"
+            temp_paths.append(temp_path)
+            self.synthesize(chunk, temp_path, **options)
+            return str(temp_path)
+        key = self.get_speech_cache_key(chunk, options.get('lang'), options.get('voice'),
+                                        options.get('speed', 1.0), options.get('backend'), options['audio_format'])
+        # 取出到临时文件，解码前被缓存淘汰也不影响
+        temp_path = self.path_utils.get_temp_dir() / f"tts_{uuid.uuid4().hex}{suffix}"
+        temp_paths.append(temp_path)
+        return self.get_cached_speech(key, chunk, suffix=suffix, dest=temp_path, segment=False, **options)
+    
+    @classmethod
+    def get_segments_path(cls, audio_path) -> Path:
+        """音频文件对应的分段时间戳文件路径"""
+        audio_path = Path(audio_path)
+        return audio_path.with_name(audio_path.stem + cls.SEGMENTS_SUFFIX)
+    
+    @classmethod
+    def get_speech_segments(cls, audio_path) -> Optional[List[dict]]:
+        """
+        读取语音文件的分段时间戳
+        
+        Args:
+            audio_path: 语音文件路径
             
-            # 构建完整的输出路径
-            output_path = audio_dir / output_filename
+        Returns:
+            分段时间戳列表 [{index, text, start, end}]（秒）；没有分段信息时返回None
+        """
+        segments_path = cls.get_segments_path(audio_path)
+        if not segments_path.exists():
+            return None
+        with open(segments_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def get_cached_speech(self, key: str, text: str, suffix: str = '.mp3', dest: Optional[Path] = None,
+                          segment: bool = True, **options) -> str:
+        """
+        从缓存获取语音文件，未命中时合成并存入缓存
+        
+        相同缓存键的并发请求只合成一次，其余请求等待合成完成后直接读取缓存。
+        分句合成的长文本，分段时间戳与音频一起缓存。
+        
+        Args:
+            key: 缓存键
+            text: 要转换的文本
+            suffix: 文件扩展名
+            dest: 把语音文件取出到该路径（硬链接），之后的缓存淘汰不影响它；
+                为None时返回缓存文件本身，它随时可能被淘汰
+            segment: 是否分句合成；分句后的单个块传False，直接整块合成，
+                不会在分句线程池的线程中再向同一线程池提交任务
+            **options: 传给 render_speech 的合成参数（lang、voice、speed、audio_format、backend）
             
-            # 使用 gTTS 生成语音
-            tts = gTTS(text=text, lang='zh-cn')
-            tts.save(str(output_path))
+        Returns:
+            语音文件路径（指定 dest 时为 dest）
+        """
+        segmented = segment and self.chunk_sentences and len(self.split_sentences(text, self.chunk_max_chars)) > 1
+        while True:
+            # 分段时间戳已被淘汰时重新拼接（各句仍在缓存中）
+            if not segmented or self._touch(self.tts_cache.get_path(key, self.SEGMENTS_SUFFIX)):
+                cached_path = self.tts_cache.get(key, suffix, dest=dest)
+                if cached_path:
+                    return cached_path
             
-            print(f"已生成音频: {output_path}")
-            return output_path
+            with self._inflight_lock:
+                event = self._inflight.get(key)
+                owner = event is None
+                if owner:
+                    event = self._inflight[key] = threading.Event()
+            
+            if not owner:
+                # 等待正在进行的合成；合成失败时重新尝试
+                event.wait()
+                continue
+            
+            try:
+                temp_path = self.path_utils.get_temp_dir() / f"tts_{uuid.uuid4().hex}{suffix}"
+                segments_path = self.get_segments_path(temp_path)
+                try:
+                    if not segment:
+                        self.synthesize(text, temp_path, **options)
+                    elif self.render_speech(text, temp_path, **options) is not None:
+                        self.tts_cache.put(key, segments_path, self.SEGMENTS_SUFFIX, move=True)
+                    if dest is None:
+                        return self.tts_cache.put(key, temp_path, suffix, move=True)
+                    self.tts_cache.put(key, temp_path, suffix, link=True)
+                    shutil.move(str(temp_path), str(dest))
+                    return str(dest)
+                finally:
+                    for path in (temp_path, segments_path):
+                        if path.exists():
+                            os.remove(path)
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+                event.set()
+    
+    def generate_speech(self, text: str, filename: str, image_name: str = None, **options) -> Optional[Path]:
+        """
+        使用语音合成后端生成语音
+        
+        相同的文本和合成参数只合成一次，之后直接复用缓存中的语音文件。
+        多句的长文本分句并发合成、每句单独缓存（修改一句只重新合成这一句），
+        拼接后的分段时间戳可以用 get_speech_segments 读取。
+        输出文件名为 {图片名或文件名}_{缓存键前8位}.{格式}，不同文本不会互相覆盖。
+        
+        Args:
+            text: 要转换的文本
+            filename: 音频文件名（优先级低于image_name）
+            image_name: 关联的图片名称（如果提供，将使用此名称作为音频文件名）
+            **options: 合成参数，可以包含：
+                - lang: 语言，默认使用 self.language
+                - voice: 音色，默认使用语言的默认音色
+                - speed: 语速，默认为1.0
+                - audio_format: 输出格式（mp3、wav），默认为mp3
+                - backend: 合成后端，默认使用 self.backend
             
+        Returns:
+            成功返回音频文件路径，失败返回 None
+        """
+        try:
+            return self.create_speech(text, filename, image_name, **options)
         except Exception as e:
             print(f"生成语音时出错: {str(e)}")
             return None
     
+    def create_speech(self, text: str, filename: str, image_name: str = None, lang: Optional[str] = None,
+                      voice: Optional[str] = None, speed: float = 1.0, audio_format: str = 'mp3',
+                      backend: Optional[str] = None) -> Path:
+        """
+        生成语音，失败时抛出异常（参数同 generate_speech）
+        
+        Returns:
+            音频文件路径
+        """
+        # 获取音频目录
+        audio_dir = self.path_utils.get_data_dir() / 'audio'
+        os.makedirs(audio_dir, exist_ok=True)
+        
+        # 如果提供了图片名称，使用它作为音频文件名
+        if image_name:
+            # 去除扩展名，如果有的话
+            base_name = os.path.splitext(os.path.basename(image_name))[0]
+        else:
+            base_name = os.path.splitext(filename)[0]
+        suffix = f".{audio_format}"
+        options = {'lang': lang, 'voice': voice, 'speed': speed, 'audio_format': audio_format,
+                   'backend': backend or self.backend}
+        
+        # 文件名带上缓存键，内容相同的请求得到同一个文件
+        key = self.get_speech_cache_key(text, lang, voice, speed, backend, audio_format)
+        output_path = audio_dir / f"{base_name}_{key[:8]}{suffix}"
+        if output_path.exists():
+            print(f"复用已生成的音频: {output_path}")
+            return output_path
+        
+        # 分段时间戳先于音频写入，音频存在即表示输出完整
+        if self.tts_cache is None:
+            temp_path = self.path_utils.get_temp_dir() / f"tts_{uuid.uuid4().hex}{suffix}"
+            if self.render_speech(text, temp_path, **options) is not None:
+                shutil.move(str(self.get_segments_path(temp_path)), str(self.get_segments_path(output_path)))
+            shutil.move(str(temp_path), str(output_path))
+        else:
+            # 先取出到输出目录中的临时文件（硬链接，缓存淘汰不影响），写入分段时间戳后再原子替换
+            temp_path = output_path.with_name(f".{output_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+            try:
+                self.get_cached_speech(key, text, suffix=suffix, dest=temp_path, **options)
+                self.tts_cache.checkout(key, self.get_segments_path(output_path), self.SEGMENTS_SUFFIX)
+                os.replace(temp_path, output_path)
+            finally:
+                if temp_path.exists():
+                    os.remove(temp_path)
+        
+        print(f"已生成音频: {output_path}")
+        return output_path
+    
+    def call_with_retry(self, func: Callable, *args, **kwargs):
+        """
+        调用 func，失败时按指数退避（带随机抖动）重试 max_retries 次
+        
+        Returns:
+            func 的返回值
+            
+        Raises:
+            Exception: 所有尝试都失败时抛出最后一次的异常
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except ValueError:
+                # 参数错误（如未知的合成后端）重试也不会成功
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                print(f"生成语音失败（第{attempt + 1}次）: {str(e)}，{delay:.1f}秒后重试")
+                time.sleep(delay)
+    
+    @staticmethod
+    def _touch(path: Path) -> bool:
+        """更新缓存文件的访问时间（用于LRU淘汰），文件不存在时返回False"""
+        try:
+            os.utime(path, None)
+            return True
+        except OSError:
+            return False
+    
     def preview_audio(self, audio_path: str):
         """
         预览音频文件
@@ -68,35 +506,57 @@ class AudioService:
             print(f"预览音频时出错: {str(e)}")
             raise
     
-    def batch_generate_speech(self, items: List[dict]) -> List[str]:
+    def batch_generate_speech(self, items: List[dict], progress_callback: Optional[Callable] = None,
+                              workers: Optional[int] = None) -> List[Optional[str]]:
         """
         批量生成语音文件
         
+        多个项目在线程池中并发合成，合成后端的请求受 rate_limiter 限速，同时进行的请求数
+        不超过 max_concurrent_requests；每次请求失败时单独重试，缓存命中的项目不占用请求额度。
+        
         Args:
             items: 包含文本和文件名的字典列表，每个字典可以包含：
                 - text: 转换为语音的文本
                 - filename: 输出文件名
                 - image_path: 图片路径（可选，如果提供将使用图片名称）
+                - voice、speed、format、backend: 合成参数（可选，同 generate_speech）
+            progress_callback: 每个项目完成时调用 progress_callback(已完成数, 总数, 项目索引, 音频路径或None)
+            workers: 并发数，默认使用 self.batch_workers
             
         Returns:
-            生成的音频文件路径列表
-        """
-        results = []
-        for item in items:
-            if 'text' in item:
-                # 从图片路径获取基本文件名，如果有
-                image_name = None
-                if 'image_path' in item and item['image_path']:
-                    image_path = item['image_path']
-                    if isinstance(image_path, Path):
-                        image_path = str(image_path)
-                    image_name = os.path.basename(image_path)
-                
-                # 确定文件名
-                filename = item.get('filename', f"audio_{len(results)}.mp3")
-                
-                # 生成音频
-                audio_path = self.generate_speech(item['text'], filename, image_name)
-                if audio_path:
-                    results.append(str(audio_path))
-        return results 
\ No newline at end of file
+            与 items 顺序一致的音频文件路径列表，没有文本或生成失败的项目为None
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        jobs = []
+        for index, item in enumerate(items):
+            if not item.get('text'):
+                continue
+            # 从图片路径获取基本文件名，如果有
+            image_name = None
+            if item.get('image_path'):
+                image_name = os.path.basename(str(item['image_path']))
+            # 确定文件名
+            filename = item.get('filename', f"audio_{index}.mp3")
+            options = {key: item[field] for field, key in (('voice', 'voice'), ('speed', 'speed'),
+                                                           ('format', 'audio_format'), ('backend', 'backend'))
+                       if item.get(field) is not None}
+            jobs.append((index, item['text'], filename, image_name, options))
+        
+        if not jobs:
+            return results
+        
+        total = len(jobs)
+        workers = max(1, min(workers or self.batch_workers, total))
+        print(f"批量生成语音: {total}个项目, {workers}个并发")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.create_speech, text, filename, image_name, **options): index
+                       for index, text, filename, image_name, options in jobs}
+            for completed, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                try:
+                    results[index] = str(future.result())
+                except Exception as e:
+                    print(f"项目 {index + 1} 生成语音失败: {str(e)}")
+                if progress_callback:
+                    progress_callback(completed, total, index, results[index])
+        return results
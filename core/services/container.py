@@ -0,0 +1,66 @@
+import importlib
+import threading
+from typing import Any, Callable, Dict, List, Union
+
+
+class ServiceContainer:
+    """
+    服务容器：按名称注册服务的创建方式，第一次获取时才创建服务
+
+    视频、动画、转场服务依赖 moviepy、OpenCV 和 numpy，导入就需要数秒；
+    通过容器获取服务，只在第一次渲染时才导入这些模块，应用启动和不渲染的请求不受影响。
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        # 工厂函数可能通过容器获取其他服务，使用可重入锁
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Union[str, Callable[[], Any]]) -> None:
+        """
+        注册服务
+
+        Args:
+            name: 服务名称
+            factory: 创建服务的函数，或 "模块:类名" 形式的字符串（获取时才导入模块，以无参数方式创建）
+        """
+        if isinstance(factory, str):
+            factory = self._import_factory(factory)
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    @staticmethod
+    def _import_factory(path: str) -> Callable[[], Any]:
+        module_name, _, attr = path.partition(':')
+
+        def factory():
+            return getattr(importlib.import_module(module_name), attr)()
+        return factory
+
+    def get(self, name: str) -> Any:
+        """
+        获取服务，第一次获取时创建
+
+        Raises:
+            KeyError: 服务未注册
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"未注册的服务: {name}")
+                self._instances[name] = self._factories[name]()
+                print(f"已加载服务: {name}")
+            return self._instances[name]
+
+    def is_loaded(self, name: str) -> bool:
+        """服务是否已经创建"""
+        return name in self._instances
+
+    def loaded(self) -> List[str]:
+        """已经创建的服务名称"""
+        return list(self._instances)
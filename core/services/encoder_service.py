@@ -0,0 +1,386 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from proglog import TqdmProgressBarLogger
+
+from ..utils.ffmpeg_utils import FFmpegUtils
+from ..utils.path_utils import PathUtils
+
+
+def build_x264_args(size: Tuple[int, int], preset: str = 'medium', crf: Optional[int] = 23,
+                    bitrate: Optional[str] = None, pix_fmt: str = 'yuv420p',
+                    threads: Optional[int] = None) -> List[str]:
+    """
+    生成libx264编码参数
+
+    所有需要以流复制方式拼接的片段都应使用同一组参数生成。
+
+    Args:
+        size: 帧尺寸 (width, height)
+        preset: x264预设
+        crf: 恒定质量参数，指定bitrate时忽略
+        bitrate: 目标码率（如 '2500k'）
+        pix_fmt: 输出像素格式
+        threads: 编码线程数
+
+    Returns:
+        ffmpeg输出参数列表
+    """
+    args = ['-vcodec', 'libx264', '-preset', preset]
+    if bitrate:
+        args += ['-b:v', bitrate]
+    elif crf is not None:
+        args += ['-crf', str(crf)]
+    if threads:
+        args += ['-threads', str(threads)]
+    # yuv420p 要求宽高都是偶数
+    if pix_fmt and not (pix_fmt == 'yuv420p' and (size[0] % 2 or size[1] % 2)):
+        args += ['-pix_fmt', pix_fmt]
+    return args
+
+
+class FFmpegPipeWriter:
+    """
+    通过管道把原始RGB帧持续写入一个ffmpeg进程
+
+    帧先复制到预分配的环形缓冲区，再由独立的写入线程送入管道，
+    调用方渲染下一帧的同时，上一帧正在被写入和编码。
+    """
+
+    # Linux 下设置管道缓冲区大小的 fcntl 命令（F_SETPIPE_SZ）
+    F_SETPIPE_SZ = 1031
+
+    def __init__(self, output_path: str, size: Tuple[int, int], fps: float,
+                 preset: str = 'medium', crf: Optional[int] = 23, bitrate: Optional[str] = None,
+                 pix_fmt: str = 'yuv420p', threads: Optional[int] = None,
+                 pipe_buffer_size: int = 16 * 1024 * 1024, queue_size: int = 8,
+                 ffmpeg_params: Optional[List[str]] = None):
+        """
+        启动ffmpeg编码进程
+
+        Args:
+            output_path: 输出视频路径
+            size: 帧尺寸 (width, height)
+            fps: 帧率
+            preset: x264预设
+            crf: 恒定质量参数，指定bitrate时忽略
+            bitrate: 目标码率（如 '2500k'）
+            pix_fmt: 输出像素格式
+            threads: 编码线程数
+            pipe_buffer_size: 管道缓冲区大小（字节）
+            queue_size: 待写入帧的队列长度
+            ffmpeg_params: 额外的ffmpeg输出参数
+        """
+        self.output_path = str(output_path)
+        self.size = (int(size[0]), int(size[1]))
+        self.frame_shape = (self.size[1], self.size[0], 3)
+
+        cmd = [
+            FFmpegUtils.get_ffmpeg_binary(), '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-vcodec', 'rawvideo',
+            '-s', f"{self.size[0]}x{self.size[1]}", '-pix_fmt', 'rgb24',
+            '-r', f"{fps:.02f}", '-an', '-i', '-'
+        ]
+        if ffmpeg_params:
+            cmd += list(ffmpeg_params)
+        cmd += build_x264_args(self.size, preset, crf, bitrate, pix_fmt, threads)
+        cmd += [self.output_path]
+
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                     stderr=subprocess.PIPE, bufsize=0)
+        self._set_pipe_buffer_size(pipe_buffer_size)
+
+        # 预分配的环形缓冲区：空闲槽位 -> 待写入槽位 -> 写入完成后归还
+        self._buffers = [np.empty(self.frame_shape, dtype=np.uint8) for _ in range(queue_size)]
+        self._free_slots = queue.Queue()
+        for i in range(queue_size):
+            self._free_slots.put(i)
+        self._pending = queue.Queue()
+        self._error = None
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _set_pipe_buffer_size(self, size: int) -> None:
+        """尽量增大管道缓冲区，减少渲染线程等待编码器的次数"""
+        try:
+            import fcntl
+            fcntl.fcntl(self.proc.stdin.fileno(), self.F_SETPIPE_SZ, size)
+        except (ImportError, OSError, ValueError):
+            # 非Linux平台或超过系统上限时使用默认大小
+            pass
+
+    def _write_loop(self) -> None:
+        """写入线程：把待写入槽位中的帧送入ffmpeg管道"""
+        while True:
+            slot = self._pending.get()
+            if slot is None:
+                break
+            try:
+                if self._error is None:
+                    self.proc.stdin.write(memoryview(self._buffers[slot]).cast('B'))
+            except (BrokenPipeError, OSError) as e:
+                self._error = e
+            finally:
+                self._free_slots.put(slot)
+
+    def write_frame(self, frame: np.ndarray) -> None:
+        """
+        写入一帧
+
+        Args:
+            frame: HxWx3 的 RGB 帧
+        """
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg编码进程已退出: {self._read_stderr() or self._error}")
+        slot = self._free_slots.get()
+        if frame.dtype != np.uint8:
+            frame = frame.astype(np.uint8)
+        np.copyto(self._buffers[slot], frame[:, :, :3])
+        self._pending.put(slot)
+
+    def _read_stderr(self) -> str:
+        try:
+            return self.proc.stderr.read().decode('utf-8', errors='ignore').strip()
+        except Exception:
+            return ''
+
+    def close(self) -> None:
+        """等待所有帧写入完成并结束编码进程"""
+        self._pending.put(None)
+        self._writer.join()
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        error = self._read_stderr()
+        returncode = self.proc.wait()
+        if returncode != 0 or self._error is not None:
+            raise RuntimeError(f"ffmpeg编码失败: {error or self._error}")
+
+
+class MoviepyProgressLogger(TqdmProgressBarLogger):
+    """在moviepy的进度条之外，把已写入的帧数同步到渲染进度"""
+
+    def __init__(self, progress):
+        super().__init__()
+        self.progress = progress
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        super().bars_callback(bar, attr, value, old_value)
+        # 视频帧进度条名为 t，index 为正在写入的帧序号
+        if bar == 't' and attr == 'index':
+            self.progress.set_frames(value)
+
+
+class MoviepyEncoder:
+    """使用moviepy的 write_videofile 写出视频（默认后端），preset、crf、pix_fmt、threads 参数同样作用于最终输出"""
+
+    name = 'moviepy'
+    # 可接受的参数（preset、crf、pix_fmt 同时决定中间片段的编码参数）
+    option_names = ('preset', 'crf', 'pix_fmt', 'threads')
+
+    def __init__(self, **options):
+        self.options = options
+
+    def write(self, clip, output_path: str, fps: float, bitrate: Optional[str] = None,
+              threads: Optional[int] = None, preset: str = 'medium',
+              ffmpeg_params: Optional[List[str]] = None, progress=None) -> str:
+        # 后端参数优先于调用方的默认值；crf 只在未指定码率时生效
+        params = list(ffmpeg_params or [])
+        crf = self.options.get('crf')
+        if bitrate is None and crf is not None:
+            params += ['-crf', str(crf)]
+        pix_fmt = self.options.get('pix_fmt')
+        width, height = clip.size
+        if pix_fmt and not (pix_fmt == 'yuv420p' and (width % 2 or height % 2)):
+            params += ['-pix_fmt', pix_fmt]
+        clip.write_videofile(
+            str(output_path),
+            codec='libx264',
+            audio_codec='aac' if clip.audio is not None else None,
+            bitrate=bitrate,
+            fps=fps,
+            threads=self.options.get('threads') or threads,
+            preset=self.options.get('preset') or preset,
+            ffmpeg_params=params or None,
+            logger=MoviepyProgressLogger(progress) if progress is not None else 'bar'
+        )
+        return str(output_path)
+
+
+class FFmpegPipeEncoder:
+    """
+    直接向ffmpeg进程写入原始帧的编码后端
+
+    视频帧通过大缓冲管道持续送入同一个ffmpeg进程，渲染与编码在不同核心上并行；
+    音频作为第二阶段单独编码，最后以流复制的方式与视频合并。
+    """
+
+    name = 'ffmpeg_pipe'
+    # 可接受的参数，与构造函数的参数一致
+    option_names = ('preset', 'crf', 'pix_fmt', 'threads', 'pipe_buffer_size', 'queue_size')
+
+    def __init__(self, preset: Optional[str] = None, crf: Optional[int] = 23,
+                 pix_fmt: str = 'yuv420p', threads: Optional[int] = None,
+                 pipe_buffer_size: int = 16 * 1024 * 1024, queue_size: int = 8):
+        """
+        Args:
+            preset: x264预设，None时使用 write() 传入的预设
+            crf: 恒定质量参数，未指定码率时使用
+            pix_fmt: 输出像素格式
+            threads: 编码线程数，None时使用 write() 传入的线程数
+            pipe_buffer_size: 管道缓冲区大小（字节）
+            queue_size: 渲染与编码之间的帧队列长度
+        """
+        self.preset = preset
+        self.crf = crf
+        self.pix_fmt = pix_fmt
+        self.threads = threads
+        self.pipe_buffer_size = pipe_buffer_size
+        self.queue_size = queue_size
+        self.path_utils = PathUtils()
+
+    def open_writer(self, output_path: str, size: Tuple[int, int], fps: float,
+                    bitrate: Optional[str] = None, threads: Optional[int] = None,
+                    preset: str = 'medium', ffmpeg_params: Optional[List[str]] = None) -> FFmpegPipeWriter:
+        """按本后端的编码参数创建一个帧写入器"""
+        return FFmpegPipeWriter(
+            output_path, size, fps,
+            preset=self.preset or preset,
+            crf=self.crf,
+            bitrate=bitrate,
+            pix_fmt=self.pix_fmt,
+            threads=self.threads or threads,
+            pipe_buffer_size=self.pipe_buffer_size,
+            queue_size=self.queue_size,
+            ffmpeg_params=ffmpeg_params
+        )
+
+    def write(self, clip, output_path: str, fps: float, bitrate: Optional[str] = None,
+              threads: Optional[int] = None, preset: str = 'medium',
+              ffmpeg_params: Optional[List[str]] = None, progress=None) -> str:
+        has_audio = clip.audio is not None
+        work_dir = self.path_utils.get_temp_dir() / f"encode_{uuid.uuid4().hex[:8]}"
+        os.makedirs(work_dir, exist_ok=True)
+        video_path = work_dir / "video.mp4" if has_audio else Path(output_path)
+
+        try:
+            # 第一阶段：渲染视频帧并送入编码进程
+            writer = self.open_writer(str(video_path), clip.size, fps, bitrate, threads, preset, ffmpeg_params)
+            try:
+                for frame in clip.iter_frames(fps=fps, dtype='uint8'):
+                    writer.write_frame(frame)
+                    if progress is not None:
+                        progress.advance()
+            finally:
+                writer.close()
+
+            # 第二阶段：单独编码音频，再以流复制方式合并
+            if has_audio:
+                audio_path = work_dir / "audio.m4a"
+                clip.audio.write_audiofile(str(audio_path), fps=44100, codec='aac', logger=None)
+                mux_audio(str(video_path), str(audio_path), str(output_path))
+
+            return str(output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def concat_segments(segment_paths: List[str], output_path: str) -> str:
+    """
+    使用concat分离器按顺序拼接编码参数相同的片段（流复制，不重新编码）
+
+    Args:
+        segment_paths: 片段文件路径列表
+        output_path: 输出文件路径
+
+    Returns:
+        输出文件路径
+    """
+    list_path = Path(output_path).with_suffix('.txt')
+    FFmpegUtils.write_concat_list(list_path, segment_paths)
+    try:
+        FFmpegUtils.run(['-f', 'concat', '-safe', '0', '-i', list_path, '-c', 'copy', output_path])
+    finally:
+        if list_path.exists():
+            os.remove(list_path)
+    return str(output_path)
+
+
+def mux_audio(video_path: str, audio_path: str, output_path: str, audio_codec: str = 'copy') -> str:
+    """
+    将视频流和音频流合并为一个文件，视频流不重新编码
+
+    Args:
+        video_path: 视频文件路径
+        audio_path: 音频文件路径
+        output_path: 输出文件路径
+        audio_codec: 音频编码器，默认直接复制
+
+    Returns:
+        输出文件路径
+    """
+    FFmpegUtils.run([
+        '-i', video_path, '-i', audio_path,
+        '-map', '0:v', '-map', '1:a',
+        '-c:v', 'copy', '-c:a', audio_codec,
+        '-movflags', '+faststart',
+        output_path
+    ])
+    return str(output_path)
+
+
+# 可用的编码后端
+ENCODERS = {
+    MoviepyEncoder.name: MoviepyEncoder,
+    FFmpegPipeEncoder.name: FFmpegPipeEncoder,
+}
+
+
+def validate_encoder_options(name: Optional[str] = None, options: Optional[Dict] = None):
+    """
+    检查编码后端名称和参数，在开始渲染之前发现配置或请求中的错误
+
+    Args:
+        name: 后端名称（'moviepy' 或 'ffmpeg_pipe'），None时使用moviepy
+        options: 传给后端构造函数的参数
+
+    Returns:
+        编码后端类
+
+    Raises:
+        ValueError: 后端不存在，或参数中有该后端不支持的键
+    """
+    encoder_class = ENCODERS.get(name or MoviepyEncoder.name)
+    if encoder_class is None:
+        raise ValueError(f"未知的编码后端: {name}，可选: {', '.join(ENCODERS)}")
+    unknown = sorted(set(options or {}) - set(encoder_class.option_names))
+    if unknown:
+        raise ValueError(f"编码后端 {encoder_class.name} 不支持的参数: {', '.join(map(str, unknown))}，"
+                         f"可选: {', '.join(encoder_class.option_names)}")
+    return encoder_class
+
+
+def get_encoder(name: Optional[str] = None, options: Optional[Dict] = None):
+    """
+    获取编码后端实例
+
+    Args:
+        name: 后端名称（'moviepy' 或 'ffmpeg_pipe'），None时使用moviepy
+        options: 传给后端构造函数的参数，见各后端的 option_names
+
+    Returns:
+        编码后端实例
+
+    Raises:
+        ValueError: 后端不存在，或参数中有该后端不支持的键
+    """
+    encoder_class = validate_encoder_options(name, options)
+    return encoder_class(**(options or {}))
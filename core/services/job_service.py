@@ -0,0 +1,314 @@
+import math
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class Job:
+    """后台渲染任务"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    id: str
+    kind: str
+    state: str = QUEUED
+    progress: float = 0.0
+    # 渲染进度：阶段、已渲染帧数、总帧数、编码速度（帧/秒）和预计剩余时间（秒），见 RenderProgress
+    stage: Optional[str] = None
+    frames_done: int = 0
+    frames_total: Optional[int] = None
+    fps: Optional[float] = None
+    eta: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    updated_at: float = field(default_factory=time.time)
+    # 每次状态或进度变化时递增，用于等待更新
+    version: int = 0
+    # 规范化请求的指纹，以及合并到该任务的请求数（重复提交时不再重新渲染）
+    fingerprint: Optional[str] = None
+    requests: int = 1
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (self.SUCCEEDED, self.FAILED)
+
+    def to_dict(self) -> dict:
+        """转换为字典格式"""
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'progress': round(self.progress, 4),
+            'stage': self.stage,
+            'frames_done': self.frames_done,
+            'frames_total': self.frames_total,
+            'fps': self.fps,
+            'eta': self.eta,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'updated_at': self.updated_at,
+            'requests': self.requests
+        }
+
+
+class QueueFullError(RuntimeError):
+    """渲染任务队列已满"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        # 建议客户端重试前等待的秒数
+        self.retry_after = retry_after
+
+
+class JobService:
+    """
+    渲染任务服务：提交后立即返回任务ID，任务在有界的后台线程池中依次执行
+
+    任务状态保存在内存中，只保留最近 max_jobs 个已结束的任务。
+    执行任务的函数通过 progress_callback 参数报告渲染进度，wait_for_update() 可以等待任务的下一次变化。
+    find_or_submit() 按去重键合并重复提交：相同的请求附加到正在执行的任务，或直接复用刚完成的结果。
+    排队的任务数达到 max_queue 时拒绝新任务（QueueFullError），capacity() 返回当前的占用情况。
+    """
+
+    # 任务平均耗时的指数平滑系数
+    DURATION_SMOOTHING = 0.3
+
+    def __init__(self, max_workers: int = 1, max_jobs: int = 1000,
+                 result_validator: Optional[Callable[[Dict[str, Any]], bool]] = None,
+                 max_queue: Optional[int] = None):
+        """
+        Args:
+            max_workers: 同时执行的任务数，即渲染槽位数（每个渲染任务内部已经使用多进程并行）
+            max_jobs: 最多保留的已结束任务数
+            result_validator: 检查已完成任务的结果是否仍然可用（如输出文件仍然存在），不可用时重新执行
+            max_queue: 最多排队等待的任务数，None表示不限制
+        """
+        self.max_workers = max(1, max_workers)
+        self.max_jobs = max_jobs
+        self.result_validator = result_validator
+        self.max_queue = max_queue
+        self.rejected = 0
+        # 最近任务的平均耗时（秒），用于估算重试等待时间
+        self.avg_duration: Optional[float] = None
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='render-job')
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        # 去重键 -> 任务ID
+        self._keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def submit(self, kind: str, func: Callable[..., Dict[str, Any]], *args, **kwargs) -> Job:
+        """
+        提交任务
+
+        Args:
+            kind: 任务类型（如 'create'、'image2video'）
+            func: 执行任务的函数，返回值作为任务结果；
+                调用时传入 progress_callback 关键字参数，用于报告渲染进度
+            *args, **kwargs: 传给 func 的参数
+
+        Returns:
+            新建的任务
+
+        Raises:
+            QueueFullError: 排队的任务数已达上限
+        """
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        with self._lock:
+            self._admit()
+            self._jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def find_or_submit(self, dedup_key: str, fingerprint: str, kind: str, func: Callable[..., Dict[str, Any]],
+                       *args, reuse_ttl: Optional[float] = None, **kwargs) -> Tuple[Job, bool]:
+        """
+        按去重键查找可复用的任务，没有时提交新任务
+
+        排队中或执行中的任务总是复用；成功的任务在 reuse_ttl 秒内且结果仍然可用时复用；
+        失败的任务不复用，重新提交。
+
+        Args:
+            dedup_key: 去重键（请求指纹或客户端提供的幂等键）
+            fingerprint: 规范化请求的指纹
+            kind: 任务类型
+            func: 执行任务的函数，见 submit
+            *args, **kwargs: 传给 func 的参数
+            reuse_ttl: 成功任务的结果可复用的时长（秒），None表示一直可复用
+
+        Returns:
+            (任务, 是否为新提交的任务)
+
+        Raises:
+            ValueError: 同一个去重键已用于指纹不同的请求
+            QueueFullError: 需要提交新任务但排队的任务数已达上限
+        """
+        with self._lock:
+            job = self._jobs.get(self._keys.get(dedup_key, ''))
+            if job is not None and job.fingerprint != fingerprint:
+                raise ValueError("幂等键已用于内容不同的请求")
+            if job is not None and self._reusable(job, reuse_ttl):
+                job.requests += 1
+                return job, False
+            self._admit()
+            job = Job(id=uuid.uuid4().hex, kind=kind, fingerprint=fingerprint)
+            self._jobs[job.id] = job
+            self._keys[dedup_key] = job.id
+            self._prune()
+        self.executor.submit(self._run, job, func, args, kwargs)
+        return job, True
+
+    def _admit(self) -> None:
+        """检查是否还能接受新任务（调用方持有锁）"""
+        if self.max_queue is None:
+            return
+        queued = sum(1 for job in self._jobs.values() if job.state == Job.QUEUED)
+        if queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"渲染任务队列已满（{queued}个任务排队中），请稍后重试",
+                                 self._estimate_wait(queued))
+
+    def _estimate_wait(self, queued: int) -> int:
+        """估算排在 queued 个任务之后的新任务开始执行前的等待时间（秒，调用方持有锁）"""
+        duration = self.avg_duration or 30.0
+        return max(1, int(math.ceil(duration * (queued + 1) / self.max_workers)))
+
+    def capacity(self) -> Dict[str, Any]:
+        """
+        当前的渲染槽位和队列占用情况
+
+        Returns:
+            {slots, running, available_slots, queued, max_queue, queue_available, rejected, avg_duration, retry_after}，
+            retry_after 为新任务预计的等待时间（秒），有空闲槽位时为0
+        """
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.state == Job.RUNNING)
+            queued = sum(1 for job in self._jobs.values() if job.state == Job.QUEUED)
+            return {
+                'slots': self.max_workers,
+                'running': running,
+                'available_slots': max(0, self.max_workers - running),
+                'queued': queued,
+                'max_queue': self.max_queue,
+                'queue_available': None if self.max_queue is None else max(0, self.max_queue - queued),
+                'rejected': self.rejected,
+                'avg_duration': round(self.avg_duration, 2) if self.avg_duration is not None else None,
+                'retry_after': 0 if running + queued < self.max_workers else self._estimate_wait(queued)
+            }
+
+    def _reusable(self, job: Job, reuse_ttl: Optional[float]) -> bool:
+        """任务能否被重复的请求复用（调用方持有锁）"""
+        if job.state == Job.FAILED:
+            return False
+        if job.state != Job.SUCCEEDED:
+            return True
+        if reuse_ttl is not None and time.time() - job.finished_at > reuse_ttl:
+            return False
+        return self.result_validator is None or self.result_validator(job.result)
+
+    def wait(self, job: Job, timeout: Optional[float] = None) -> bool:
+        """
+        等待任务结束
+
+        Returns:
+            任务是否已结束（False表示等待超时）
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: job.finished, timeout)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """按任务ID查找任务，不存在时返回None"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, state: Optional[str] = None) -> List[Job]:
+        """列出任务（按提交时间排序），可按状态筛选"""
+        with self._lock:
+            return [job for job in self._jobs.values() if state is None or job.state == state]
+
+    def wait_for_update(self, job: Job, version: int, timeout: Optional[float] = None) -> int:
+        """
+        等待任务发生变化
+
+        Args:
+            job: 任务
+            version: 调用方已知的任务版本
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            任务的当前版本，与 version 相同表示等待超时
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != version, timeout)
+            return job.version
+
+    def update(self, job: Job, **fields) -> None:
+        """更新任务字段并通知等待者"""
+        with self._changed:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = time.time()
+            job.version += 1
+            self._changed.notify_all()
+
+    def report_progress(self, job: Job, info: Dict[str, Any]) -> None:
+        """
+        记录渲染进度
+
+        Args:
+            job: 任务
+            info: RenderProgress 的进度快照
+        """
+        fields = {name: info.get(name) for name in ('stage', 'frames_done', 'frames_total', 'fps', 'eta')}
+        # 帧渲染完成后还有音频合成和合并，任务成功之前进度不到100%
+        if info.get('frames_total'):
+            fields['progress'] = max(job.progress, 0.99 * info.get('frames_done', 0) / info['frames_total'])
+        self.update(job, **fields)
+
+    def _run(self, job: Job, func: Callable, args: tuple, kwargs: dict) -> None:
+        """在后台线程中执行任务并记录结果"""
+        started_at = time.time()
+        self.update(job, state=Job.RUNNING, started_at=started_at)
+        print(f"开始执行任务 {job.id} ({job.kind})")
+        try:
+            result = func(*args, progress_callback=lambda info: self.report_progress(job, info), **kwargs)
+            finished_at = time.time()
+            with self._lock:
+                duration = finished_at - started_at
+                self.avg_duration = duration if self.avg_duration is None else \
+                    self.DURATION_SMOOTHING * duration + (1 - self.DURATION_SMOOTHING) * self.avg_duration
+            self.update(job, result=result, progress=1.0, eta=0.0, state=Job.SUCCEEDED, finished_at=finished_at)
+            print(f"任务 {job.id} 完成，耗时 {time.time() - started_at:.1f}秒")
+        except Exception as e:
+            traceback.print_exc()
+            self.update(job, error=str(e), state=Job.FAILED, finished_at=time.time())
+            print(f"任务 {job.id} 失败: {str(e)}")
+
+    def _prune(self) -> None:
+        """已结束的任务超过 max_jobs 时删除最早的（调用方持有锁）"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        removed = set(finished[:max(0, len(finished) - self.max_jobs)])
+        for job_id in removed:
+            del self._jobs[job_id]
+        if removed:
+            self._keys = {key: job_id for key, job_id in self._keys.items() if job_id not in removed}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """停止接受新任务，wait为True时等待正在执行的任务完成"""
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,173 @@
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils.ffmpeg_utils import FFmpegUtils
+
+
+class NarrationTrack:
+    """
+    旁白音轨：把各片段的音频按时间轴偏移合成为一条音轨，只编码一次
+
+    每个音频文件由ffmpeg直接解码为16位PCM（多个文件并发解码），
+    按块在NumPy中混合后通过管道送入同一个ffmpeg进程编码为AAC，
+    整条时间轴不会一次性展开在内存中，也不再经过moviepy逐块读取和混合音频。
+    """
+
+    def __init__(self, sample_rate: int = 44100, channels: int = 2, codec: str = 'aac',
+                 bitrate: Optional[str] = None, block_seconds: float = 10.0,
+                 decode_workers: int = 4):
+        """
+        Args:
+            sample_rate: 采样率
+            channels: 声道数
+            codec: 音频编码器
+            bitrate: 音频码率（如 '192k'），None时使用编码器默认值
+            block_seconds: 每次混合并送入编码器的时长（秒）
+            decode_workers: 并发解码的音频文件数
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.codec = codec
+        self.bitrate = bitrate
+        self.block_seconds = block_seconds
+        self.decode_workers = decode_workers
+
+    def decode(self, audio_path: str) -> np.ndarray:
+        """
+        将音频文件解码为PCM采样
+
+        Args:
+            audio_path: 音频文件路径
+
+        Returns:
+            形状为 (采样数, 声道数) 的 int16 数组
+
+        Raises:
+            RuntimeError: ffmpeg解码失败时抛出
+        """
+        cmd = [
+            FFmpegUtils.get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error',
+            '-i', str(audio_path), '-vn',
+            '-f', 's16le', '-acodec', 'pcm_s16le',
+            '-ar', str(self.sample_rate), '-ac', str(self.channels), '-'
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            error = result.stderr.decode('utf-8', errors='ignore').strip()
+            raise RuntimeError(f"音频解码失败: {audio_path}: {error}")
+        return np.frombuffer(result.stdout, dtype=np.int16).reshape(-1, self.channels)
+
+    def decode_all(self, audio_paths: List[str]) -> Dict[str, np.ndarray]:
+        """并发解码多个音频文件，同一文件只解码一次"""
+        unique_paths = list(dict.fromkeys(str(path) for path in audio_paths))
+        workers = max(1, min(self.decode_workers, len(unique_paths)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(unique_paths, executor.map(self.decode, unique_paths)))
+
+    def place(self, entries: List[Tuple[str, float]]) -> List[Tuple[int, np.ndarray]]:
+        """
+        解码所有音频并换算为时间轴上的起始采样位置
+
+        Args:
+            entries: (音频路径, 起始时间秒) 列表
+
+        Returns:
+            (起始采样, 采样数组) 列表，按起始位置排序
+        """
+        decoded = self.decode_all([path for path, _ in entries])
+        placed = [(int(round(offset * self.sample_rate)), decoded[str(path)]) for path, offset in entries]
+        return sorted(placed, key=lambda placement: placement[0])
+
+    def mix_blocks(self, placed: List[Tuple[int, np.ndarray]], total_samples: int):
+        """
+        按块混合时间轴上的所有音频，重叠部分相加后截断到16位范围
+
+        Args:
+            placed: (起始采样, 采样数组) 列表
+            total_samples: 音轨总采样数
+
+        Yields:
+            每块混合后的 int16 采样数组
+        """
+        block_size = max(1, int(self.block_seconds * self.sample_rate))
+        for block_start in range(0, total_samples, block_size):
+            block_end = min(block_start + block_size, total_samples)
+            block = np.zeros((block_end - block_start, self.channels), dtype=np.int32)
+            for start, samples in placed:
+                if start >= block_end:
+                    break
+                lo = max(block_start, start)
+                hi = min(block_end, start + len(samples))
+                if hi > lo:
+                    block[lo - block_start:hi - block_start] += samples[lo - start:hi - start]
+            yield np.clip(block, -32768, 32767).astype(np.int16)
+
+    def encode(self, blocks, output_path: str) -> str:
+        """
+        把PCM采样块通过管道送入ffmpeg，编码为一个音频文件
+
+        Args:
+            blocks: int16 采样块的可迭代对象
+            output_path: 输出音频路径
+
+        Returns:
+            输出音频路径
+
+        Raises:
+            RuntimeError: ffmpeg编码失败时抛出
+        """
+        cmd = [
+            FFmpegUtils.get_ffmpeg_binary(), '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 's16le', '-ar', str(self.sample_rate), '-ac', str(self.channels), '-i', '-',
+            '-c:a', self.codec
+        ]
+        if self.bitrate:
+            cmd += ['-b:a', self.bitrate]
+        cmd += [str(output_path)]
+
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        write_error = None
+        try:
+            for block in blocks:
+                proc.stdin.write(block.tobytes())
+        except (BrokenPipeError, OSError) as e:
+            write_error = e
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+        error = proc.stderr.read().decode('utf-8', errors='ignore').strip()
+        if proc.wait() != 0 or write_error is not None:
+            raise RuntimeError(f"音频编码失败: {error or write_error}")
+        return str(output_path)
+
+    def build(self, entries: List[Tuple[str, float]], output_path: str,
+              duration: Optional[float] = None) -> Optional[str]:
+        """
+        构建整条旁白音轨
+
+        Args:
+            entries: (音频路径, 起始时间秒) 列表
+            output_path: 输出音频路径（如 m4a）
+            duration: 音轨时长（秒），不足时在末尾补静音、超出时截断；
+                None时到最后一段音频结束为止
+
+        Returns:
+            输出音频路径；没有任何音频时返回None
+        """
+        if not entries:
+            return None
+        placed = self.place(entries)
+        if duration is not None:
+            total_samples = int(round(duration * self.sample_rate))
+        else:
+            total_samples = max(start + len(samples) for start, samples in placed)
+        if total_samples <= 0:
+            return None
+
+        print(f"合成旁白音轨: {len(entries)}段音频, 时长 {total_samples / self.sample_rate:.2f}秒")
+        return self.encode(self.mix_blocks(placed, total_samples), output_path)
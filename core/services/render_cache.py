@@ -0,0 +1,342 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Union
+
+from ..utils.path_utils import PathUtils
+
+
+class RenderCache:
+    """
+    按内容寻址的渲染结果缓存
+
+    缓存键是图片字节、音频字节、确定后的动画设置、帧率、分辨率和编码参数等内容的哈希，
+    同样的输入无论来自预览、重试还是重复提交，都直接复用已编码的片段。
+    缓存文件的修改时间作为最近访问时间，总大小超过预算时按最久未使用的顺序淘汰。
+    多个进程可以共享同一个缓存目录。
+
+    缓存文件随时可能被淘汰（包括共享目录的其他进程），需要在之后继续使用的文件
+    应通过 get(dest=...) 或 checkout 链接到调用方自己的路径，淘汰不会影响已取出的文件。
+    """
+
+    # 默认磁盘预算（字节）
+    DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+    # 重新扫描缓存目录的间隔（秒），用于发现共享目录的其他进程写入或删除的文件
+    RESCAN_INTERVAL = 60.0
+
+    # 文件摘要缓存（所有实例共享）：(路径, 大小, 修改时间) -> sha256，避免重复读取大文件
+    MAX_DIGESTS = 4096
+    _digests: 'OrderedDict[tuple, str]' = OrderedDict()
+    _digests_lock = threading.Lock()
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            cache_dir: 缓存目录，默认为 data/render_cache
+            max_bytes: 磁盘预算（字节），默认2GB
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else PathUtils.get_data_dir() / 'render_cache'
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else self.DEFAULT_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # 缓存文件索引：路径 -> [最近访问时间, 大小]，以及总大小；定期重新扫描目录校正
+        self._index: Dict[Path, List] = {}
+        self._total_bytes = 0
+        self._scanned_at: Optional[float] = None
+
+    @classmethod
+    def file_digest(cls, file_path: Optional[Union[str, Path]]) -> Optional[str]:
+        """
+        计算文件内容的sha256摘要
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            十六进制摘要；路径为空或文件不存在时返回None
+        """
+        if not file_path or not os.path.exists(str(file_path)):
+            return None
+        stat = os.stat(str(file_path))
+        digest_key = (os.path.abspath(str(file_path)), stat.st_size, stat.st_mtime_ns)
+        with cls._digests_lock:
+            digest = cls._digests.get(digest_key)
+            if digest is not None:
+                cls._digests.move_to_end(digest_key)
+                return digest
+        sha = hashlib.sha256()
+        with open(str(file_path), 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        with cls._digests_lock:
+            cls._digests[digest_key] = digest
+            while len(cls._digests) > cls.MAX_DIGESTS:
+                cls._digests.popitem(last=False)
+        return digest
+
+    @staticmethod
+    def make_key(parts: Dict[str, Any]) -> str:
+        """
+        根据缓存键的各组成部分生成缓存键
+
+        Args:
+            parts: 可JSON序列化的键内容（文件应先转换为 file_digest）
+
+        Returns:
+            缓存键（sha256十六进制）
+        """
+        canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get_path(self, key: str, suffix: str = '.mp4') -> Path:
+        """缓存键对应的缓存文件路径（前两位作为子目录）"""
+        return self.cache_dir / key[:2] / f"{key}{suffix}"
+
+    def get(self, key: str, suffix: str = '.mp4', dest: Optional[Union[str, Path]] = None,
+            link: bool = True) -> Optional[str]:
+        """
+        查找缓存
+
+        Args:
+            key: 缓存键
+            suffix: 文件扩展名
+            dest: 命中时把缓存文件取出到该路径（见 checkout），返回的文件不会被淘汰；
+                为None时直接返回缓存文件路径，该文件随时可能被淘汰
+            link: 取出时是否使用硬链接（否则复制），见 checkout
+
+        Returns:
+            命中时返回文件路径（指定 dest 时为 dest），否则返回None
+        """
+        if dest is not None:
+            result = self.checkout(key, dest, suffix, link)
+            with self._lock:
+                if result:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            return result
+
+        path = self.get_path(key, suffix)
+        with self._lock:
+            if self._touch(path):
+                self.hits += 1
+                return str(path)
+            self._forget(path)
+            self.misses += 1
+            return None
+
+    def checkout(self, key: str, dest: Union[str, Path], suffix: str = '.mp4', link: bool = True) -> Optional[str]:
+        """
+        把缓存文件取出到调用方的路径（不计入命中统计）
+
+        优先使用硬链接（不复制数据），跨文件系统时复制。取出的文件由调用方持有，
+        之后的淘汰只删除缓存目录中的链接。硬链接与缓存文件共享内容，
+        之后会被原地改写的文件（如用户可见的输出文件）应使用 link=False。
+
+        Args:
+            key: 缓存键
+            dest: 目标路径（已存在时原子替换）
+            suffix: 文件扩展名
+            link: 是否使用硬链接
+
+        Returns:
+            命中时返回 dest，否则返回None
+        """
+        path = self.get_path(key, suffix)
+        dest = Path(dest)
+        temp_path = dest.with_name(f".{dest.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            self._link_or_copy(path, temp_path, link)
+        except FileNotFoundError:
+            # 不存在或刚被淘汰
+            with self._lock:
+                self._forget(path)
+            return None
+        except OSError:
+            if temp_path.exists():
+                os.remove(temp_path)
+            raise
+        os.replace(temp_path, dest)
+        with self._lock:
+            self._touch(path)
+        return str(dest)
+
+    def put(self, key: str, source_path: Union[str, Path], suffix: str = '.mp4', move: bool = False,
+            link: bool = False) -> str:
+        """
+        将渲染结果存入缓存
+
+        Args:
+            key: 缓存键
+            source_path: 渲染结果文件
+            suffix: 文件扩展名
+            move: 是否移动源文件（否则复制）
+            link: 不移动时是否使用硬链接代替复制（源文件仍由调用方持有，且之后不会被原地改写）
+
+        Returns:
+            缓存文件路径（随时可能被淘汰，继续使用的应是源文件）
+        """
+        path = self.get_path(key, suffix)
+        os.makedirs(path.parent, exist_ok=True)
+        # 先写入临时文件再原子替换，其他进程不会读到不完整的文件
+        temp_path = path.parent / f".{key}_{uuid.uuid4().hex[:8]}.tmp"
+        if move:
+            shutil.move(str(source_path), str(temp_path))
+        else:
+            self._link_or_copy(Path(source_path), temp_path, link)
+        os.replace(temp_path, path)
+        with self._lock:
+            try:
+                size = path.stat().st_size
+            except OSError:
+                size = None
+            if size is not None:
+                self._forget(path)
+                self._index[path] = [time.time(), size]
+                self._total_bytes += size
+        self.evict(keep=path)
+        return str(path)
+
+    def entries(self) -> List[Tuple[float, int, Path]]:
+        """列出所有缓存文件，按最近访问时间从旧到新排序"""
+        with self._lock:
+            self._refresh_index()
+            return self._sorted_entries()
+
+    def evict(self, keep: Optional[Path] = None) -> int:
+        """
+        淘汰最久未使用的缓存，直到总大小不超过预算
+
+        Args:
+            keep: 不淘汰的文件（刚写入的结果）
+
+        Returns:
+            淘汰的文件数
+        """
+        with self._lock:
+            self._refresh_index()
+            if self._total_bytes <= self.max_bytes:
+                return 0
+            removed = 0
+            for _, _, path in self._sorted_entries():
+                if self._total_bytes <= self.max_bytes:
+                    break
+                if keep is not None and path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    # 已被共享目录的其他进程删除
+                    pass
+                except OSError:
+                    continue
+                self._forget(path)
+            self.evictions += removed
+            return removed
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._refresh_index(force=True)
+            for _, _, path in self._sorted_entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                self._forget(path)
+
+    def record(self, hits: int = 0, misses: int = 0, evictions: int = 0) -> None:
+        """累加在其他进程中（共享同一缓存目录）产生的命中统计"""
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            包含命中数、未命中数、命中率、淘汰数、条目数和占用空间的字典
+        """
+        with self._lock:
+            self._refresh_index()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._index),
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'cache_dir': str(self.cache_dir)
+            }
+
+    # === 内部方法（调用方持有 self._lock） ===
+
+    def _refresh_index(self, force: bool = False) -> None:
+        """索引过期时重新扫描缓存目录"""
+        now = time.monotonic()
+        if not force and self._scanned_at is not None and now - self._scanned_at < self.RESCAN_INTERVAL:
+            return
+        index = {}
+        total = 0
+        for path in self.cache_dir.glob('*/*'):
+            if path.name.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            index[path] = [stat.st_mtime, stat.st_size]
+            total += stat.st_size
+        self._index = index
+        self._total_bytes = total
+        self._scanned_at = now
+
+    def _sorted_entries(self) -> List[Tuple[float, int, Path]]:
+        entries = [(mtime, size, path) for path, (mtime, size) in self._index.items()]
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+
+    def _touch(self, path: Path) -> bool:
+        """更新缓存文件的访问时间（用于LRU淘汰），文件不存在时返回False"""
+        try:
+            os.utime(path, None)
+        except OSError:
+            return False
+        entry = self._index.get(path)
+        if entry is not None:
+            entry[0] = time.time()
+        return True
+
+    def _forget(self, path: Path) -> None:
+        entry = self._index.pop(path, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+    @staticmethod
+    def _link_or_copy(source: Path, target: Path, link: bool = True) -> None:
+        if link:
+            try:
+                os.link(source, target)
+                return
+            except FileNotFoundError:
+                raise
+            except OSError:
+                # 跨文件系统或不支持硬链接时复制
+                pass
+        shutil.copyfile(str(source), str(target))
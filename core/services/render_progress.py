@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class RenderProgress:
+    """
+    渲染进度：记录当前阶段、已渲染帧数、编码速度和预计剩余时间，并节流通知回调
+
+    阶段依次为 prepare（加载素材、规划时间轴）、render（渲染并编码视频帧）、
+    audio（合成旁白音轨）、mux（合并音视频）、cached（命中渲染缓存）。
+    advance() 和 set_frames() 可以在多个线程中调用。
+    """
+
+    # 编码速度的指数平滑系数
+    FPS_SMOOTHING = 0.3
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None, min_interval: float = 0.5):
+        """
+        Args:
+            callback: 进度回调，参数为 snapshot() 返回的字典
+            min_interval: 同一阶段内两次回调的最小间隔（秒），切换阶段时总是回调
+        """
+        self.callback = callback
+        self.min_interval = min_interval
+        self.stage: Optional[str] = None
+        self.frames_done = 0
+        self.frames_total: Optional[int] = None
+        self.fps: Optional[float] = None
+        self._stage_started = time.monotonic()
+        self._last_time = self._stage_started
+        self._last_frames = 0
+        self._lock = threading.Lock()
+
+    def set_stage(self, stage: str, frames_total: Optional[int] = None) -> None:
+        """
+        进入新阶段，重新开始计数
+
+        Args:
+            stage: 阶段名称
+            frames_total: 该阶段的总帧数（不按帧计数的阶段为None）
+        """
+        with self._lock:
+            self.stage = stage
+            self.frames_done = 0
+            self.frames_total = frames_total
+            self.fps = None
+            self._stage_started = self._last_time = time.monotonic()
+            self._last_frames = 0
+            snapshot = self._snapshot()
+        print(f"渲染阶段: {stage}" + (f"，共 {frames_total} 帧" if frames_total else ""))
+        self._notify(snapshot)
+
+    def advance(self, frames: int = 1) -> None:
+        """已完成 frames 帧"""
+        with self._lock:
+            self.frames_done += frames
+            snapshot = self._update()
+        self._notify(snapshot)
+
+    def set_frames(self, frames_done: int) -> None:
+        """设置当前阶段已完成的帧数（用于从外部计数器同步）"""
+        with self._lock:
+            self.frames_done = frames_done
+            snapshot = self._update()
+        self._notify(snapshot)
+
+    def snapshot(self) -> Dict:
+        """
+        当前进度
+
+        Returns:
+            {stage, frames_done, frames_total, fps, eta, elapsed}，
+            fps 为最近的编码速度（帧/秒），eta 为预计剩余秒数，无法估算时为None
+        """
+        with self._lock:
+            return self._snapshot()
+
+    def _update(self) -> Optional[Dict]:
+        """更新编码速度，到达回调间隔时返回进度快照（调用方持有锁）"""
+        now = time.monotonic()
+        interval = now - self._last_time
+        if interval < self.min_interval and self.frames_done != self.frames_total:
+            return None
+        if interval > 0:
+            current = (self.frames_done - self._last_frames) / interval
+            self.fps = current if self.fps is None else \
+                self.FPS_SMOOTHING * current + (1 - self.FPS_SMOOTHING) * self.fps
+        self._last_time = now
+        self._last_frames = self.frames_done
+        return self._snapshot()
+
+    def _snapshot(self) -> Dict:
+        eta = None
+        if self.frames_total and self.fps:
+            eta = max(0.0, (self.frames_total - self.frames_done) / self.fps)
+        return {
+            'stage': self.stage,
+            'frames_done': self.frames_done,
+            'frames_total': self.frames_total,
+            'fps': round(self.fps, 2) if self.fps is not None else None,
+            'eta': round(eta, 1) if eta is not None else None,
+            'elapsed': round(time.monotonic() - self._stage_started, 2)
+        }
+
+    def _notify(self, snapshot: Optional[Dict]) -> None:
+        if snapshot is None or self.callback is None:
+            return
+        try:
+            self.callback(snapshot)
+        except Exception as e:
+            # 进度通知失败不影响渲染
+            print(f"进度回调出错: {str(e)}")
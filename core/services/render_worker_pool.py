@@ -0,0 +1,321 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+from ..utils.system_resources import SystemResources
+
+
+class WorkerCrashedError(RuntimeError):
+    """渲染工作进程在执行任务时异常退出"""
+
+
+def build_video_service(options: Dict[str, Any]):
+    """
+    在工作进程中创建并配置视频服务
+
+    Args:
+        options: 视频服务属性（encoder、encoder_options、parallel_workers 等），
+            以及 render_cache_max_bytes（渲染缓存的磁盘预算，None表示禁用缓存）
+    """
+    from .render_cache import RenderCache
+    from .video_service import VideoService
+
+    service = VideoService()
+    options = dict(options)
+    max_bytes = options.pop('render_cache_max_bytes', None)
+    service.render_cache = RenderCache(max_bytes=max_bytes) if max_bytes else None
+    for name, value in options.items():
+        setattr(service, name, value)
+    return service
+
+
+def _worker_main(conn, options: Dict[str, Any]) -> None:
+    """工作进程入口：预先导入并初始化视频服务，然后依次执行主进程发来的任务"""
+    started = time.monotonic()
+    try:
+        service = build_video_service(options)
+        # 预热：加载OpenCV的延迟初始化部分，确定ffmpeg路径
+        import cv2
+        import numpy as np
+        from ..utils.ffmpeg_utils import FFmpegUtils
+        cv2.resize(np.zeros((16, 16, 3), dtype=np.uint8), (8, 8))
+        FFmpegUtils.get_ffmpeg_binary()
+    except Exception as e:
+        conn.send(('error', f"渲染进程初始化失败: {str(e)}", None))
+        return
+    conn.send(('ready', os.getpid(), time.monotonic() - started))
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        method, args, kwargs = task
+        cache = service.render_cache
+        counters = (cache.hits, cache.misses, cache.evictions) if cache else (0, 0, 0)
+        try:
+            result = getattr(service, method)(
+                *args, progress_callback=lambda info: send(('progress', info, None)), **kwargs)
+            message = ('done', result)
+        except Exception as e:
+            traceback.print_exc()
+            message = ('error', str(e))
+        info = {'rss': SystemResources.process_rss()}
+        if cache:
+            info['cache'] = {'hits': cache.hits - counters[0], 'misses': cache.misses - counters[1],
+                             'evictions': cache.evictions - counters[2]}
+        send(message + (info,))
+
+
+class RenderWorker:
+    """主进程中代表一个渲染工作进程"""
+
+    def __init__(self, context, options: Dict[str, Any], index: int):
+        self.index = index
+        self.conn, child_conn = context.Pipe()
+        # 工作进程内部还会创建分段渲染的进程池，因此不能是守护进程
+        self.process = context.Process(target=_worker_main, args=(child_conn, options),
+                                       name=f"render-worker-{index}", daemon=False)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.rss: Optional[int] = None
+        self.ready = False
+        self.warmup_seconds: Optional[float] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def receive(self, timeout: float = 1.0):
+        """接收工作进程的下一条消息，进程退出时抛出 WorkerCrashedError"""
+        while True:
+            try:
+                if self.conn.poll(timeout):
+                    return self.conn.recv()
+            except (EOFError, OSError):
+                pass
+            else:
+                if self.process.is_alive():
+                    continue
+            self.process.join(1)
+            raise WorkerCrashedError(f"渲染进程 {self.pid} 异常退出（退出码 {self.process.exitcode}）")
+
+    def wait_ready(self) -> None:
+        """等待工作进程完成初始化"""
+        if self.ready:
+            return
+        message = self.receive()
+        if message[0] != 'ready':
+            raise WorkerCrashedError(message[1])
+        self.ready = True
+        self.warmup_seconds = message[2]
+
+    def run(self, method: str, args: tuple, kwargs: dict,
+            progress_callback: Optional[Callable[[Dict], None]] = None):
+        """
+        在工作进程中执行视频服务的方法
+
+        Returns:
+            (返回值, 进程状态) 二元组，进程状态包含内存占用和渲染缓存计数
+
+        Raises:
+            WorkerCrashedError: 工作进程异常退出
+            RuntimeError: 方法执行出错
+        """
+        self.wait_ready()
+        try:
+            self.conn.send((method, args, kwargs))
+        except (BrokenPipeError, ConnectionResetError):
+            self.process.join(1)
+            raise WorkerCrashedError(f"渲染进程 {self.pid} 已退出（退出码 {self.process.exitcode}）")
+        while True:
+            kind, payload, info = self.receive()
+            if kind == 'progress':
+                if progress_callback:
+                    progress_callback(payload)
+                continue
+            self.jobs += 1
+            self.rss = info.get('rss')
+            if kind == 'error':
+                raise RuntimeError(payload)
+            return payload, info
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """通知工作进程退出，超时后强制结束"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class RenderWorkerPool:
+    """
+    预先启动的渲染工作进程池
+
+    工作进程启动时导入 moviepy、OpenCV 并初始化视频服务，之后常驻等待任务，任务开始时不再有导入和初始化开销。
+    每个工作进程执行 max_jobs_per_worker 个任务后，或内存占用超过 max_rss_mb 时退出并由新进程替换，
+    以回收 moviepy 读取器泄漏的内存和ffmpeg子进程；工作进程崩溃只会使它正在执行的任务失败。
+    """
+
+    def __init__(self, size: int, service_options: Optional[Dict[str, Any]] = None,
+                 max_jobs_per_worker: int = 50, max_rss_mb: Optional[float] = 2048,
+                 start_method: str = 'spawn', render_cache=None):
+        """
+        Args:
+            size: 工作进程数（应与同时执行的渲染任务数一致）
+            service_options: 视频服务配置，见 build_video_service
+            max_jobs_per_worker: 每个工作进程最多执行的任务数，0表示不限制
+            max_rss_mb: 工作进程内存占用上限（MB），超过后执行完当前任务即替换，None表示不限制
+            start_method: 多进程启动方式（spawn 启动干净的进程，不继承主进程的线程和锁）
+            render_cache: 主进程中的渲染缓存，用于汇总各工作进程的命中统计（可选）
+        """
+        self.size = max(1, size)
+        self.service_options = service_options or {}
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.max_rss_mb = max_rss_mb
+        self.context = multiprocessing.get_context(start_method)
+        self.render_cache = render_cache
+        self.recycled = 0
+        self.crashed = 0
+        self._idle: 'queue.Queue[RenderWorker]' = queue.Queue()
+        self._workers: Dict[int, RenderWorker] = {}
+        self._counter = 0
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """启动所有工作进程（在后台完成初始化，不等待）"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+        print(f"已启动 {self.size} 个渲染工作进程")
+
+    def _spawn(self) -> RenderWorker:
+        with self._lock:
+            self._counter += 1
+            worker = RenderWorker(self.context, self.service_options, self._counter)
+            self._workers[worker.index] = worker
+        return worker
+
+    def _retire(self, worker: RenderWorker, reason: str) -> None:
+        """停止工作进程并启动新进程替换它"""
+        print(f"替换渲染进程 {worker.pid}: {reason}")
+        with self._lock:
+            self._workers.pop(worker.index, None)
+        worker.stop()
+        self._idle.put(self._spawn())
+
+    def call(self, method: str, *args, progress_callback: Optional[Callable[[Dict], None]] = None, **kwargs):
+        """
+        取一个空闲的工作进程执行视频服务的方法，没有空闲进程时等待
+
+        Args:
+            method: VideoService 的方法名（如 'create_video'）
+            *args, **kwargs: 方法参数（需要可以pickle）
+            progress_callback: 进度回调，在调用线程中接收工作进程报告的渲染进度
+
+        Returns:
+            方法的返回值
+
+        Raises:
+            WorkerCrashedError: 工作进程在执行时异常退出
+            RuntimeError: 方法执行出错
+        """
+        self.start()
+        worker = self._acquire()
+        try:
+            result, info = worker.run(method, args, kwargs, progress_callback)
+        except WorkerCrashedError:
+            with self._lock:
+                self.crashed += 1
+            self._retire(worker, "进程异常退出")
+            raise
+        except Exception:
+            self._release(worker)
+            raise
+        if self.render_cache and info.get('cache'):
+            self.render_cache.record(**info['cache'])
+        self._release(worker)
+        return result
+
+    def _acquire(self) -> RenderWorker:
+        """取一个已完成初始化的空闲工作进程，空闲时已退出或初始化失败的进程直接替换，不影响任务"""
+        for _ in range(self.size + 1):
+            worker = self._idle.get()
+            try:
+                worker.wait_ready()
+                if worker.process.is_alive():
+                    return worker
+                reason = f"空闲时退出（退出码 {worker.process.exitcode}）"
+            except WorkerCrashedError as e:
+                reason = str(e)
+            with self._lock:
+                self.crashed += 1
+            self._retire(worker, reason)
+        raise WorkerCrashedError("渲染进程无法启动")
+
+    def _release(self, worker: RenderWorker) -> None:
+        """任务结束后归还工作进程，达到任务数或内存上限时替换"""
+        reason = None
+        if self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+            reason = f"已执行 {worker.jobs} 个任务"
+        elif self.max_rss_mb and worker.rss and worker.rss > self.max_rss_mb * 1024 * 1024:
+            reason = f"内存占用 {worker.rss / 1024 / 1024:.0f}MB 超过上限"
+        if reason:
+            with self._lock:
+                self.recycled += 1
+            self._retire(worker, reason)
+        else:
+            self._idle.put(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        工作进程状态
+
+        Returns:
+            {size, idle, recycled, crashed, workers}，workers 为各进程的PID、已执行任务数、内存占用和预热耗时
+        """
+        with self._lock:
+            workers = [{
+                'pid': worker.pid,
+                'jobs': worker.jobs,
+                'rss_mb': round(worker.rss / 1024 / 1024, 1) if worker.rss else None,
+                'ready': worker.ready,
+                'warmup_seconds': round(worker.warmup_seconds, 2) if worker.warmup_seconds is not None else None
+            } for worker in self._workers.values()]
+            return {
+                'size': self.size,
+                'idle': self._idle.qsize(),
+                'recycled': self.recycled,
+                'crashed': self.crashed,
+                'workers': workers
+            }
+
+    def shutdown(self) -> None:
+        """停止所有工作进程"""
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,214 @@
+import bisect
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from moviepy.editor import VideoClip, CompositeAudioClip
+
+from ..utils.frame_buffer_pool import FrameBufferPool
+
+
+class TimelineCompositor:
+    """
+    时间轴合成器：按预先计算好的时间表，把多个片段和它们之间的转场合成为一个片段
+
+    与"转场片段 + concatenate_videoclips(method="compose")"的结果一致：
+    片段依次排列，有转场的片段开头 transition_duration 秒与前一个片段的结尾混合。
+    不同的是，前一个片段结尾的帧在它自己的主体部分输出时就被记录下来，
+    转场窗口直接复用这些帧，每个源帧最多只计算一次；
+    每个输出帧最多读取两个源片段，也不再经过 CompositeVideoClip。
+    结尾帧按片段自身帧网格上的帧序号记录，转场时长不是整数帧时，
+    转场窗口使用最接近的已记录帧（相差不超过半帧）。
+    提供缓冲池时，画布和转场混合结果都写入复用的缓冲区；
+    记录的结尾帧总是复制到合成器自己持有的缓冲区中，输出对应的转场帧后立即回收复用。
+    """
+
+    def __init__(self, clips: List[VideoClip], transitions: List[Optional[Callable]],
+                 transition_duration: float, fps: Optional[float] = None,
+                 pool: Optional[FrameBufferPool] = None):
+        """
+        Args:
+            clips: 片段列表
+            transitions: 每个连接点的帧混合函数 blend(frame1, frame2, progress, pool=None)，
+                长度为片段数-1，None表示无转场
+            transition_duration: 转场时长（秒）
+            fps: 输出帧率，用于把片段内时间换算为帧序号
+            pool: 帧缓冲池，None时每帧新分配数组
+        """
+        if not clips:
+            raise ValueError("没有提供任何视频片段")
+
+        self.clips = clips
+        self.fps = fps
+        self.pool = pool
+        self.size = (max(clip.size[0] for clip in clips), max(clip.size[1] for clip in clips))
+
+        # 时间表：每个片段的起始时间、时长，以及进入该片段时的转场
+        self.durations = [clip.duration for clip in clips]
+        self.starts = list(np.concatenate([[0.0], np.cumsum(self.durations)[:-1]]))
+        self.duration = float(sum(self.durations))
+        self.blends = [None] + list(transitions or [])[:len(clips) - 1]
+        self.blends += [None] * (len(clips) - len(self.blends))
+        self.windows = [min(transition_duration, clip.duration) if blend else 0.0
+                        for clip, blend in zip(clips, self.blends)]
+        # 转场窗口对应的整数帧数：窗口内第k帧复用前一个片段在 shift 帧之前输出的结尾帧
+        self.shifts = [int(round(window * fps)) if fps else 0 for window in self.windows]
+
+        # 前一个片段结尾帧的缓存：{片段索引: {帧序号: 帧}}，输出对应的转场帧后释放
+        self._tails: Dict[int, Dict[int, np.ndarray]] = {}
+        # 已释放的结尾帧缓冲区，供下一个转场窗口复用
+        self._free_tail_buffers: List[np.ndarray] = []
+        # 索引小于该值的片段已不再使用，其帧缓冲池已释放
+        self._released_clips = 0
+
+    def _frame_key(self, t: float) -> int:
+        """把片段内时间转换为缓存键：片段在输出帧网格上最接近的帧序号"""
+        if self.fps:
+            return int(np.floor(t * self.fps + 0.5))
+        return int(round(t * 1e6))
+
+    def _tail_time(self, index: int, local_t: float) -> float:
+        """
+        片段 index 的转场窗口在 local_t 处复用的前一个片段结尾帧的时间
+
+        转场时长是整数帧时就是混合时刻本身；否则取前一个片段在 shift 帧之前输出的帧，
+        与混合时刻相差不超过半帧，记录和查找的帧序号总是一致。
+        """
+        prev_duration = self.durations[index - 1]
+        if self.fps:
+            return prev_duration + local_t - self.shifts[index] / self.fps
+        return prev_duration - self.windows[index] + local_t
+
+    def _fit(self, frame: np.ndarray) -> np.ndarray:
+        """尺寸小于画布的帧居中放到黑色背景上（与compose方式一致）"""
+        h, w = frame.shape[:2]
+        if (w, h) == self.size:
+            return frame
+        if self.pool is not None:
+            canvas = self.pool.get((self.size[1], self.size[0], 3))
+            canvas.fill(0)
+        else:
+            canvas = np.zeros((self.size[1], self.size[0], 3), dtype=np.uint8)
+        x, y = (self.size[0] - w) // 2, (self.size[1] - h) // 2
+        canvas[y:y + h, x:x + w] = frame[:, :, :3]
+        return canvas
+
+    def _keep_tail_frame(self, frame: np.ndarray) -> np.ndarray:
+        """
+        复制一份结尾帧供转场复用
+
+        源片段（如带缓冲池的动画片段）和缓冲池都会复用输出数组，记录的帧必须由合成器自己持有。
+        """
+        for i, buffer in enumerate(self._free_tail_buffers):
+            if buffer.shape == frame.shape and buffer.dtype == frame.dtype:
+                del self._free_tail_buffers[i]
+                np.copyto(buffer, frame)
+                return buffer
+        return frame.copy()
+
+    def _release_clips(self, end: int) -> None:
+        """释放索引小于 end 的片段自带的帧缓冲池（如动画片段），之后再取帧时会重新分配"""
+        for index in range(self._released_clips, end):
+            pool = getattr(self.clips[index], 'frame_pool', None)
+            if pool is not None:
+                pool.clear()
+        self._released_clips = max(self._released_clips, end)
+
+    def _release_tail(self, index: int) -> None:
+        """释放片段 index 记录的结尾帧，缓冲区回收复用"""
+        tail = self._tails.pop(index, None)
+        if tail:
+            self._free_tail_buffers.extend(tail.values())
+
+    def _source_frame(self, index: int, t: float) -> np.ndarray:
+        """
+        获取片段 index 在片段内时间 t 的帧
+
+        下一个片段有转场且 t 位于本片段结尾的转场窗口内时，记录该帧供转场复用。
+        """
+        next_index = index + 1
+        if next_index < len(self.clips) and self.windows[next_index] > 0:
+            tail_start = self._tail_time(next_index, 0.0)
+            # 允许微小的浮点误差，保证窗口起点的帧也被记录
+            if t >= tail_start - 1e-6:
+                tail = self._tails.setdefault(index, {})
+                key = self._frame_key(t)
+                frame = tail.get(key)
+                if frame is None:
+                    frame = self._keep_tail_frame(self._fit(self.clips[index].get_frame(t)))
+                    tail[key] = frame
+                return frame
+        return self._fit(self.clips[index].get_frame(t))
+
+    def make_frame(self, t: float) -> np.ndarray:
+        """
+        计算输出时间 t 的帧
+
+        Args:
+            t: 输出时间（秒）
+
+        Returns:
+            RGB帧
+        """
+        index = max(0, min(bisect.bisect_right(self.starts, t) - 1, len(self.clips) - 1))
+        local_t = t - self.starts[index]
+        window = self.windows[index]
+
+        # 更早片段的结尾帧已经不会再用到
+        for tail_index in [i for i in self._tails if i < index - 1]:
+            self._release_tail(tail_index)
+        self._release_clips(index - 1)
+
+        if window > 0 and local_t < window:
+            prev_index = index - 1
+            prev_t = self.durations[prev_index] - window + local_t
+            tail = self._tails.get(prev_index)
+            key = self._frame_key(self._tail_time(index, local_t))
+            kept = tail.pop(key, None) if tail else None
+            frame1 = kept if kept is not None else self._fit(self.clips[prev_index].get_frame(prev_t))
+            frame2 = self._fit(self.clips[index].get_frame(local_t))
+            if self.pool is not None:
+                frame = self.blends[index](frame1, frame2, local_t / window, pool=self.pool)
+            else:
+                frame = self.blends[index](frame1, frame2, local_t / window)
+
+            # 该结尾帧的转场已输出，立即回收（更早的帧也不会再用到）
+            if kept is not None:
+                self._free_tail_buffers.append(kept)
+                for stale in [k for k in tail if k < key]:
+                    self._free_tail_buffers.append(tail.pop(stale))
+                if not tail:
+                    del self._tails[prev_index]
+            return frame
+
+        # 转场窗口结束后，前一个片段的结尾帧和缓冲区也不再需要
+        if index - 1 in self._tails:
+            self._release_tail(index - 1)
+        self._release_clips(index)
+        return self._source_frame(index, local_t)
+
+    def build_audio(self):
+        """按时间表把各片段的音频合成为一条音轨，所有片段都没有音频时返回None"""
+        audio_clips = [clip.audio.set_start(start) for clip, start in zip(self.clips, self.starts)
+                       if clip.audio is not None]
+        if not audio_clips:
+            return None
+        return CompositeAudioClip(audio_clips).set_duration(self.duration)
+
+    def to_clip(self, include_audio: bool = True) -> VideoClip:
+        """
+        生成合成后的片段
+
+        Args:
+            include_audio: 是否附加由moviepy合成的音轨；
+                为False时由调用方按 starts 时间表另行合成音轨
+
+        Returns:
+            时长为所有片段时长之和的视频片段
+        """
+        clip = VideoClip(self.make_frame, duration=self.duration)
+        if not include_audio:
+            return clip
+        audio = self.build_audio()
+        if audio is not None:
+            clip = clip.set_audio(audio)
+        return clip
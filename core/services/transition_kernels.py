@@ -0,0 +1,202 @@
+"""
+转场效果的预计算内核
+
+位移网格、百叶窗的逐行透明度和扭曲偏移只与分辨率和转场进度有关，
+按参数缓存后在同一进程内的所有任务间共享，每帧只剩一次向量化的混合或重映射。
+转场进度由时长和帧率决定，同样时长和帧率的转场会命中同一组缓存。
+"""
+
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# 扭曲溶解的参数：最大位移（像素）、空间周期和时间频率
+WARP_AMPLITUDE = 10.0
+WARP_PERIOD = 30.0
+WARP_FREQUENCY = 10.0
+
+# 百叶窗数量
+NUM_BLINDS = 20
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    """缓存的数组被多个任务共享，禁止写入"""
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=8)
+def warp_base_grid(width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    获取恒等映射的坐标网格
+
+    Args:
+        width: 帧宽度
+        height: 帧高度
+
+    Returns:
+        (grid_x, grid_y)，均为 HxW 的 float32 数组
+    """
+    grid_x, grid_y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+    return _readonly(grid_x), _readonly(grid_y)
+
+
+@lru_cache(maxsize=4096)
+def warp_offsets(length: int, progress: float, use_cos: bool) -> np.ndarray:
+    """
+    获取扭曲溶解一维的位移量
+
+    水平位移只随行号变化（sin），垂直位移只随列号变化（cos），
+    因此每帧只需计算两个一维数组。
+
+    Args:
+        length: 行数（水平位移）或列数（垂直位移）
+        progress: 转场进度
+        use_cos: True 计算垂直位移（cos），False 计算水平位移（sin）
+
+    Returns:
+        长度为 length 的 float64 位移数组（与坐标相加后再转换为float32，与逐像素计算的结果一致）
+    """
+    phase = np.arange(length) / WARP_PERIOD + progress * WARP_FREQUENCY
+    wave = np.cos(phase) if use_cos else np.sin(phase)
+    return _readonly(WARP_AMPLITUDE * wave * (1 - progress))
+
+
+def warp_maps(width: int, height: int, progress: float, out_x: Optional[np.ndarray] = None,
+              out_y: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    生成扭曲溶解在某一进度下的重映射坐标
+
+    Args:
+        width: 帧宽度
+        height: 帧高度
+        progress: 转场进度
+        out_x: 写入 map_x 的 HxW float32 缓冲区，None时新分配
+        out_y: 写入 map_y 的 HxW float32 缓冲区，None时新分配
+
+    Returns:
+        (map_x, map_y)，可直接传给 cv2.remap
+    """
+    grid_x, grid_y = warp_base_grid(width, height)
+    if out_x is None:
+        out_x = np.empty((height, width), dtype=np.float32)
+    if out_y is None:
+        out_y = np.empty((height, width), dtype=np.float32)
+    map_x = np.add(grid_x, warp_offsets(height, progress, False)[:, None], out=out_x)
+    map_y = np.add(grid_y, warp_offsets(width, progress, True)[None, :], out=out_y)
+    return map_x, map_y
+
+
+@lru_cache(maxsize=8)
+def blind_row_offsets(height: int, num_blinds: int = NUM_BLINDS) -> np.ndarray:
+    """
+    获取每一行所属百叶窗的开启延迟（i / num_blinds）
+
+    不属于任何百叶窗的末尾几行延迟为无穷大，始终保持前一帧。
+    帧高度不足 num_blinds 行时，每一行各为一条百叶窗。
+
+    Args:
+        height: 帧高度
+        num_blinds: 百叶窗数量
+
+    Returns:
+        长度为 height 的 float64 数组
+    """
+    blind_height = max(1, height // num_blinds)
+    blind_index = np.arange(height) // blind_height
+    return _readonly(np.where(blind_index < num_blinds, blind_index / num_blinds, np.inf))
+
+
+@lru_cache(maxsize=4096)
+def blind_row_alpha(height: int, progress: float, num_blinds: int = NUM_BLINDS) -> np.ndarray:
+    """
+    获取百叶窗在某一进度下每一行的混合权重
+
+    Args:
+        height: 帧高度
+        progress: 转场进度
+        num_blinds: 百叶窗数量
+
+    Returns:
+        长度为 height 的 float64 权重数组，0为前一帧，1为当前帧
+    """
+    return _readonly(np.clip(progress * 2 - blind_row_offsets(height, num_blinds), 0.0, 1.0))
+
+
+@lru_cache(maxsize=4096)
+def blind_row_runs(height: int, progress: float, num_blinds: int = NUM_BLINDS) -> Tuple[Tuple[int, int, float], ...]:
+    """
+    把逐行权重合并为权重相同的连续行区间
+
+    Args:
+        height: 帧高度
+        progress: 转场进度
+        num_blinds: 百叶窗数量
+
+    Returns:
+        (起始行, 结束行, 权重) 的元组
+    """
+    return row_runs(blind_row_alpha(height, progress, num_blinds))
+
+
+def row_runs(row_alpha: np.ndarray) -> Tuple[Tuple[int, int, float], ...]:
+    """把逐行权重合并为权重相同的连续行区间"""
+    boundaries = np.flatnonzero(np.diff(row_alpha)) + 1
+    starts = np.concatenate([[0], boundaries])
+    ends = np.concatenate([boundaries, [len(row_alpha)]])
+    return tuple((int(start), int(end), float(row_alpha[start])) for start, end in zip(starts, ends))
+
+
+def blend_rows(frame1: np.ndarray, frame2: np.ndarray, runs: Tuple[Tuple[int, int, float], ...],
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    按逐行权重混合两帧：result = frame1 * (1 - alpha) + frame2 * alpha
+
+    权重为0或1的行直接复制，其余每个区间只调用一次 addWeighted，结果直接写入输出帧。
+
+    Args:
+        frame1: 前一帧
+        frame2: 当前帧
+        runs: 权重相同的连续行区间，见 row_runs
+        out: 输出缓冲区，None时新分配
+
+    Returns:
+        混合后的帧
+    """
+    result = out if out is not None else np.empty_like(frame1)
+    for start, end, alpha in runs:
+        if alpha <= 0:
+            result[start:end] = frame1[start:end]
+        elif alpha >= 1:
+            result[start:end] = frame2[start:end]
+        else:
+            cv2.addWeighted(frame1[start:end], 1 - alpha, frame2[start:end], alpha, 0, dst=result[start:end])
+    return result
+
+
+def blend_constant(frame: np.ndarray, intensity: float, value: float = 255.0,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    把帧与纯色层混合：result = frame * (1 - intensity) + value * intensity
+
+    纯色层不需要真正分配，直接由一次线性变换完成。
+
+    Args:
+        frame: 输入帧
+        intensity: 纯色层权重
+        value: 纯色的像素值，默认白色
+        out: 输出缓冲区，None时新分配
+
+    Returns:
+        混合后的帧
+    """
+    return cv2.convertScaleAbs(frame, dst=out, alpha=1.0 - intensity, beta=value * intensity)
+
+
+def clear_caches() -> None:
+    """清空所有预计算缓存"""
+    for cached in (warp_base_grid, warp_offsets, blind_row_offsets, blind_row_alpha, blind_row_runs):
+        cached.cache_clear()
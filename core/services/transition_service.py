@@ -9,6 +9,9 @@ from moviepy.editor import AudioFileClip, TextClip, ColorClip
 from moviepy.video.fx import all as vfx
 from moviepy.video.compositing import transitions
 
+from . import transition_kernels
+from ..utils.frame_buffer_pool import FrameBufferPool, get_buffer
+
 
 class TransitionService:
     """管理视频转场效果的服务"""
@@ -30,6 +33,20 @@ class TransitionService:
             "闪白过渡": lambda clip1, clip2, duration: self._flash_transition(clip1, clip2, duration),
             "随机": None  # 随机转场标记，实际函数会在运行时确定
         }
+        
+        # 每个转场对应的帧混合函数 blend(frame1, frame2, progress, pool=None)，供时间轴合成器直接使用
+        self.blend_functions = {
+            "淡入淡出": self._blend_crossfade,
+            "滑动-左": lambda frame1, frame2, progress, pool=None: self._blend_slide(frame1, frame2, progress, 'left', pool),
+            "滑动-右": lambda frame1, frame2, progress, pool=None: self._blend_slide(frame1, frame2, progress, 'right', pool),
+            "滑动-上": lambda frame1, frame2, progress, pool=None: self._blend_slide(frame1, frame2, progress, 'top', pool),
+            "滑动-下": lambda frame1, frame2, progress, pool=None: self._blend_slide(frame1, frame2, progress, 'bottom', pool),
+            "缩放淡入": self._blend_zoom_fade,
+            "旋转淡入": self._blend_rotate_fade,
+            "百叶窗": self._blend_blinds,
+            "扭曲溶解": self._blend_warp_dissolve,
+            "闪白过渡": self._blend_flash
+        }
     
     def get_transition_function(self, transition_name: str):
         """
@@ -55,6 +72,38 @@ class TransitionService:
             
         return self.transitions.get(transition_name, self._no_transition)
     
+    def resolve_transition_names(self, count: int, transition_name: str,
+                                 custom_transitions: Optional[List[str]] = None) -> List[str]:
+        """
+        确定每个连接点实际使用的转场名称（随机转场在此时确定）
+
+        与 apply_transitions_to_clips / create_composite_transition 的规则一致：
+        全局转场中未知名称视为无转场；自定义转场中未知名称使用淡入淡出。
+
+        Args:
+            count: 连接点数量（片段数-1）
+            transition_name: 默认转场效果名称
+            custom_transitions: 自定义转场效果列表，None表示使用全局转场
+
+        Returns:
+            每个连接点的转场名称列表，"无"表示无转场
+        """
+        options = [name for name in self.transitions if name not in ("无", "随机")]
+        names = []
+        for i in range(count):
+            if custom_transitions:
+                name = custom_transitions[i] if i < len(custom_transitions) else transition_name
+                fallback = "淡入淡出"
+            else:
+                name = transition_name
+                fallback = "无"
+            if name == "随机":
+                name = random.choice(options)
+            elif name != "无" and not callable(self.transitions.get(name)):
+                name = fallback
+            names.append(name)
+        return names
+
     def apply_transitions_to_clips(
         self, 
         clips: List[VideoClip], 
@@ -216,33 +265,44 @@ class TransitionService:
     
     # === 转场效果实现 ===
     
-    def _crossfade(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
+    def get_blend_function(self, transition_name: str) -> Optional[Callable]:
         """
-        交叉淡入淡出效果
-        从clip1平滑过渡到clip2
+        获取转场的帧混合函数
+        
+        Args:
+            transition_name: 转场名称（已确定，不能是"随机"）
+            
+        Returns:
+            混合函数 blend(frame1, frame2, progress) -> frame，无转场时返回None
         """
-        # 定义淡入淡出效果函数
-        def crossfade_effect(get_frame, t):
+        return self.blend_functions.get(transition_name)
+    
+    def _make_transition_clip(self, clip1: VideoClip, clip2: VideoClip, duration: float,
+                              blend: Callable) -> VideoClip:
+        """
+        用帧混合函数构建转场片段：前 duration 秒混合clip1的结尾和clip2的开头，之后为clip2
+        
+        Args:
+            clip1: 前一个视频片段
+            clip2: 当前视频片段
+            duration: 转场持续时间
+            blend: 帧混合函数
+            
+        Returns:
+            包含转场效果的视频片段（时长与clip2相同）
+        """
+        def transition_effect(t):
             # 如果在转场区域内
             if t < duration:
-                progress = t / duration
-                
                 # 获取前一个片段的最后一帧和当前片段的第一帧
                 frame1 = clip1.get_frame(clip1.duration - duration + t)
                 frame2 = clip2.get_frame(t)
-                
-                # 使用OpenCV的addWeighted进行帧混合
-                result = cv2.addWeighted(frame1, 1-progress, frame2, progress, 0)
-                return result
-            else:
-                # 转场结束后直接返回当前帧
-                return clip2.get_frame(t)
+                return blend(frame1, frame2, t / duration)
+            # 转场结束后直接返回当前帧
+            return clip2.get_frame(t)
         
         # 创建新片段
-        new_clip = VideoClip(
-            lambda t: crossfade_effect(None, t),
-            duration=clip2.duration
-        )
+        new_clip = VideoClip(transition_effect, duration=clip2.duration)
         
         # 复制原始片段的音频
         if clip2.audio is not None:
@@ -250,6 +310,13 @@ class TransitionService:
         
         return new_clip
     
+    def _crossfade(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
+        """
+        交叉淡入淡出效果
+        从clip1平滑过渡到clip2
+        """
+        return self._make_transition_clip(clip1, clip2, duration, self._blend_crossfade)
+    
     def _slide_in(self, clip1: VideoClip, clip2: VideoClip, duration: float, direction: str = 'left') -> VideoClip:
         """
         滑入效果
@@ -264,298 +331,145 @@ class TransitionService:
         Returns:
             包含转场效果的视频片段
         """
-        # 定义滑动函数
-        def slide_effect(get_frame, t):
-            # 如果在转场区域内
-            if t < duration:
-                progress = t / duration
-                
-                # 获取前一个片段的最后一帧和当前片段的第一帧
-                frame1 = clip1.get_frame(clip1.duration - duration + t)
-                frame2 = clip2.get_frame(t)
-                
-                h, w = frame1.shape[:2]
-                result = frame1.copy()
-                
-                # 计算滑动偏移
-                if direction == 'left':
-                    offset_x = int(w * (1 - progress))
-                    frame2_visible = frame2[:, :max(0, w-offset_x)]
-                    result[:, offset_x:] = frame2_visible
-                elif direction == 'right':
-                    offset_x = int(w * (1 - progress))
-                    frame2_visible = frame2[:, offset_x:]
-                    result[:, :min(w, w-offset_x)] = frame2_visible
-                elif direction == 'top':
-                    offset_y = int(h * (1 - progress))
-                    frame2_visible = frame2[:max(0, h-offset_y), :]
-                    result[offset_y:, :] = frame2_visible
-                elif direction == 'bottom':
-                    offset_y = int(h * (1 - progress))
-                    frame2_visible = frame2[offset_y:, :]
-                    result[:min(h, h-offset_y), :] = frame2_visible
-                
-                return result
-            else:
-                # 转场结束后直接返回当前帧
-                return clip2.get_frame(t)
-        
-        # 创建新片段
-        new_clip = VideoClip(
-            lambda t: slide_effect(None, t),
-            duration=clip2.duration
-        )
-        
-        # 复制原始片段的音频
-        if clip2.audio is not None:
-            new_clip = new_clip.set_audio(clip2.audio)
-        
-        return new_clip
+        return self._make_transition_clip(
+            clip1, clip2, duration,
+            lambda frame1, frame2, progress: self._blend_slide(frame1, frame2, progress, direction))
     
     def _zoom_fade(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
         """
         缩放淡入效果
         从clip1平滑过渡到clip2，clip2从小到大缩放进入
         """
-        # 定义缩放函数
-        def zoom_effect(get_frame, t):
-            # 如果在转场区域内
-            if t < duration:
-                progress = t / duration
-                
-                # 获取前一个片段的最后一帧和当前片段的第一帧
-                frame1 = clip1.get_frame(clip1.duration - duration + t)
-                frame2 = clip2.get_frame(t)
-                
-                # 对第二个帧应用缩放
-                h, w = frame2.shape[:2]
-                center = (w/2, h/2)
-                zoom_factor = 0.5 + 0.5 * progress
-                
-                # 创建缩放矩阵
-                M = np.float32([
-                    [zoom_factor, 0, center[0]*(1-zoom_factor)],
-                    [0, zoom_factor, center[1]*(1-zoom_factor)]
-                ])
-                zoomed_frame2 = cv2.warpAffine(frame2, M, (w, h))
-                
-                # 根据进度混合两个帧
-                result = cv2.addWeighted(frame1, 1-progress, zoomed_frame2, progress, 0)
-                return result
-            else:
-                # 转场结束后直接返回当前帧
-                return clip2.get_frame(t)
-        
-        # 创建新片段
-        new_clip = VideoClip(
-            lambda t: zoom_effect(None, t),
-            duration=clip2.duration
-        )
-        
-        # 复制原始片段的音频
-        if clip2.audio is not None:
-            new_clip = new_clip.set_audio(clip2.audio)
-        
-        return new_clip
+        return self._make_transition_clip(clip1, clip2, duration, self._blend_zoom_fade)
     
     def _rotate_fade(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
         """
         旋转淡入效果
         从clip1平滑过渡到clip2，clip2旋转进入
         """
-        # 定义旋转函数
-        def rotate_effect(get_frame, t):
-            # 如果在转场区域内
-            if t < duration:
-                progress = t / duration
-                
-                # 获取前一个片段的最后一帧和当前片段的第一帧
-                frame1 = clip1.get_frame(clip1.duration - duration + t)
-                frame2 = clip2.get_frame(t)
-                
-                # 对第二个帧应用旋转
-                h, w = frame2.shape[:2]
-                center = (w/2, h/2)
-                angle = 90 * (1 - progress)
-                
-                rot_mat = cv2.getRotationMatrix2D(center, angle, progress)
-                rotated_frame2 = cv2.warpAffine(frame2, rot_mat, (w, h))
-                
-                # 根据进度混合两个帧
-                result = cv2.addWeighted(frame1, 1-progress, rotated_frame2, progress, 0)
-                return result
-            else:
-                # 转场结束后直接返回当前帧
-                return clip2.get_frame(t)
-        
-        # 创建新片段
-        new_clip = VideoClip(
-            lambda t: rotate_effect(None, t),
-            duration=clip2.duration
-        )
-        
-        # 复制原始片段的音频
-        if clip2.audio is not None:
-            new_clip = new_clip.set_audio(clip2.audio)
-        
-        return new_clip
+        return self._make_transition_clip(clip1, clip2, duration, self._blend_rotate_fade)
     
     def _blinds_effect(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
         """
         百叶窗效果
         从clip1平滑过渡到clip2，模拟百叶窗打开效果
         """
-        # 定义百叶窗效果函数
-        def blinds_effect(get_frame, t):
-            # 如果在转场区域内
-            if t < duration:
-                progress = t / duration
-                
-                # 获取前一个片段的最后一帧和当前片段的第一帧
-                frame1 = clip1.get_frame(clip1.duration - duration + t)
-                frame2 = clip2.get_frame(t)
-                
-                h, w = frame1.shape[:2]
-                result = frame1.copy()
-                
-                # 创建百叶窗效果
-                num_blinds = 20
-                blind_height = h // num_blinds
-                
-                for i in range(num_blinds):
-                    y_start = i * blind_height
-                    y_end = min((i + 1) * blind_height, h)
-                    
-                    # 控制每个百叶窗的开合程度
-                    blind_progress = min(1, progress * 2 - i / num_blinds)
-                    if blind_progress > 0:
-                        # 只替换当前百叶窗部分
-                        result[y_start:y_end, :] = cv2.addWeighted(
-                            frame1[y_start:y_end, :], 1-blind_progress,
-                            frame2[y_start:y_end, :], blind_progress,
-                            0
-                        )
-                
-                return result
-            else:
-                # 转场结束后直接返回当前帧
-                return clip2.get_frame(t)
-        
-        # 创建新片段
-        new_clip = VideoClip(
-            lambda t: blinds_effect(None, t),
-            duration=clip2.duration
-        )
-        
-        # 复制原始片段的音频
-        if clip2.audio is not None:
-            new_clip = new_clip.set_audio(clip2.audio)
-        
-        return new_clip
+        return self._make_transition_clip(clip1, clip2, duration, self._blend_blinds)
     
     def _warp_dissolve(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
         """
         扭曲溶解效果
         从clip1平滑过渡到clip2，带有扭曲效果
         """
-        # 定义扭曲溶解函数
-        def warp_effect(get_frame, t):
-            # 如果在转场区域内
-            if t < duration:
-                progress = t / duration
-                
-                # 获取前一个片段的最后一帧和当前片段的第一帧并应用扭曲效果
-                frame1 = clip1.get_frame(clip1.duration - duration + t)
-                frame2 = clip2.get_frame(t)
-                
-                h, w = frame1.shape[:2]
-                
-                # 创建扭曲网格
-                map_x = np.zeros((h, w), np.float32)
-                map_y = np.zeros((h, w), np.float32)
-                
-                for y in range(h):
-                    for x in range(w):
-                        # 添加基于时间的扭曲
-                        offset_x = 10 * np.sin(y/30 + progress * 10) * (1 - progress)
-                        offset_y = 10 * np.cos(x/30 + progress * 10) * (1 - progress)
-                        
-                        map_x[y, x] = x + offset_x
-                        map_y[y, x] = y + offset_y
-                
-                # 分别对两个帧应用扭曲
-                warped1 = cv2.remap(frame1, map_x, map_y, cv2.INTER_LINEAR)
-                warped2 = frame2  # 新帧不扭曲
-                
-                # 根据进度混合两个帧
-                result = cv2.addWeighted(warped1, 1-progress, warped2, progress, 0)
-                return result
-            else:
-                # 转场结束后直接返回当前帧
-                return clip2.get_frame(t)
-        
-        # 创建新片段
-        new_clip = VideoClip(
-            lambda t: warp_effect(None, t),
-            duration=clip2.duration
-        )
-        
-        # 复制原始片段的音频
-        if clip2.audio is not None:
-            new_clip = new_clip.set_audio(clip2.audio)
-        
-        return new_clip
+        return self._make_transition_clip(clip1, clip2, duration, self._blend_warp_dissolve)
     
     def _flash_transition(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
         """
         闪白过渡效果
         从clip1过渡到clip2，中间经过白色闪光
         """
-        # 定义闪白效果函数
-        def flash_effect(get_frame, t):
-            # 如果在转场区域内
-            if t < duration:
-                progress = t / duration
-                
-                # 获取前一个片段的最后一帧和当前片段的第一帧
-                frame1 = clip1.get_frame(clip1.duration - duration + t)
-                frame2 = clip2.get_frame(t)
-                
-                # 创建闪白效果
-                if progress < 0.5:
-                    # 前半部分：前一帧逐渐变白
-                    white_intensity = progress * 2
-                    result = cv2.addWeighted(
-                        frame1, 1 - white_intensity,
-                        np.ones_like(frame1) * 255, white_intensity,
-                        0
-                    )
-                else:
-                    # 后半部分：从白色过渡到新帧
-                    white_intensity = 2 - progress * 2
-                    result = cv2.addWeighted(
-                        frame2, 1 - white_intensity,
-                        np.ones_like(frame2) * 255, white_intensity,
-                        0
-                    )
-                
-                return result
-            else:
-                # 转场结束后直接返回当前帧
-                return clip2.get_frame(t)
+        return self._make_transition_clip(clip1, clip2, duration, self._blend_flash)
+    
+    def _no_transition(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
+        """无转场效果"""
+        return clip2
+    
+    # === 帧混合函数：frame1 为前一个片段的帧，frame2 为当前片段的帧，progress 为转场进度 [0, 1) ===
+    # 提供 pool 时，结果和中间结果都写入缓冲池中的预分配缓冲区，稳定渲染时每帧不再分配内存；
+    # 返回的帧在缓冲池轮转后会被覆盖，需要长期保留时调用方应自行复制。
+    
+    def _blend_crossfade(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                         pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """交叉淡入淡出：使用OpenCV的addWeighted进行帧混合"""
+        return cv2.addWeighted(frame1, 1-progress, frame2, progress, 0, dst=get_buffer(pool, frame1.shape))
+    
+    def _blend_slide(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                     direction: str = 'left', pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """滑入：frame2从指定方向滑入，覆盖frame1"""
+        h, w = frame1.shape[:2]
+        result = get_buffer(pool, frame1.shape)
+        if result is None:
+            result = frame1.copy()
+        else:
+            np.copyto(result, frame1)
+        
+        # 计算滑动偏移
+        if direction == 'left':
+            offset_x = int(w * (1 - progress))
+            frame2_visible = frame2[:, :max(0, w-offset_x)]
+            result[:, offset_x:] = frame2_visible
+        elif direction == 'right':
+            offset_x = int(w * (1 - progress))
+            frame2_visible = frame2[:, offset_x:]
+            result[:, :min(w, w-offset_x)] = frame2_visible
+        elif direction == 'top':
+            offset_y = int(h * (1 - progress))
+            frame2_visible = frame2[:max(0, h-offset_y), :]
+            result[offset_y:, :] = frame2_visible
+        elif direction == 'bottom':
+            offset_y = int(h * (1 - progress))
+            frame2_visible = frame2[offset_y:, :]
+            result[:min(h, h-offset_y), :] = frame2_visible
+        
+        return result
+    
+    def _blend_zoom_fade(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                         pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """缩放淡入：frame2从小到大缩放，同时与frame1混合"""
+        h, w = frame2.shape[:2]
+        center = (w/2, h/2)
+        zoom_factor = 0.5 + 0.5 * progress
+        
+        # 创建缩放矩阵
+        M = np.float32([
+            [zoom_factor, 0, center[0]*(1-zoom_factor)],
+            [0, zoom_factor, center[1]*(1-zoom_factor)]
+        ])
+        zoomed_frame2 = cv2.warpAffine(frame2, M, (w, h), dst=get_buffer(pool, frame2.shape))
+        
+        # 根据进度混合两个帧
+        return cv2.addWeighted(frame1, 1-progress, zoomed_frame2, progress, 0, dst=get_buffer(pool, frame1.shape))
+    
+    def _blend_rotate_fade(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                           pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """旋转淡入：frame2旋转进入，同时与frame1混合"""
+        h, w = frame2.shape[:2]
+        center = (w/2, h/2)
+        angle = 90 * (1 - progress)
+        
+        rot_mat = cv2.getRotationMatrix2D(center, angle, progress)
+        rotated_frame2 = cv2.warpAffine(frame2, rot_mat, (w, h), dst=get_buffer(pool, frame2.shape))
+        
+        # 根据进度混合两个帧
+        return cv2.addWeighted(frame1, 1-progress, rotated_frame2, progress, 0, dst=get_buffer(pool, frame1.shape))
+    
+    def _blend_blinds(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                      pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """百叶窗：逐条打开，每条百叶窗内混合两帧（按预计算的逐行权重一次混合）"""
+        h = frame1.shape[0]
+        return transition_kernels.blend_rows(frame1, frame2, transition_kernels.blind_row_runs(h, progress),
+                                             out=get_buffer(pool, frame1.shape))
+    
+    def _blend_warp_dissolve(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                             pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """扭曲溶解：frame1带时间相关的正弦扭曲，与frame2混合"""
+        h, w = frame1.shape[:2]
         
-        # 创建新片段
-        new_clip = VideoClip(
-            lambda t: flash_effect(None, t),
-            duration=clip2.duration
-        )
+        # 由缓存的坐标网格和一维位移生成扭曲网格
+        map_x, map_y = transition_kernels.warp_maps(
+            w, h, progress, get_buffer(pool, (h, w), np.float32), get_buffer(pool, (h, w), np.float32))
         
-        # 复制原始片段的音频
-        if clip2.audio is not None:
-            new_clip = new_clip.set_audio(clip2.audio)
+        # 只对前一帧应用扭曲，新帧不扭曲
+        warped1 = cv2.remap(frame1, map_x, map_y, cv2.INTER_LINEAR, dst=get_buffer(pool, frame1.shape))
         
-        return new_clip
+        # 根据进度混合两个帧
+        return cv2.addWeighted(warped1, 1-progress, frame2, progress, 0, dst=get_buffer(pool, frame1.shape))
     
-    def _no_transition(self, clip1: VideoClip, clip2: VideoClip, duration: float) -> VideoClip:
-        """无转场效果"""
-        return clip2 
\ No newline at end of file
+    def _blend_flash(self, frame1: np.ndarray, frame2: np.ndarray, progress: float,
+                     pool: Optional[FrameBufferPool] = None) -> np.ndarray:
+        """闪白：前半段frame1逐渐变白，后半段从白色过渡到frame2"""
+        if progress < 0.5:
+            # 前半部分：前一帧逐渐变白
+            return transition_kernels.blend_constant(frame1, progress * 2, out=get_buffer(pool, frame1.shape))
+        # 后半部分：从白色过渡到新帧
+        return transition_kernels.blend_constant(frame2, 2 - progress * 2, out=get_buffer(pool, frame2.shape))
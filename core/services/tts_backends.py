@@ -0,0 +1,209 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import uuid
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..utils.ffmpeg_utils import FFmpegUtils
+from ..utils.path_utils import PathUtils
+
+
+class TTSBackend:
+    """
+    语音合成后端基类
+
+    子类实现 render()，生成后端原生格式的音频文件；
+    输出格式和语速不被后端原生支持时，由 synthesize() 统一用ffmpeg转换。
+    """
+
+    name = ''
+    # 原生输出格式（文件扩展名，不含点）
+    native_format = 'wav'
+    # 是否支持原生语速控制
+    native_speed = False
+    # 是否访问网络服务（需要限速）
+    remote = False
+
+    def __init__(self, **options):
+        self.options = options
+        self.path_utils = PathUtils()
+
+    def is_available(self) -> bool:
+        """后端在当前环境中是否可用"""
+        return True
+
+    def render(self, text: str, output_path: Path, lang: str, voice: Optional[str], speed: float) -> None:
+        """
+        生成原生格式的音频文件
+
+        Args:
+            text: 要转换的文本
+            output_path: 输出文件路径（扩展名为 native_format）
+            lang: 语言
+            voice: 音色，None时使用语言的默认音色
+            speed: 语速（1.0为正常速度），native_speed 为False时忽略
+        """
+        raise NotImplementedError
+
+    def synthesize(self, text: str, output_path: Path, lang: str, voice: Optional[str] = None,
+                   speed: float = 1.0, audio_format: str = 'mp3') -> None:
+        """
+        生成指定格式和语速的音频文件
+
+        Args:
+            text: 要转换的文本
+            output_path: 输出文件路径
+            lang: 语言
+            voice: 音色
+            speed: 语速（1.0为正常速度）
+            audio_format: 输出格式（mp3、wav 等）
+        """
+        output_path = Path(output_path)
+        needs_tempo = abs(speed - 1.0) > 1e-3 and not self.native_speed
+        if audio_format == self.native_format and not needs_tempo:
+            self.render(text, output_path, lang, voice, speed)
+            return
+
+        native_path = self.path_utils.get_temp_dir() / f"tts_{uuid.uuid4().hex}.{self.native_format}"
+        try:
+            self.render(text, native_path, lang, voice, speed)
+            args = ['-i', native_path]
+            if needs_tempo:
+                args += ['-filter:a', build_atempo_filter(speed)]
+            FFmpegUtils.run(args + [output_path])
+        finally:
+            if native_path.exists():
+                os.remove(native_path)
+
+
+def build_atempo_filter(speed: float) -> str:
+    """生成变速不变调的atempo滤镜链（单个atempo只支持0.5~2.0倍）"""
+    factors = []
+    while speed > 2.0:
+        factors.append(2.0)
+        speed /= 2.0
+    while speed < 0.5:
+        factors.append(0.5)
+        speed /= 0.5
+    factors.append(speed)
+    return ','.join(f"atempo={factor:.4f}" for factor in factors)
+
+
+class GTTSBackend(TTSBackend):
+    """Google Text-to-Speech（在线服务）"""
+
+    name = 'gtts'
+    native_format = 'mp3'
+    remote = True
+
+    def render(self, text: str, output_path: Path, lang: str, voice: Optional[str], speed: float) -> None:
+        from gtts import gTTS
+
+        # gTTS 的音色即语言/口音代码（如 zh-cn、en）
+        tts = gTTS(text=text, lang=voice or lang, tld=self.options.get('tld', 'com'))
+        tts.save(str(output_path))
+
+
+class EspeakBackend(TTSBackend):
+    """eSpeak NG 本地离线合成，延迟低，不依赖网络"""
+
+    name = 'espeak'
+    native_speed = True
+
+    # 语言代码到 eSpeak 音色的映射
+    VOICES = {'zh-cn': 'cmn', 'zh': 'cmn', 'zh-tw': 'cmn', 'en': 'en', 'en-us': 'en-us'}
+    # eSpeak 的正常语速（每分钟词数）
+    BASE_WPM = 175
+
+    def get_binary(self) -> Optional[str]:
+        return self.options.get('binary') or shutil.which('espeak-ng') or shutil.which('espeak')
+
+    def is_available(self) -> bool:
+        return self.get_binary() is not None
+
+    def render(self, text: str, output_path: Path, lang: str, voice: Optional[str], speed: float) -> None:
+        binary = self.get_binary()
+        if not binary:
+            raise RuntimeError("未找到 espeak-ng/espeak，无法使用本地语音合成")
+        # 音色可以是 eSpeak 音色名，也可以是语言代码
+        voice = voice or lang
+        voice = self.VOICES.get(voice.lower(), voice)
+        cmd = [binary, '-v', voice, '-s', str(int(round(self.BASE_WPM * speed))), '-w', str(output_path), text]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            error = result.stderr.decode('utf-8', errors='ignore').strip()
+            raise RuntimeError(f"espeak合成失败: {error}")
+
+
+class StubBackend(TTSBackend):
+    """
+    确定性的占位后端：生成与文本长度成正比的纯音
+
+    同样的文本和参数总是生成同样的音频，音高由文本的哈希决定。
+    不需要网络，用于吞吐量基准测试和持续集成中跑通"图片+语音→视频"的完整流程。
+    """
+
+    name = 'stub'
+    native_speed = True
+
+    SAMPLE_RATE = 24000
+    # 每个字符的时长和最短时长（秒）
+    SECONDS_PER_CHAR = 0.2
+    MIN_DURATION = 0.5
+
+    def render(self, text: str, output_path: Path, lang: str, voice: Optional[str], speed: float) -> None:
+        import numpy as np
+
+        characters = len(''.join(text.split()))
+        duration = max(self.MIN_DURATION, characters * self.SECONDS_PER_CHAR) / max(speed, 0.1)
+        seed = int.from_bytes(hashlib.sha256(f"{voice or lang}:{text}".encode('utf-8')).digest()[:4], 'big')
+        frequency = 220.0 + seed % 440
+
+        t = np.arange(int(duration * self.SAMPLE_RATE)) / self.SAMPLE_RATE
+        wave_data = 0.3 * np.sin(2 * np.pi * frequency * t)
+        # 首尾10毫秒淡入淡出，避免爆音
+        fade = min(len(t) // 2, int(0.01 * self.SAMPLE_RATE))
+        if fade:
+            ramp = np.linspace(0.0, 1.0, fade)
+            wave_data[:fade] *= ramp
+            wave_data[-fade:] *= ramp[::-1]
+
+        with wave.open(str(output_path), 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.SAMPLE_RATE)
+            wav.writeframes((wave_data * 32767).astype('<i2').tobytes())
+
+
+# 可用的语音合成后端
+TTS_BACKENDS = {
+    GTTSBackend.name: GTTSBackend,
+    EspeakBackend.name: EspeakBackend,
+    StubBackend.name: StubBackend,
+}
+
+
+def get_tts_backend(name: Optional[str] = None, options: Optional[Dict] = None) -> TTSBackend:
+    """
+    获取语音合成后端实例
+
+    Args:
+        name: 后端名称（'gtts'、'espeak' 或 'stub'），None时使用gtts
+        options: 传给后端构造函数的参数
+
+    Returns:
+        语音合成后端实例
+    """
+    backend_class = TTS_BACKENDS.get(name or GTTSBackend.name)
+    if backend_class is None:
+        raise ValueError(f"未知的语音合成后端: {name}，可选: {', '.join(TTS_BACKENDS)}")
+    return backend_class(**(options or {}))
+
+
+def list_tts_backends() -> List[Dict]:
+    """列出所有语音合成后端及其在当前环境中是否可用"""
+    return [{'name': name, 'remote': backend_class.remote, 'available': backend_class().is_available()}
+            for name, backend_class in TTS_BACKENDS.items()]
@@ -1,7 +1,7 @@
 from moviepy.editor import (ImageClip, AudioFileClip, concatenate_videoclips, 
                           VideoFileClip, CompositeVideoClip, vfx, transfx, VideoClip)
 from pathlib import Path
-from typing import List, Dict, Union, Optional, Tuple
+from typing import Callable, List, Dict, Union, Optional, Tuple
 import os
 import subprocess
 import platform
@@ -12,7 +12,10 @@ import time
 import cv2
 import uuid
 import traceback
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+import multiprocessing
 import datetime
+import shutil
 import os.path
 
 # 修复 Pillow 兼容性问题
@@ -24,11 +27,25 @@ except AttributeError:
 from ..models.image_item import ImageItem
 from .animation_service import AnimationService
 from .transition_service import TransitionService
+from .timeline_compositor import TimelineCompositor
+from .render_cache import RenderCache
+from .narration_track import NarrationTrack
+from .render_progress import RenderProgress
+from .encoder_service import (get_encoder, validate_encoder_options, mux_audio, concat_segments,
+                              build_x264_args, FFmpegPipeWriter)
 from ..utils.path_utils import PathUtils
+from ..utils.ffmpeg_utils import FFmpegUtils
+from ..utils.frame_buffer_pool import FrameBufferPool, get_buffer
+from ..utils.media_probe import MediaProbe
 
 class VideoService:
     """视频服务，处理视频的生成和编辑"""
     
+    # 影响渲染结果的属性：分段渲染进程按这些属性重建视频服务，保证并行与串行渲染的结果一致
+    RENDER_SETTINGS = ('default_duration', 'default_fps', 'still_unit_seconds', 'animation_backend',
+                       'ffmpeg_supersample', 'native_segment_crf', 'encoder', 'encoder_options',
+                       'frame_buffer_pooling', 'clip_keyframe_interval')
+    
     def __init__(self):
         self.path_utils = PathUtils()
         self.default_duration = 5  # 默认每个片段的持续时间
@@ -42,13 +59,95 @@ class VideoService:
         
         # 提供对所有转场的访问
         self.transitions = self.transition_service.transitions
+        
+        # 静态片段快速编码时，单个重复单元的时长（秒）
+        self.still_unit_seconds = 2
+        
+        # 动画渲染后端：'auto' 优先使用ffmpeg原生zoompan，无法表达时回退到OpenCV；'opencv' 始终逐帧渲染
+        self.animation_backend = 'auto'
+        # zoompan前源图像的放大倍数（减小整数像素裁剪带来的抖动）
+        self.ffmpeg_supersample = 2
+        # 原生渲染片段的恒定质量参数
+        self.native_segment_crf = 18
+        
+        # 单个片段分段并行渲染：并行进程数（None表示CPU核心数）和启用的最短时长（秒）
+        self.parallel_workers = None
+        self.time_slice_min_duration = 60.0
+        # 多个片段时是否按片段并行渲染（需要指定统一的输出分辨率）
+        self.parallel_clip_rendering = True
+        
+        # 片段文件（render_clip_file）的关键帧间隔（秒）：导出时转场窗口之后从关键帧起以流复制方式复用片段，
+        # 间隔越小，转场窗口之后需要重新渲染的帧越少
+        self.clip_keyframe_interval = 1.0
+        
+        # 编码后端：'moviepy'（默认）或 'ffmpeg_pipe'，以及传给后端的参数
+        self.encoder = 'moviepy'
+        self.encoder_options = {}
+        
+        # 渲染结果缓存，设为None时禁用
+        self.render_cache = RenderCache()
+        
+        # 逐帧渲染时是否复用预分配的帧缓冲区（动画重采样、画布和转场混合）
+        self.frame_buffer_pooling = True
+        
+        # 旁白音轨：多个片段的音频一次性解码、混合并编码，再以流复制方式混入视频
+        self.narration_track = NarrationTrack()
+        
+        # 媒体探测：读取音频时长等元数据时不打开解码器，结果按文件签名持久缓存
+        self.media_probe = MediaProbe()
+        
+        # 分段渲染每写入一帧时调用 frame_callback(帧数)，用于跨进程汇总渲染进度
+        self.frame_callback: Optional[Callable[[int], None]] = None
+    
+    def get_render_settings(self) -> Dict:
+        """
+        获取影响渲染结果的全部设置（可序列化，用于在其他进程中重建视频服务）
+        
+        Returns:
+            RENDER_SETTINGS 中各属性的值，以及渲染缓存的目录和磁盘预算（render_cache，None表示禁用）
+        """
+        render_settings = {name: getattr(self, name) for name in self.RENDER_SETTINGS}
+        render_settings['render_cache'] = None
+        if self.render_cache:
+            render_settings['render_cache'] = {'cache_dir': str(self.render_cache.cache_dir),
+                                               'max_bytes': self.render_cache.max_bytes}
+        return render_settings
+    
+    @classmethod
+    def from_render_settings(cls, render_settings: Dict) -> 'VideoService':
+        """
+        按 get_render_settings 的结果创建视频服务
+        
+        Args:
+            render_settings: 渲染设置
+            
+        Returns:
+            视频服务
+        """
+        service = cls()
+        render_settings = dict(render_settings)
+        cache_settings = render_settings.pop('render_cache', None)
+        service.render_cache = RenderCache(**cache_settings) if cache_settings else None
+        for name, value in render_settings.items():
+            setattr(service, name, value)
+        return service
     
-    def create_clip(self, item: Dict) -> VideoClip:
+    def create_clip(self, item: Dict, resolution: Optional[Tuple[int, int]] = None,
+                    attach_audio: bool = True) -> VideoClip:
         """
         为单个图片创建视频片段，支持各种效果
         
+        源图片只在创建片段时按输出分辨率（乘以动画最大缩放值）缩放一次，
+        之后每一帧都直接从该源图像裁剪缩放到输出尺寸，不再对原图逐帧处理。
+        动画可以表达为ffmpeg的zoompan滤镜时，由ffmpeg原生渲染为片段文件，
+        返回的片段带有 segment_path 属性；否则回退到OpenCV逐帧渲染。
+        项目带有 clip_path（已渲染好的片段文件）且尺寸符合时，直接使用该文件，不再渲染动画。
+        
         Args:
-            item: 包含图片路径、持续时间、音频路径、动画效果等
+            item: 包含图片路径、持续时间、音频路径、动画效果等，可选 clip_path
+            resolution: 输出分辨率 (width, height)，为None时保持图片原始尺寸
+            attach_audio: 是否为片段附加音频；为False时只按音频时长确定片段时长，
+                不打开音频解码器（由调用方另行处理音频）
             
         Returns:
             创建的视频片段
@@ -68,20 +167,16 @@ class VideoService:
         image_filename = os.path.splitext(os.path.basename(image_path))[0]
         print(f"\n===== 开始创建片段 {clip_id} (图片: {image_filename}) =====")
         
-        # 先获取音频时长（如果有音频）
-        audio_path = item.get("audio_path")
+        # 先获取音频时长（如果有音频），由文件头读取，不打开解码器
+        audio_path = self.get_item_audio_path(item)
         audio_clip = None
         audio_duration = 0
         
         if audio_path:
-            # 确保路径是字符串
-            if hasattr(audio_path, '__fspath__'):
-                audio_path = str(audio_path)
-            
-            if os.path.exists(audio_path):
+            audio_duration = self.media_probe.get_duration(audio_path)
+            print(f"检测到音频: {audio_path}, 时长: {audio_duration:.2f}秒")
+            if attach_audio:
                 audio_clip = AudioFileClip(audio_path)
-                audio_duration = audio_clip.duration
-                print(f"检测到音频: {audio_path}, 时长: {audio_duration:.2f}秒")
         
         # 确定视频片段时长：优先使用音频时长，其次是用户指定时长，最后是默认时长
         if audio_duration > 0:
@@ -91,14 +186,67 @@ class VideoService:
             duration = item.get("duration", self.default_duration)
             print(f"使用指定时长 {duration:.2f}秒 作为视频片段时长")
         
-        # 加载图像
-        image_clip = ImageClip(image_path).set_duration(duration)
+        # 已有渲染好的片段文件时直接复用（只使用其画面，音频仍使用原始音频）
+        prerendered_clip = self.load_prerendered_clip(item, resolution)
+        if prerendered_clip is not None:
+            image_clip = prerendered_clip.set_duration(duration)
+            if audio_clip:
+                image_clip = image_clip.set_audio(audio_clip)
+            print(f"===== 片段 {clip_id} (图片: {image_filename}) 复用已渲染的片段文件，持续时间: {duration:.2f}s =====\n")
+            return image_clip
         
-        # 应用动画效果
+        # 获取动画设置（确定随机曲线，保证各渲染后端使用同一条曲线）
         animation = item.get("animation")
+        animation_settings = None
         if animation:
-            # 获取动画设置
-            animation_settings = self.animation_service.get_animation_settings(animation)
+            animation_settings = self.animation_service.resolve_animation_settings(
+                self.animation_service.get_animation_settings(animation))
+        
+        # 按输出分辨率准备源图像（每个片段只处理一次）
+        max_scale = self.animation_service.get_max_scale(animation_settings) if animation_settings else 1.0
+        source_image, output_size = self.prepare_source_image(image_path, resolution, max_scale)
+        if self.animation_service.is_static(animation_settings):
+            # 没有实际运动时只渲染一帧，之后每一帧都无需处理
+            source_image = self.render_static_frame(source_image, animation_settings, output_size)
+            animation_settings = None
+            print("片段无运动，使用静态帧")
+        
+        # 优先由ffmpeg原生渲染动画（先查找渲染缓存）
+        segment_path = None
+        if animation_settings and self.animation_backend == 'auto':
+            # 片段文件由本片段持有（命中缓存时为缓存文件的链接），释放片段时删除，缓存淘汰不影响它
+            segment_path = self.path_utils.get_temp_dir() / f"segment_{uuid.uuid4().hex}.mp4"
+            cache_key = None
+            cached = False
+            if self.render_cache:
+                cache_key = self.render_cache.make_key({
+                    'kind': 'native_clip',
+                    'image': self.render_cache.file_digest(image_path),
+                    'animation': animation_settings,
+                    'duration': round(duration, 6),
+                    'size': output_size,
+                    'fps': self.default_fps,
+                    'profile': self.get_encoder_profile()
+                })
+                cached = self.render_cache.get(cache_key, dest=segment_path) is not None
+            
+            if not cached:
+                if not self.render_native_animation(source_image, animation_settings, duration,
+                                                    output_size, str(segment_path)):
+                    segment_path = None
+                elif cache_key:
+                    self.render_cache.put(cache_key, segment_path, link=True)
+        
+        if segment_path:
+            image_clip = VideoFileClip(str(segment_path), audio=False).set_duration(duration)
+            image_clip.segment_path = str(segment_path)
+            print(f"动画已由ffmpeg原生渲染: {animation_settings}")
+        else:
+            # 加载图像
+            image_clip = ImageClip(source_image).set_duration(duration)
+        
+        # 应用动画效果
+        if animation_settings and not segment_path:
             # 打印动画设置
             print(f"应用动画效果: {animation_settings}")
             # 获取并打印曲线参数（用于调试）
@@ -109,7 +257,7 @@ class VideoService:
                 t = i / 10
                 print(f"  t={t:.1f}, value={curve_func(t):.4f}")
             # 应用动画效果
-            image_clip = self.apply_opencv_animation(image_clip, animation_settings, duration, clip_id)
+            image_clip = self.apply_opencv_animation(image_clip, animation_settings, duration, clip_id, output_size)
         
         # 设置音频（如果有）
         if audio_clip:
@@ -121,7 +269,936 @@ class VideoService:
         
         return image_clip
     
-    def apply_opencv_animation(self, clip, animation_params, duration, clip_id=None):
+    def prepare_source_image(self, image_path: str, resolution: Optional[Tuple[int, int]] = None,
+                             max_scale: float = 1.0) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """
+        加载图片并缩放到渲染所需的最小尺寸
+        
+        源图像尺寸为输出分辨率乘以动画最大缩放值（不超过原图尺寸），
+        保证放大到最大缩放值时仍不损失清晰度，同时避免逐帧处理手机拍摄的大图。
+        
+        Args:
+            image_path: 图片路径
+            resolution: 输出分辨率 (width, height)，为None时使用图片原始尺寸
+            max_scale: 动画过程中的最大缩放值
+            
+        Returns:
+            (RGB源图像数组, 输出尺寸 (width, height))
+        """
+        with Image.open(image_path) as img:
+            if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+                # 透明区域合成到黑色背景上，与合成视频的黑色背景一致
+                img = img.convert('RGBA')
+                background = Image.new('RGBA', img.size, (0, 0, 0, 255))
+                img = Image.alpha_composite(background, img)
+            source_image = np.array(img.convert('RGB'))
+        
+        height, width = source_image.shape[:2]
+        if not resolution:
+            return source_image, (width, height)
+        
+        output_size = (int(resolution[0]), int(resolution[1]))
+        source_width = min(width, int(np.ceil(output_size[0] * max_scale)))
+        source_height = min(height, int(np.ceil(output_size[1] * max_scale)))
+        if (source_width, source_height) != (width, height):
+            source_image = cv2.resize(source_image, (source_width, source_height), interpolation=cv2.INTER_AREA)
+            print(f"源图像已从 {width}x{height} 缩放到 {source_width}x{source_height} "
+                  f"(输出 {output_size[0]}x{output_size[1]}, 最大缩放 {max_scale:.3f})")
+        
+        return source_image, output_size
+    
+    def render_native_animation(self, source_image: np.ndarray, animation_settings: Dict, duration: float,
+                                output_size: Tuple[int, int], output_path: str,
+                                fps: Optional[int] = None, frame_range: Optional[Tuple[int, int]] = None,
+                                bitrate: Optional[str] = None, threads: Optional[int] = None,
+                                keyframe_interval: Optional[int] = None) -> Optional[str]:
+        """
+        使用ffmpeg的zoompan滤镜原生渲染动画片段，Python不处理任何一帧
+        
+        Args:
+            source_image: 按输出分辨率准备好的源图像
+            animation_settings: 曲线已解析的动画设置
+            duration: 片段时长（秒）
+            output_size: 输出尺寸 (width, height)
+            output_path: 输出片段路径
+            fps: 帧率，默认使用 self.default_fps
+            frame_range: 只渲染 [起始帧, 结束帧) 范围内的帧，None表示全部
+            bitrate: 目标码率，None时使用恒定质量
+            threads: 编码线程数
+            keyframe_interval: 每隔多少帧强制一个关键帧，None时由编码器决定
+            
+        Returns:
+            成功返回输出路径；动画无法用zoompan表达时返回None
+        """
+        fps = fps or self.default_fps
+        video_filter = self.animation_service.build_ffmpeg_filter(
+            animation_settings, duration, fps, output_size, self.ffmpeg_supersample, frame_range)
+        if video_filter is None:
+            print(f"动画无法由ffmpeg原生实现，使用OpenCV渲染: {animation_settings}")
+            return None
+        
+        source_path = self.path_utils.get_temp_dir() / f"source_{uuid.uuid4().hex}.png"
+        try:
+            cv2.imwrite(str(source_path), cv2.cvtColor(source_image, cv2.COLOR_RGB2BGR))
+            if frame_range:
+                frame_count = frame_range[1] - frame_range[0]
+            else:
+                frame_count = len(np.arange(0, duration, 1.0 / fps))
+            args = ['-i', source_path, '-vf', video_filter, '-frames:v', frame_count, '-r', fps]
+            args += self.segment_encode_args(output_size, bitrate, threads) + self.keyframe_args(keyframe_interval)
+            FFmpegUtils.run(args + [output_path])
+            return str(output_path)
+        finally:
+            if os.path.exists(source_path):
+                os.remove(source_path)
+    
+    def segment_encode_args(self, size: Tuple[int, int], bitrate: Optional[str] = None,
+                            threads: Optional[int] = None) -> List[str]:
+        """
+        获取中间片段的x264编码参数
+        
+        原生渲染和逐帧渲染的片段使用同一组参数，保证它们可以用流复制方式拼接。
+        """
+        options = self.get_segment_encoder_options()
+        return build_x264_args(size, options['preset'], options['crf'], bitrate, options['pix_fmt'], threads)
+    
+    @staticmethod
+    def keyframe_args(keyframe_interval: Optional[int] = None) -> List[str]:
+        """每 keyframe_interval 帧强制一个关键帧的ffmpeg参数，片段可以在这些位置以流复制方式切开"""
+        if not keyframe_interval:
+            return []
+        return ['-force_key_frames', f"expr:not(mod(n,{int(keyframe_interval)}))"]
+    
+    def get_segment_encoder_options(self) -> Dict:
+        """中间片段的编码参数（preset、crf、pix_fmt），以 self.encoder_options 为准"""
+        return {
+            'preset': self.encoder_options.get('preset') or 'medium',
+            'crf': self.encoder_options.get('crf', self.native_segment_crf),
+            'pix_fmt': self.encoder_options.get('pix_fmt') or 'yuv420p'
+        }
+    
+    def get_encoder_profile(self, bitrate: Optional[str] = None, encoder: Optional[str] = None,
+                            encoder_options: Optional[Dict] = None) -> Dict:
+        """获取影响编码结果的全部参数，用作渲染缓存键的一部分"""
+        return {
+            'segment': self.get_segment_encoder_options(),
+            'supersample': self.ffmpeg_supersample,
+            'bitrate': bitrate,
+            'encoder': encoder,
+            'encoder_options': encoder_options
+        }
+    
+    def get_item_cache_parts(self, item: Optional[Dict], include_audio: bool = False) -> Optional[Dict]:
+        """
+        获取项目在渲染缓存键中的组成部分
+        
+        Args:
+            item: 项目（动画应已确定）
+            include_audio: 是否包含音频内容（输出带音频时需要）
+            
+        Returns:
+            图片摘要、动画设置和时长（以及音频摘要）组成的字典
+        """
+        if item is None:
+            return None
+        animation = item.get("animation")
+        parts = {
+            'image': self.render_cache.file_digest(str(item.get("image_path"))),
+            'animation': self.animation_service.get_animation_settings(animation) if animation else None,
+            'duration': round(float(item.get("duration", self.default_duration)), 6)
+        }
+        if item.get("clip_path"):
+            parts['clip'] = self.render_cache.file_digest(item.get("clip_path"))
+        if include_audio:
+            parts['audio'] = self.render_cache.file_digest(item.get("audio_path"))
+        return parts
+    
+    def resolve_item(self, item: Dict) -> Dict:
+        """返回确定了随机动画曲线的项目副本，保证缓存键和渲染结果一致"""
+        resolved = dict(item)
+        if item.get("animation"):
+            resolved["animation"] = self.animation_service.resolve_animation_settings(
+                self.animation_service.get_animation_settings(item["animation"]))
+        return resolved
+    
+    def get_quality_bitrate(self, output_quality: str) -> Optional[str]:
+        """根据输出质量获取目标码率"""
+        return {'low': '1000k', 'medium': '2500k', 'high': '5000k'}.get(output_quality)
+    
+    def get_item_audio_path(self, item: Dict) -> Optional[str]:
+        """获取项目存在的音频文件路径，没有音频时返回None"""
+        audio_path = item.get("audio_path")
+        if audio_path and os.path.exists(str(audio_path)):
+            return str(audio_path)
+        return None
+    
+    def get_item_duration(self, item: Dict) -> float:
+        """获取项目的片段时长：优先使用音频时长，其次是指定时长，最后是默认时长"""
+        audio_path = self.get_item_audio_path(item)
+        if audio_path:
+            audio_duration = self.media_probe.get_duration(audio_path)
+            if audio_duration > 0:
+                return audio_duration
+        return item.get("duration", self.default_duration)
+    
+    def render_time_slice(self, item: Dict, frame_range: Tuple[int, int], output_path: str,
+                          resolution: Optional[Tuple[int, int]] = None, fps: Optional[int] = None,
+                          bitrate: Optional[str] = None, threads: Optional[int] = None,
+                          keyframe_interval: Optional[int] = None) -> str:
+        """
+        渲染片段时间轴上的一段帧范围（不含音频），编码为独立的视频片段
+        
+        Args:
+            item: 项目（动画曲线已确定，duration为片段时长）
+            frame_range: [起始帧, 结束帧)
+            output_path: 输出片段路径
+            resolution: 输出分辨率
+            fps: 帧率
+            bitrate: 目标码率
+            threads: 编码线程数
+            keyframe_interval: 每隔多少帧强制一个关键帧，None时由编码器决定
+            
+        Returns:
+            输出片段路径
+        """
+        fps = fps or self.default_fps
+        duration = item["duration"]
+        animation = item.get("animation")
+        animation_settings = self.animation_service.get_animation_settings(animation) if animation else None
+        
+        # 动画可由ffmpeg原生实现时直接渲染该帧范围（已有渲染好的片段文件时直接解码该文件）
+        if animation_settings and not self.animation_service.is_static(animation_settings) \
+                and not item.get("clip_path"):
+            max_scale = self.animation_service.get_max_scale(animation_settings)
+            source_image, output_size = self.prepare_source_image(str(item["image_path"]), resolution, max_scale)
+            if self.render_native_animation(source_image, animation_settings, duration, output_size,
+                                            output_path, fps, frame_range, bitrate, threads, keyframe_interval):
+                return output_path
+        
+        # 否则使用OpenCV逐帧渲染，并以相同的编码参数写入
+        backend = self.animation_backend
+        self.animation_backend = 'opencv'
+        try:
+            clip = self.create_clip(item, resolution, attach_audio=False)
+        finally:
+            self.animation_backend = backend
+        
+        options = self.get_segment_encoder_options()
+        writer = FFmpegPipeWriter(output_path, clip.size, fps, preset=options['preset'], crf=options['crf'],
+                                  bitrate=bitrate, pix_fmt=options['pix_fmt'], threads=threads,
+                                  ffmpeg_params=self.keyframe_args(keyframe_interval))
+        try:
+            for i in range(*frame_range):
+                writer.write_frame(clip.get_frame(i / fps))
+                if self.frame_callback:
+                    self.frame_callback(1)
+        finally:
+            writer.close()
+            clip.close()
+        return output_path
+    
+    def render_clip_parallel(self, item: Dict, output_path: str, resolution: Optional[Tuple[int, int]] = None,
+                             workers: Optional[int] = None, output_quality: str = 'medium',
+                             progress: Optional[RenderProgress] = None) -> str:
+        """
+        将单个长片段的时间轴切分为多段，在进程池中并行渲染和编码，
+        再用concat分离器无损拼接并混入音频
+        
+        Args:
+            item: 项目
+            output_path: 输出视频路径
+            resolution: 输出分辨率
+            workers: 并行进程数，默认使用CPU核心数
+            output_quality: 输出质量 (low, medium, high)
+            progress: 渲染进度（可选）
+            
+        Returns:
+            输出视频路径
+        """
+        fps = self.default_fps
+        workers = workers or self.parallel_workers or os.cpu_count() or 1
+        
+        # 在主进程中确定随机曲线和时长，保证各分段一致
+        slice_item = self.resolve_item(item)
+        slice_item["duration"] = self.get_item_duration(item)
+        slice_item["audio_path"] = None
+        
+        # 按帧均匀切分时间轴
+        frame_count = len(np.arange(0, slice_item["duration"], 1.0 / fps))
+        workers = max(1, min(workers, frame_count))
+        bounds = np.linspace(0, frame_count, workers + 1).astype(int)
+        frame_ranges = [(int(bounds[i]), int(bounds[i + 1])) for i in range(workers) if bounds[i + 1] > bounds[i]]
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        bitrate = self.get_quality_bitrate(output_quality)
+        
+        work_dir = self.path_utils.get_temp_dir() / f"slices_{uuid.uuid4().hex[:8]}"
+        os.makedirs(work_dir, exist_ok=True)
+        print(f"分段并行渲染: {slice_item['duration']:.2f}秒, {frame_count}帧, {len(frame_ranges)}个分段, {workers}个进程")
+        
+        try:
+            segments = [{'item': slice_item, 'frame_range': frame_range} for frame_range in frame_ranges]
+            segment_paths = self.render_segments(segments, work_dir, resolution, fps, bitrate, workers, threads,
+                                                 progress)
+            
+            # 无损拼接所有分段，再混入音频
+            if progress:
+                progress.set_stage('mux')
+            audio_path = item.get("audio_path")
+            if audio_path and os.path.exists(str(audio_path)):
+                video_path = concat_segments(segment_paths, str(work_dir / "video.mp4"))
+                mux_audio(video_path, str(audio_path), str(output_path), audio_codec='aac')
+            else:
+                concat_segments(segment_paths, str(output_path))
+            
+            print(f"分段并行渲染完成: {output_path}")
+            return str(output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def render_segments(self, segments: List[Dict], work_dir: Path, resolution: Optional[Tuple[int, int]],
+                        fps: int, bitrate: Optional[str], workers: int, threads: Optional[int] = None,
+                        progress: Optional[RenderProgress] = None) -> List[str]:
+        """
+        在进程池中渲染一组时间轴分段，每个分段编码为独立的视频文件
+        
+        Args:
+            segments: 分段描述列表，见 render_segment
+            work_dir: 分段文件目录
+            resolution: 输出分辨率
+            fps: 帧率
+            bitrate: 目标码率
+            workers: 并行进程数
+            threads: 每个分段的编码线程数
+            progress: 渲染进度（可选），各进程已写入的帧数通过共享计数器汇总
+            
+        Returns:
+            与 segments 顺序一致的分段文件路径列表
+        """
+        segment_paths = [str(Path(work_dir) / f"segment_{i:04d}.mp4") for i in range(len(segments))]
+        frame_counter = None
+        if progress:
+            frame_counter = multiprocessing.Value('q', 0)
+            progress.set_stage('render', sum(end - start for start, end in
+                                             (segment['frame_range'] for segment in segments)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_segment_worker,
+                                 initargs=(frame_counter, self.get_render_settings())) as executor:
+            futures = [
+                executor.submit(_render_segment_worker, segment, segment_path, resolution, fps, bitrate, threads)
+                for segment, segment_path in zip(segments, segment_paths)
+            ]
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=progress.min_interval if progress else None,
+                                     return_when=FIRST_EXCEPTION)
+                if progress:
+                    progress.set_frames(frame_counter.value)
+                failed = next((future for future in done if future.exception()), None)
+                if failed:
+                    # 有分段失败时取消尚未开始的分段，退出进程池时只等待正在渲染的分段结束
+                    for future in pending:
+                        future.cancel()
+                    raise failed.exception()
+            # 各分段文件都在 work_dir 中，由本任务持有（命中缓存时为缓存文件的链接）
+            return [future.result() for future in futures]
+    
+    def render_segment(self, segment: Dict, output_path: str, resolution: Optional[Tuple[int, int]] = None,
+                       fps: Optional[int] = None, bitrate: Optional[str] = None,
+                       threads: Optional[int] = None) -> str:
+        """
+        渲染一个时间轴分段
+        
+        Args:
+            segment: 分段描述
+                - item: 片段项目（动画已确定，duration为片段时长，不含音频）
+                - frame_range: 片段内的 [起始帧, 结束帧)
+                - prev_item / transition / transition_duration: 转场窗口分段才有，
+                  表示与前一个片段混合的转场
+            output_path: 输出分段路径
+            resolution: 输出分辨率
+            fps: 帧率
+            bitrate: 目标码率
+            threads: 编码线程数
+            
+        Returns:
+            输出分段路径
+        """
+        fps = fps or self.default_fps
+        cache_key = None
+        if self.render_cache:
+            cache_key = self.render_cache.make_key({
+                'kind': 'segment',
+                'item': self.get_item_cache_parts(segment['item']),
+                'prev_item': self.get_item_cache_parts(segment.get('prev_item')),
+                'transition': segment.get('transition'),
+                'transition_duration': segment.get('transition_duration'),
+                'frame_range': segment['frame_range'],
+                'resolution': resolution,
+                'fps': fps,
+                'profile': self.get_encoder_profile(bitrate)
+            })
+            # 命中时把缓存文件链接到分段路径，拼接前被淘汰也不影响
+            if self.render_cache.get(cache_key, dest=output_path):
+                return output_path
+        
+        if segment.get('transition'):
+            self.render_transition_segment(
+                segment['prev_item'], segment['item'], segment['transition'], segment['transition_duration'],
+                segment['frame_range'], output_path, resolution, fps, bitrate, threads)
+        else:
+            self.render_time_slice(segment['item'], segment['frame_range'], output_path,
+                                   resolution, fps, bitrate, threads)
+        
+        if cache_key:
+            self.render_cache.put(cache_key, output_path, link=True)
+        return output_path
+    
+    def render_transition_segment(self, prev_item: Dict, item: Dict, transition: str, transition_duration: float,
+                                  frame_range: Tuple[int, int], output_path: str,
+                                  resolution: Optional[Tuple[int, int]] = None, fps: Optional[int] = None,
+                                  bitrate: Optional[str] = None, threads: Optional[int] = None) -> str:
+        """
+        渲染转场窗口：当前片段开头与前一个片段结尾混合的部分
+        
+        Args:
+            prev_item: 前一个片段项目
+            item: 当前片段项目
+            transition: 转场名称（已确定，不能是"随机"）
+            transition_duration: 转场时长（秒）
+            frame_range: 当前片段内的 [起始帧, 结束帧)
+            output_path: 输出分段路径
+            resolution: 输出分辨率
+            fps: 帧率
+            bitrate: 目标码率
+            threads: 编码线程数
+            
+        Returns:
+            输出分段路径
+        """
+        fps = fps or self.default_fps
+        backend = self.animation_backend
+        self.animation_backend = 'opencv'
+        try:
+            prev_clip = self.create_clip(prev_item, resolution, attach_audio=False)
+            clip = self.create_clip(item, resolution, attach_audio=False)
+        finally:
+            self.animation_backend = backend
+        
+        transition_clip = self.transitions[transition](prev_clip, clip, transition_duration)
+        options = self.get_segment_encoder_options()
+        writer = FFmpegPipeWriter(output_path, clip.size, fps, preset=options['preset'], crf=options['crf'],
+                                  bitrate=bitrate, pix_fmt=options['pix_fmt'], threads=threads)
+        try:
+            for i in range(*frame_range):
+                writer.write_frame(transition_clip.get_frame(i / fps))
+                if self.frame_callback:
+                    self.frame_callback(1)
+        finally:
+            writer.close()
+            prev_clip.close()
+            clip.close()
+        return output_path
+    
+    def plan_timeline(self, items: List[Dict], transition: str, transition_duration: float,
+                      custom_transitions: Optional[List[str]] = None,
+                      max_segment_frames: Optional[int] = None) -> Tuple[List[Dict], List[float]]:
+        """
+        把多个片段及其转场规划为可独立渲染的时间轴分段
+        
+        每个片段的起点对齐到整帧；有转场的片段开头 transition_duration 秒为转场窗口，
+        单独作为一个分段，其余部分为主体分段（过长时再按 max_segment_frames 切分）。
+        
+        Args:
+            items: 项目列表
+            transition: 转场效果名称
+            transition_duration: 转场时长（秒）
+            custom_transitions: 自定义转场列表，None表示使用全局转场
+            max_segment_frames: 单个主体分段的最大帧数
+            
+        Returns:
+            (分段列表, 每个片段在时间轴上的起始时间)
+        """
+        fps = self.default_fps
+        
+        # 在主进程中确定时长和随机动画曲线，保证各进程渲染结果一致
+        plan_items = []
+        for item in items:
+            plan_item = self.resolve_item(item)
+            plan_item["duration"] = self.get_item_duration(item)
+            plan_item["audio_path"] = None
+            plan_items.append(plan_item)
+        
+        transitions = self.transition_service.resolve_transition_names(
+            len(items) - 1, transition or "无", custom_transitions)
+        
+        # 按累计时长计算每个片段的起止帧，避免误差累积
+        starts = np.concatenate([[0.0], np.cumsum([plan_item["duration"] for plan_item in plan_items])])
+        bounds = np.round(starts * fps).astype(int)
+        
+        segments = []
+        for i, plan_item in enumerate(plan_items):
+            frame_count = int(bounds[i + 1] - bounds[i])
+            body_start = 0
+            name = transitions[i - 1] if i > 0 else "无"
+            if name != "无" and transition_duration > 0:
+                body_start = min(frame_count, len(np.arange(0, transition_duration, 1.0 / fps)))
+                segments.append({
+                    'item': plan_item, 'prev_item': plan_items[i - 1], 'frame_range': (0, body_start),
+                    'transition': name, 'transition_duration': transition_duration
+                })
+            step = max_segment_frames or frame_count
+            for start in range(body_start, frame_count, max(1, step)):
+                segments.append({'item': plan_item, 'frame_range': (start, min(frame_count, start + step))})
+        
+        segments = [segment for segment in segments if segment['frame_range'][1] > segment['frame_range'][0]]
+        return segments, [float(bound) / fps for bound in bounds[:-1]]
+    
+    def write_timeline_audio(self, items: List[Dict], offsets: List[float], output_path: str,
+                             duration: Optional[float] = None) -> Optional[str]:
+        """
+        将各片段的音频按时间轴偏移合成为一条音轨（一次解码、混合和编码）
+        
+        Args:
+            items: 项目列表
+            offsets: 每个片段的起始时间（秒）
+            output_path: 输出音频路径（m4a）
+            duration: 音轨时长（秒），None时到最后一段音频结束为止
+            
+        Returns:
+            输出音频路径；所有片段都没有音频时返回None
+        """
+        entries = []
+        for item, offset in zip(items, offsets):
+            audio_path = item.get("audio_path")
+            if audio_path and os.path.exists(str(audio_path)):
+                entries.append((str(audio_path), offset))
+        return self.narration_track.build(entries, str(output_path), duration)
+    
+    def render_video_parallel(self, items: List[Dict], output_path: str, resolution: Tuple[int, int],
+                              transition: str = "淡入淡出", transition_duration: float = 0.7,
+                              custom_transitions: Optional[List[str]] = None, workers: Optional[int] = None,
+                              output_quality: str = 'medium', progress: Optional[RenderProgress] = None) -> str:
+        """
+        在进程池中并行渲染多个片段，再以流复制方式拼接
+        
+        每个片段的主体和每个转场窗口分别渲染为使用相同编码参数的中间片段，
+        用concat分离器无损拼接后，再混入按时间轴合成的音轨。
+        
+        Args:
+            items: 项目列表
+            output_path: 输出视频路径
+            resolution: 输出分辨率（所有片段尺寸相同才能拼接）
+            transition: 转场效果名称
+            transition_duration: 转场时长（秒）
+            custom_transitions: 自定义转场列表，None表示使用全局转场
+            workers: 并行进程数，默认使用CPU核心数
+            output_quality: 输出质量 (low, medium, high)
+            progress: 渲染进度（可选）
+            
+        Returns:
+            输出视频路径
+        """
+        fps = self.default_fps
+        workers = workers or self.parallel_workers or os.cpu_count() or 1
+        
+        # 先粗略规划得到总帧数，再把过长的主体分段切小，使各进程负载均衡
+        durations = [self.get_item_duration(item) for item in items]
+        total_frames = int(round(sum(durations) * fps))
+        max_segment_frames = max(fps, int(np.ceil(total_frames / workers)))
+        segments, offsets = self.plan_timeline(items, transition, transition_duration,
+                                               custom_transitions, max_segment_frames)
+        
+        workers = max(1, min(workers, len(segments)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        bitrate = self.get_quality_bitrate(output_quality)
+        
+        work_dir = self.path_utils.get_temp_dir() / f"timeline_{uuid.uuid4().hex[:8]}"
+        os.makedirs(work_dir, exist_ok=True)
+        print(f"并行渲染: {len(items)}个片段, {total_frames}帧, {len(segments)}个分段, {workers}个进程")
+        
+        try:
+            segment_paths = self.render_segments(segments, work_dir, resolution, fps, bitrate, workers, threads,
+                                                 progress)
+            
+            if progress:
+                progress.set_stage('audio')
+            audio_path = self.write_timeline_audio(items, offsets, str(work_dir / "audio.m4a"))
+            if progress:
+                progress.set_stage('mux')
+            if audio_path:
+                video_path = concat_segments(segment_paths, str(work_dir / "video.mp4"))
+                mux_audio(video_path, audio_path, str(output_path))
+            else:
+                concat_segments(segment_paths, str(output_path))
+            
+            print(f"并行渲染完成: {output_path}")
+            return str(output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def should_render_parallel(self, items: List[Dict], resolution: Optional[Tuple[int, int]],
+                               workers: Optional[int] = None) -> bool:
+        """判断多个片段是否可以并行渲染：需要统一的输出分辨率和多个可用进程"""
+        workers = workers or self.parallel_workers or os.cpu_count() or 1
+        return self.parallel_clip_rendering and len(items) > 1 and bool(resolution) and workers > 1
+    
+    def should_time_slice(self, item: Dict, workers: Optional[int] = None) -> bool:
+        """判断单个片段是否足够长，需要按时间分段并行渲染"""
+        workers = workers or self.parallel_workers or os.cpu_count() or 1
+        if workers < 2 or self.is_static_item(item):
+            return False
+        return self.get_item_duration(item) >= self.time_slice_min_duration
+    
+    def get_clip_file_profile(self) -> Dict:
+        """片段文件（render_clip_file）的编码方式，编码方式不同的片段文件不能与转场窗口以流复制方式拼接"""
+        return {
+            'profile': self.get_encoder_profile(),
+            'fps': self.default_fps,
+            'keyframe_interval': self.clip_keyframe_interval
+        }
+    
+    def render_clip_file(self, item: Dict, output_path: str, resolution: Optional[Tuple[int, int]] = None) -> str:
+        """
+        渲染单个片段的独立视频文件（含音频），可用于预览，也可以作为导出完整视频时的 clip_path
+        
+        视频流使用中间片段的编码参数，并每隔 clip_keyframe_interval 秒强制一个关键帧，
+        导出时转场窗口之后的主体部分可以从关键帧起以流复制方式拼接，不再重新编码。
+        
+        Args:
+            item: 项目
+            output_path: 输出文件路径
+            resolution: 输出分辨率，为None时保持图片原始尺寸
+            
+        Returns:
+            输出文件路径
+        """
+        fps = self.default_fps
+        clip_item = self.resolve_item(item)
+        clip_item["duration"] = self.get_item_duration(item)
+        audio_path = self.get_item_audio_path(item)
+        clip_item["audio_path"] = None
+        
+        cache_key = None
+        if self.render_cache:
+            cache_key = self.render_cache.make_key({
+                'kind': 'clip_file',
+                'item': self.get_item_cache_parts(dict(clip_item, audio_path=audio_path), include_audio=True),
+                'resolution': resolution,
+                **self.get_clip_file_profile()
+            })
+            if self.render_cache.get(cache_key, dest=output_path, link=False):
+                print(f"片段文件命中渲染缓存: {output_path}")
+                return str(output_path)
+        
+        frame_count = len(np.arange(0, clip_item["duration"], 1.0 / fps))
+        keyframe_interval = max(1, int(round(self.clip_keyframe_interval * fps)))
+        work_dir = self.path_utils.get_temp_dir() / f"clip_{uuid.uuid4().hex[:8]}"
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            video_path = str(work_dir / "video.mp4")
+            self.render_time_slice(clip_item, (0, frame_count), video_path, resolution, fps,
+                                   keyframe_interval=keyframe_interval)
+            if audio_path:
+                mux_audio(video_path, audio_path, str(output_path), audio_codec='aac')
+            else:
+                shutil.move(video_path, str(output_path))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        self.cache_output(cache_key, str(output_path))
+        print(f"片段文件已生成: {output_path}")
+        return str(output_path)
+    
+    def get_clip_file_info(self, item: Dict, resolution: Optional[Tuple[int, int]] = None) -> Optional[Dict]:
+        """
+        获取项目中片段文件（clip_path）的帧数、关键帧和尺寸
+        
+        Args:
+            item: 项目
+            resolution: 要求的输出分辨率
+            
+        Returns:
+            媒体探测信息（含 frames、keyframes、width、height）；没有片段文件，
+            或片段的帧率、尺寸不符、无法读取关键帧时返回None
+        """
+        clip_path = item.get("clip_path")
+        if not clip_path or not os.path.exists(str(clip_path)):
+            return None
+        try:
+            info = self.media_probe.probe(str(clip_path))
+        except Exception as e:
+            print(f"读取片段文件信息失败: {clip_path}: {str(e)}")
+            return None
+        if not info.get('frames') or not info.get('keyframes') or not info.get('fps'):
+            return None
+        if abs(float(info['fps']) - self.default_fps) > 0.01:
+            return None
+        if resolution and (info.get('width'), info.get('height')) != tuple(resolution):
+            return None
+        return info
+    
+    def can_assemble_clip_files(self, clip_infos: List[Optional[Dict]]) -> bool:
+        """所有项目都有可用的片段文件且尺寸相同时，可以直接由片段文件组装完整视频"""
+        return bool(clip_infos) and all(clip_infos) and \
+            len({(info['width'], info['height']) for info in clip_infos}) == 1
+    
+    def copy_clip_range(self, clip_path: str, start_frame: int, output_path: str, fps: Optional[int] = None) -> str:
+        """
+        从关键帧 start_frame 起复制片段文件的视频流到结尾（流复制，不重新编码）
+        
+        Args:
+            clip_path: 片段文件路径
+            start_frame: 起始帧，必须是关键帧
+            output_path: 输出文件路径
+            fps: 帧率
+            
+        Returns:
+            输出文件路径
+        """
+        fps = fps or self.default_fps
+        args = ['-ss', f"{start_frame / fps:.6f}"] if start_frame else []
+        FFmpegUtils.run(args + ['-i', str(clip_path), '-map', '0:v:0', '-c', 'copy', str(output_path)])
+        return str(output_path)
+    
+    def assemble_clip_files(self, items: List[Dict], clip_infos: List[Dict], output_path: str,
+                            transition_names: List[str], transition_duration: float,
+                            workers: Optional[int] = None, progress: Optional[RenderProgress] = None) -> str:
+        """
+        由各项目的片段文件（clip_path，见 render_clip_file）组装完整视频
+        
+        只有转场窗口需要重新渲染：窗口延伸到其后的第一个关键帧，以与片段文件相同的编码参数渲染；
+        片段的其余部分从该关键帧起以流复制方式取出，最后全部用concat分离器无损拼接，
+        并混入按时间轴合成的音轨。片段文件不会被再次编码。
+        
+        Args:
+            items: 项目列表（动画已确定），每个都带有 clip_path
+            clip_infos: 各片段文件的探测信息，见 get_clip_file_info
+            output_path: 输出视频路径
+            transition_names: 每个连接点的转场名称（已确定），"无"表示无转场
+            transition_duration: 转场时长（秒）
+            workers: 渲染转场窗口的并行进程数，默认使用CPU核心数
+            progress: 渲染进度（可选）
+            
+        Returns:
+            输出视频路径
+        """
+        fps = self.default_fps
+        resolution = (clip_infos[0]['width'], clip_infos[0]['height'])
+        window_frames = len(np.arange(0, transition_duration, 1.0 / fps)) if transition_duration > 0 else 0
+        plan_items = [dict(item, duration=self.get_item_duration(item), audio_path=None) for item in items]
+        
+        # 按片段文件的实际帧数排列时间轴
+        parts = []
+        windows = []
+        offsets = []
+        position = 0
+        for i, (item, info) in enumerate(zip(plan_items, clip_infos)):
+            frames = int(info['frames'])
+            offsets.append(position / fps)
+            position += frames
+            body_start = 0
+            name = transition_names[i - 1] if i > 0 and i - 1 < len(transition_names) else "无"
+            if name != "无" and window_frames:
+                # 转场窗口延伸到其后的第一个关键帧，主体从该关键帧起直接复制
+                window = min(frames, window_frames)
+                body_start = min(frames, next((k for k in info['keyframes'] if k >= window), frames))
+                parts.append(('window', len(windows)))
+                windows.append({
+                    'item': item, 'prev_item': plan_items[i - 1], 'frame_range': (0, body_start),
+                    'transition': name, 'transition_duration': transition_duration
+                })
+            if body_start < frames:
+                parts.append(('body', (str(item["clip_path"]), body_start)))
+        
+        workers = workers or self.parallel_workers or os.cpu_count() or 1
+        workers = max(1, min(workers, len(windows)))
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        work_dir = self.path_utils.get_temp_dir() / f"assemble_{uuid.uuid4().hex[:8]}"
+        os.makedirs(work_dir, exist_ok=True)
+        copied = sum(int(info['frames']) for info in clip_infos) - sum(
+            window['frame_range'][1] for window in windows)
+        print(f"由片段文件组装视频: {len(items)}个片段, {len(windows)}个转场窗口, 流复制 {copied} 帧")
+        
+        try:
+            # 转场窗口使用与片段文件相同的恒定质量参数，保证可以无损拼接
+            window_paths = self.render_segments(windows, work_dir, resolution, fps, None, workers, threads,
+                                                progress) if windows else []
+            
+            if progress:
+                progress.set_stage('mux')
+            segment_paths = []
+            for i, (kind, value) in enumerate(parts):
+                if kind == 'window':
+                    segment_paths.append(window_paths[value])
+                else:
+                    clip_path, start_frame = value
+                    segment_paths.append(self.copy_clip_range(clip_path, start_frame,
+                                                              str(work_dir / f"body_{i:04d}.mp4"), fps))
+            
+            audio_path = self.write_timeline_audio(items, offsets, str(work_dir / "audio.m4a"))
+            if audio_path:
+                video_path = concat_segments(segment_paths, str(work_dir / "video.mp4"))
+                mux_audio(video_path, audio_path, str(output_path))
+            else:
+                concat_segments(segment_paths, str(output_path))
+            
+            print(f"片段文件组装完成: {output_path}")
+            return str(output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def export_segment(self, clip: VideoClip, output_path: str, audio_path: Optional[str] = None) -> str:
+        """
+        将原生渲染的片段直接导出为视频文件（视频流不重新编码，按需混入音频）
+        
+        Args:
+            clip: 带有 segment_path 属性的片段
+            output_path: 输出文件路径
+            audio_path: 音频文件路径（可选）
+            
+        Returns:
+            输出文件路径
+        """
+        if audio_path and os.path.exists(str(audio_path)):
+            mux_audio(clip.segment_path, str(audio_path), str(output_path), audio_codec='aac')
+        else:
+            shutil.copyfile(clip.segment_path, str(output_path))
+        return str(output_path)
+    
+    def load_prerendered_clip(self, item: Dict, resolution: Optional[Tuple[int, int]] = None) -> Optional[VideoClip]:
+        """
+        加载项目中已渲染好的片段文件（clip_path）
+        
+        Args:
+            item: 项目
+            resolution: 要求的输出分辨率，片段尺寸不符时不能复用
+            
+        Returns:
+            不含音频的视频片段；没有可用的片段文件时返回None
+        """
+        clip_path = item.get("clip_path")
+        if not clip_path or not os.path.exists(str(clip_path)):
+            return None
+        clip = VideoFileClip(str(clip_path), audio=False)
+        if resolution and tuple(clip.size) != tuple(resolution):
+            print(f"已渲染片段尺寸 {clip.size[0]}x{clip.size[1]} 与输出分辨率不符，重新渲染")
+            clip.close()
+            return None
+        return clip
+    
+    def cache_output(self, cache_key: Optional[str], output_path: str) -> None:
+        """把生成的视频存入渲染缓存（缓存失败不影响输出）"""
+        if not (self.render_cache and cache_key):
+            return
+        try:
+            self.render_cache.put(cache_key, output_path)
+        except OSError as e:
+            print(f"写入渲染缓存失败: {str(e)}")
+    
+    def release_clip(self, clip: VideoClip) -> None:
+        """关闭片段并删除其原生渲染产生的临时片段文件"""
+        try:
+            clip.close()
+        except Exception:
+            pass
+        segment_path = getattr(clip, 'segment_path', None)
+        if segment_path and os.path.exists(segment_path):
+            os.remove(segment_path)
+    
+    def render_static_frame(self, source_image: np.ndarray, animation_settings: Optional[Dict],
+                            output_size: Tuple[int, int]) -> np.ndarray:
+        """
+        渲染没有运动的片段的唯一一帧
+        
+        Args:
+            source_image: 源图像
+            animation_settings: 动画设置（起止值相同），None表示无动画
+            output_size: 输出尺寸 (width, height)
+            
+        Returns:
+            输出尺寸的静态帧
+        """
+        source_size = source_image.shape[1::-1]
+        scale = 1.0
+        offset_x, offset_y = 0, 0
+        if animation_settings:
+            scale = animation_settings.get('scale', [1.0, 1.0])[0]
+            offset_x, offset_y = animation_settings.get('position', [(0, 0), (0, 0)])[0]
+        
+        if scale == 1.0 and offset_x == 0 and offset_y == 0:
+            if source_size == tuple(output_size):
+                return source_image
+            return cv2.resize(source_image, tuple(output_size), interpolation=cv2.INTER_AREA)
+        
+        w, h = output_size
+        M = self.animation_service.compose_affine_matrix(w, h, scale, offset_x, offset_y, source_size)
+        return cv2.warpAffine(source_image, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
+    
+    def is_static_item(self, item: Dict) -> bool:
+        """判断项目是否没有实际运动（可以按静态图片编码）"""
+        animation = item.get("animation")
+        if not animation:
+            return True
+        return self.animation_service.is_static(self.animation_service.get_animation_settings(animation))
+    
+    def write_still_video(self, frame: np.ndarray, duration: float, output_path: str,
+                          audio_path: Optional[str] = None, fps: Optional[int] = None,
+                          output_quality: str = 'medium') -> str:
+        """
+        将静态画面快速编码为视频，不经过逐帧渲染
+        
+        只编码一个短GOP（静态画面编码器调优），然后通过concat分离器
+        重复该GOP的码流（不重新编码）直到达到目标时长，最后直接混入音频。
+        
+        Args:
+            frame: RGB静态帧
+            duration: 视频时长（秒）
+            output_path: 输出视频路径
+            audio_path: 音频文件路径（可选）
+            fps: 帧率，默认使用 self.default_fps
+            output_quality: 输出质量 (low, medium, high)
+            
+        Returns:
+            生成的视频文件路径
+        """
+        fps = fps or self.default_fps
+        crf = {'low': 28, 'medium': 23, 'high': 18}.get(output_quality, 23)
+        
+        # 单元GOP长度（帧），重复该单元拼出完整时长
+        unit_frames = int(fps * self.still_unit_seconds)
+        repeats = max(1, int(np.ceil(duration * fps / unit_frames)))
+        
+        work_dir = self.path_utils.get_temp_dir() / f"still_{uuid.uuid4().hex[:8]}"
+        os.makedirs(work_dir, exist_ok=True)
+        
+        try:
+            # 保存静态帧
+            frame_path = work_dir / "frame.png"
+            cv2.imwrite(str(frame_path), cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+            
+            # 编码一个单元GOP
+            h, w = frame.shape[:2]
+            unit_path = work_dir / "unit.mp4"
+            args = ['-loop', '1', '-framerate', fps, '-i', frame_path,
+                    '-frames:v', unit_frames, '-g', unit_frames,
+                    '-c:v', 'libx264', '-tune', 'stillimage', '-preset', 'medium', '-crf', crf]
+            if w % 2 == 0 and h % 2 == 0:
+                args += ['-pix_fmt', 'yuv420p']
+            FFmpegUtils.run(args + [unit_path])
+            
+            # 重复单元码流，并混入音频
+            list_path = FFmpegUtils.write_concat_list(work_dir / "list.txt", [unit_path] * repeats)
+            args = ['-f', 'concat', '-safe', '0', '-i', list_path]
+            if audio_path and os.path.exists(str(audio_path)):
+                args += ['-i', str(audio_path), '-map', '0:v', '-map', '1:a', '-c:a', 'aac']
+            args += ['-c:v', 'copy', '-t', f"{duration:.3f}", '-movflags', '+faststart', output_path]
+            FFmpegUtils.run(args)
+            
+            print(f"静态片段快速编码完成: {output_path} (时长 {duration:.2f}秒)")
+            return str(output_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def apply_opencv_animation(self, clip, animation_params, duration, clip_id=None, output_size=None):
         """
         使用OpenCV实现高精度的动画效果（包括缩放和位移）
         
@@ -130,6 +1207,7 @@ class VideoService:
             animation_params: 动画参数，包括scale和position
             duration: 动画持续时间
             clip_id: 片段ID，用于日志标识
+            output_size: 输出帧尺寸 (width, height)，为None时与原始片段相同
             
         Returns:
             应用了动画效果的视频片段
@@ -139,102 +1217,78 @@ class VideoService:
         start_pos, end_pos = animation_params.get('position', [(0, 0), (0, 0)])
         curve_name = animation_params.get('curve', '线性')
         
-        # 获取曲线函数
-        curve_func = self.animation_service.get_curve_function(curve_name)
-        
         # 为日志添加片段ID标识
         clip_identifier = f"[片段{clip_id}]" if clip_id else ""
         
-        # 打印更详细的动画参数
+        # 打印动画参数
         print(f"\n{clip_identifier}开始处理视频片段，应用动画:")
         print(f"{clip_identifier}动画时长: {duration:.2f}秒")
         print(f"{clip_identifier}缩放: 起始={start_scale:.2f} -> 结束={end_scale:.2f}")
         print(f"{clip_identifier}位移: 起始=({start_pos[0]:.3f}, {start_pos[1]:.3f}) -> 结束=({end_pos[0]:.3f}, {end_pos[1]:.3f})")
         print(f"{clip_identifier}曲线: '{curve_name}'")
         
-        # 打印曲线值，用于调试
-        print(f"{clip_identifier}曲线'{curve_name}'在不同时间点的值:")
-        for i in range(11):
-            t = i / 10
-            print(f"{clip_identifier}  t={t:.1f}, value={curve_func(t):.4f}")
-        
-        # 预计算每一帧的参数 - 使用更多的采样点进行过采样，减少抖动
-        # 通过预计算和高精度插值减少抖动
-        frame_count = int(duration * self.default_fps * 3)  # 3倍过采样
-        print(f"{clip_identifier}t=0.00, progress=0.0000, curve_value=0.0000, scale={start_scale:.4f}")
+        # 一次性预计算每个输出帧的完整仿射矩阵（缩放、防黑边缩放、位移以及到输出尺寸的缩放）
+        source_size = tuple(clip.size)
+        w, h = output_size or source_size
+        fps = self.default_fps
+        matrices, identity = self.animation_service.build_transform_table(
+            animation_params, duration, (w, h), source_size, fps)
+        last_index = len(matrices) - 1
+        # 每个片段独立的缓冲池：输出帧写入复用的缓冲区，在之后第二次取帧时被覆盖
+        pool = FrameBufferPool(slots=2) if self.frame_buffer_pooling else None
         
-        # 定义处理函数
+        # 定义处理函数：按时间查表，只做一次重采样
         def process_frame(get_frame, t):
-            # 获取原始帧
             frame = get_frame(t)
-            
-            # 计算动画进度
-            progress = min(1.0, t / duration) if duration > 0 else 1.0
-            
-            # 使用曲线函数获取动画曲线值
-            curve_value = curve_func(progress)
-            
-            # 计算当前缩放值
-            current_scale = start_scale + (end_scale - start_scale) * curve_value
-            
-            # 计算当前位移
-            start_x, start_y = start_pos
-            end_x, end_y = end_pos
-            current_x = start_x + (end_x - start_x) * curve_value
-            current_y = start_y + (end_y - start_y) * curve_value
-            
-            # 如果是第一次处理该时间点，打印调试信息
-            if int(t * 100) % 3 == 0:  # 每0.03秒打印一次
-                print(f"{clip_identifier}t={t:.2f}, progress={progress:.4f}, curve_value={curve_value:.4f}, scale={current_scale:.4f}, pos=({current_x:.4f}, {current_y:.4f})")
-            
-            # 使用OpenCV进行高质量缩放和移动
-            h, w = frame.shape[:2]
-            
-            # 计算平移后是否会有黑边
-            max_x_shift = abs(current_x)
-            max_y_shift = abs(current_y)
-            
-            # 如果有平移，增加缩放以防止黑边
-            if max_x_shift > 0 or max_y_shift > 0:
-                # 计算需要增加的缩放比例，确保移动后不会露出黑边
-                border_scale = max(1.0, 1.0 + 2 * max_x_shift, 1.0 + 2 * max_y_shift)
-                # 合并当前缩放和防黑边缩放
-                effective_scale = current_scale * border_scale
-                
-                # 调整缩放矩阵
-                M_scale = np.float32([
-                    [effective_scale, 0, w * (1 - effective_scale) / 2],
-                    [0, effective_scale, h * (1 - effective_scale) / 2]
-                ])
-            else:
-                # 没有平移，使用原始缩放
-                M_scale = np.float32([
-                    [current_scale, 0, w * (1 - current_scale) / 2],
-                    [0, current_scale, h * (1 - current_scale) / 2]
-                ])
-            
-            # 计算位移矩阵
-            M_translate = np.float32([
-                [1, 0, current_x * w],
-                [0, 1, current_y * h]
-            ])
-            
-            # 应用缩放
-            if current_scale != 1.0:
-                frame = cv2.warpAffine(frame, M_scale, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
-            
-            # 应用位移
-            if current_x != 0 or current_y != 0:
-                frame = cv2.warpAffine(frame, M_translate, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
-            
-            return frame
+            index = min(max(int(round(t * fps)), 0), last_index)
+            if identity[index]:
+                return frame
+            return cv2.warpAffine(frame, matrices[index], (w, h), dst=get_buffer(pool, (h, w) + frame.shape[2:]),
+                                  flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
+        
+        # 将处理函数应用到片段，缓冲池随片段传递，合成器用完片段后释放
+        animated_clip = clip.fl(lambda gf, t: process_frame(gf, t))
+        if pool is not None:
+            # moviepy 创建片段时会取第0帧计算尺寸，渲染开始前先释放这块缓冲区
+            pool.clear()
+        animated_clip.frame_pool = pool
+        return animated_clip
+    
+    def write_clip(self, clip: VideoClip, output_path: str, fps: Optional[float] = None,
+                   bitrate: Optional[str] = None, threads: Optional[int] = 4, preset: str = 'medium',
+                   ffmpeg_params: Optional[List[str]] = None, encoder: Optional[str] = None,
+                   encoder_options: Optional[Dict] = None, progress: Optional[RenderProgress] = None) -> str:
+        """
+        使用选定的编码后端把片段写入视频文件
         
-        # 将处理函数应用到片段
-        return clip.fl(lambda gf, t: process_frame(gf, t))
+        Args:
+            clip: 要写出的片段
+            output_path: 输出文件路径
+            fps: 帧率，默认使用 self.default_fps
+            bitrate: 目标码率
+            threads: 编码线程数
+            preset: x264预设
+            ffmpeg_params: 额外的ffmpeg输出参数
+            encoder: 编码后端名称，默认使用 self.encoder
+            encoder_options: 编码后端参数（preset、crf、pix_fmt、threads 等），默认使用 self.encoder_options
+            progress: 渲染进度（可选），进入 render 阶段并按写入的帧数更新
+            
+        Returns:
+            输出文件路径
+        """
+        fps = fps or self.default_fps
+        backend = get_encoder(encoder or self.encoder,
+                              encoder_options if encoder_options is not None else self.encoder_options)
+        print(f"使用编码后端: {backend.name}")
+        if progress:
+            progress.set_stage('render', len(np.arange(0, clip.duration, 1.0 / fps)))
+        return backend.write(clip, str(output_path), fps, bitrate=bitrate,
+                             threads=threads, preset=preset, ffmpeg_params=ffmpeg_params, progress=progress)
     
     def create_video(self, items: List[dict], output_path: str, 
                     transition: str = "淡入淡出", transition_duration: float = 0.7,
-                    advanced_options: Optional[Dict] = None) -> str:
+                    advanced_options: Optional[Dict] = None,
+                    progress_callback: Optional[Callable[[Dict], None]] = None) -> str:
         """
         创建完整视频，支持多种转场效果和高级设置
         
@@ -248,12 +1302,19 @@ class VideoService:
                 - custom_transitions: 自定义转场列表，与项目数量-1对应
                 - video_resolution: 视频分辨率 (width, height)
                 - output_quality: 输出质量 (low, medium, high)
+                - encoder: 编码后端 ('moviepy', 'ffmpeg_pipe')
+                - encoder_options: 编码后端参数 (preset, crf, pix_fmt, threads 等)
+                - parallel_workers: 并行渲染的进程数（单个长片段分段渲染，或多个片段按片段渲染）
+            progress_callback: 进度回调，参数为 {stage, frames_done, frames_total, fps, eta, elapsed}，
+                见 RenderProgress
         
         Returns:
             生成的视频文件路径
         """
         if not items:
             raise ValueError("没有提供要处理的项目")
+        progress = RenderProgress(progress_callback)
+        progress.set_stage('prepare')
         
         # 处理高级选项
         advanced_options = advanced_options or {}
@@ -261,6 +1322,11 @@ class VideoService:
         custom_transitions = advanced_options.get('custom_transitions', [])
         video_resolution = advanced_options.get('video_resolution', None)
         output_quality = advanced_options.get('output_quality', 'medium')
+        encoder = advanced_options.get('encoder', None)
+        encoder_options = advanced_options.get('encoder_options', None)
+        # 渲染开始前检查编码参数，拼写错误或不支持的参数直接报错
+        validate_encoder_options(encoder or self.encoder,
+                                 encoder_options if encoder_options is not None else self.encoder_options)
         
         # 生成基于日期时间的视频文件名
         now = datetime.datetime.now()
@@ -282,6 +1348,34 @@ class VideoService:
         # 组合新的输出路径
         output_path = os.path.join(original_dir, new_filename)
         
+        # 确定随机动画曲线和随机转场，保证缓存键与渲染结果一致
+        items = [self.resolve_item(item) for item in items]
+        if len(items) > 1 and (transition or use_custom_transitions):
+            custom_transitions = self.transition_service.resolve_transition_names(
+                len(items) - 1, transition or "无", custom_transitions if use_custom_transitions else None)
+            use_custom_transitions = True
+        
+        # 相同的输入已经渲染过时直接复用
+        cache_key = None
+        if self.render_cache:
+            cache_key = self.render_cache.make_key({
+                'kind': 'video',
+                'items': [self.get_item_cache_parts(dict(item, duration=self.get_item_duration(item)),
+                                                    include_audio=True) for item in items],
+                'transitions': custom_transitions if use_custom_transitions else None,
+                'transition_duration': transition_duration,
+                'resolution': video_resolution,
+                'fps': self.default_fps,
+                'profile': self.get_encoder_profile(
+                    self.get_quality_bitrate(output_quality), encoder or self.encoder,
+                    encoder_options if encoder_options is not None else self.encoder_options)
+            })
+            # 输出文件是复制出来的独立文件，之后的淘汰和对输出文件的改动互不影响
+            if self.render_cache.get(cache_key, dest=output_path, link=False):
+                progress.set_stage('cached')
+                print(f"命中渲染缓存，直接复用: {output_path}")
+                return output_path
+        
         clips = []
         original_clips = []
         
@@ -297,6 +1391,57 @@ class VideoService:
                 print(f"使用自定义转场: {custom_transitions}")
             print("="*50 + "\n")
             
+            # 所有项目都有可用的片段文件（render_clip_file）时，片段主体以流复制方式拼接，只渲染转场窗口
+            parallel_workers = advanced_options.get('parallel_workers')
+            clip_infos = [self.get_clip_file_info(item, video_resolution) for item in items]
+            if self.can_assemble_clip_files(clip_infos):
+                self.assemble_clip_files(
+                    items, clip_infos, output_path,
+                    custom_transitions if use_custom_transitions else ["无"] * (len(items) - 1),
+                    transition_duration, parallel_workers, progress)
+                self.cache_output(cache_key, output_path)
+                print(f"视频生成完成: {output_path}")
+                print("="*50 + "\n")
+                return output_path
+            
+            # 单个无运动片段：不经过逐帧渲染，直接按静态画面快速编码
+            if len(items) == 1 and self.is_static_item(items[0]):
+                print("检测到单个静态片段，使用静态画面快速编码")
+                clip = self.create_clip(items[0], video_resolution, attach_audio=False)
+                clips.append(clip)
+                audio_path = self.get_item_audio_path(items[0])
+                frame_count = len(np.arange(0, clip.duration, 1.0 / self.default_fps))
+                progress.set_stage('render', frame_count)
+                self.write_still_video(clip.get_frame(0), clip.duration, output_path,
+                                       str(audio_path) if audio_path else None,
+                                       self.default_fps, output_quality)
+                progress.set_frames(frame_count)
+                clip.close()
+                self.cache_output(cache_key, output_path)
+                print(f"视频生成完成: {output_path}")
+                print("="*50 + "\n")
+                return output_path
+            
+            # 单个长片段：按时间分段并行渲染
+            if len(items) == 1 and self.should_time_slice(items[0], parallel_workers):
+                self.render_clip_parallel(items[0], output_path, video_resolution,
+                                          parallel_workers, output_quality, progress)
+                self.cache_output(cache_key, output_path)
+                print(f"视频生成完成: {output_path}")
+                print("="*50 + "\n")
+                return output_path
+            
+            # 多个片段：各片段和转场窗口并行渲染，再以流复制方式拼接
+            if self.should_render_parallel(items, video_resolution, parallel_workers):
+                self.render_video_parallel(
+                    items, output_path, video_resolution, transition, transition_duration,
+                    custom_transitions if use_custom_transitions else None,
+                    parallel_workers, output_quality, progress)
+                self.cache_output(cache_key, output_path)
+                print(f"视频生成完成: {output_path}")
+                print("="*50 + "\n")
+                return output_path
+            
             # 创建每个片段
             print(f"正在处理 {len(items)} 个视频片段...")
             for i, item in enumerate(items):
@@ -308,12 +1453,11 @@ class VideoService:
                     # 需要先生成音频，这部分会在controller层实现
                     print(f"片段 {i+1} 有文本但无音频，将由控制器处理")
                 
-                clip = self.create_clip(item)
-                
-                # 如果指定了视频分辨率，调整所有片段的尺寸
+                # 如果指定了视频分辨率，片段直接按该分辨率渲染
+                # 音频稍后统一合成旁白音轨，片段不再各自打开音频解码器
+                clip = self.create_clip(item, video_resolution, attach_audio=False)
                 if video_resolution:
-                    clip = clip.resize(video_resolution)
-                    print(f"已调整片段 {i+1} 的分辨率为 {video_resolution[0]}x{video_resolution[1]}")
+                    print(f"片段 {i+1} 按分辨率 {video_resolution[0]}x{video_resolution[1]} 渲染")
                 
                 original_clips.append(clip)
                 clips.append(clip)
@@ -327,46 +1471,38 @@ class VideoService:
                 print(f"片段 {i+1} ({image_filename}) 创建完成，持续时间: {clip.duration:.2f}秒")
                 print(f"{'*'*30}\n")
             
-            # 应用过渡效果
-            if len(clips) > 1 and (transition or use_custom_transitions):
+            # 单个由ffmpeg原生渲染的片段：直接导出，视频流无需再次编码
+            if len(original_clips) == 1 and getattr(original_clips[0], 'segment_path', None):
+                audio_path = self.get_item_audio_path(items[0])
+                progress.set_stage('mux')
+                self.export_segment(original_clips[0], output_path, audio_path)
+                self.release_clip(original_clips[0])
+                self.cache_output(cache_key, output_path)
+                print(f"视频生成完成: {output_path}")
+                print("="*50 + "\n")
+                return output_path
+            
+            # 按时间表合成所有片段和转场，前一个片段的结尾帧在转场中直接复用
+            transition_names = custom_transitions if len(clips) > 1 and use_custom_transitions else []
+            if any(name != "无" for name in transition_names):
                 print("\n" + "-"*40)
-                print("开始应用转场效果...")
-                # 使用新的转场服务
-                if use_custom_transitions and custom_transitions:
-                    # 创建一个合成视频，其中包含定制的转场效果
-                    print(f"应用自定义转场效果: {custom_transitions}")
-                    final_clip = self.transition_service.create_composite_transition(
-                        clips, 
-                        transition, 
-                        transition_duration,
-                        custom_transitions
-                    )
-                else:
-                    # 应用常规的转场效果
-                    print(f"应用转场效果: {transition}，时长: {transition_duration}秒")
-                    clips = self.transition_service.apply_transitions_to_clips(
-                        clips, 
-                        transition, 
-                        transition_duration,
-                        use_custom_transitions,
-                        custom_transitions
-                    )
-                    
-                    # 将所有片段连接起来
-                    print("合并所有视频片段...")
-                    final_clip = concatenate_videoclips(clips, method="compose")
-                print(f"转场效果应用完成，最终视频时长: {final_clip.duration:.2f}秒")
-                print("-"*40 + "\n")
+                print(f"应用转场效果: {transition_names}，时长: {transition_duration}秒")
             else:
-                # 无转场效果，直接连接
                 print("合并所有视频片段（无转场）...")
-                final_clip = concatenate_videoclips(clips, method="compose")
+            compositor = TimelineCompositor(
+                clips,
+                [self.transition_service.get_blend_function(name) for name in transition_names],
+                transition_duration,
+                self.default_fps,
+                pool=FrameBufferPool() if self.frame_buffer_pooling else None
+            )
+            # 音频不经过moviepy混合，稍后按时间表单独合成旁白音轨
+            final_clip = compositor.to_clip(include_audio=False)
+            print(f"时间轴合成完成，最终视频时长: {final_clip.duration:.2f}秒")
             
             # 检查最后一个片段是否有音频，如果有，确保视频长度不会导致音频被截断
-            if len(original_clips) > 0 and original_clips[-1].audio is not None:
-                last_clip = original_clips[-1]
-                last_audio = last_clip.audio
-                
+            ffmpeg_params = None
+            if len(original_clips) > 0 and self.get_item_audio_path(items[-1]):
                 # 计算原始片段的总时长（不含转场）
                 original_duration = sum(clip.duration for clip in original_clips)
                 
@@ -382,13 +1518,9 @@ class VideoService:
                     print(f"延长视频以确保音频播放完整 (音频结束时间: {last_audio_end_time:.2f}s, 当前视频时长: {final_clip.duration:.2f}s)")
                     padding_duration = last_audio_end_time - final_clip.duration
                     
-                    # 获取最后一帧作为延长片段的图像
-                    last_frame = final_clip.get_frame(final_clip.duration - 0.1)
-                    padding_clip = ImageClip(last_frame).set_duration(padding_duration)
-                    
-                    # 将延长片段添加到视频末尾
-                    final_clip = concatenate_videoclips([final_clip, padding_clip], method="compose")
-                    print(f"视频已延长，新时长: {final_clip.duration:.2f}秒")
+                    # 由编码器重复最后一帧来延长视频，无需逐帧渲染静态的延长部分
+                    ffmpeg_params = ['-vf', f"tpad=stop_mode=clone:stop_duration={padding_duration:.3f}"]
+                    print(f"视频将由编码器延长 {padding_duration:.2f}秒")
             
             # 根据质量设置输出参数
             bitrate = None
@@ -403,15 +1535,37 @@ class VideoService:
             if bitrate:
                 print(f"使用比特率: {bitrate}")
             
-            # 写入视频文件
-            final_clip.write_videofile(
-                output_path,
-                codec='libx264',
-                audio_codec='aac',
-                bitrate=bitrate,
-                fps=self.default_fps,
-                threads=4
-            )
+            # 有音频时先写出纯视频流，再混入一次性合成的旁白音轨（流复制，不重新编码视频）
+            audio_items = [item for item in items if self.get_item_audio_path(item)]
+            audio_offsets = [start for item, start in zip(items, compositor.starts) if self.get_item_audio_path(item)]
+            work_dir = self.path_utils.get_temp_dir() / f"export_{uuid.uuid4().hex[:8]}" if audio_items else None
+            try:
+                if work_dir:
+                    os.makedirs(work_dir, exist_ok=True)
+                video_path = str(work_dir / "video.mp4") if work_dir else output_path
+                
+                # 写入视频文件
+                self.write_clip(
+                    final_clip,
+                    video_path,
+                    fps=self.default_fps,
+                    bitrate=bitrate,
+                    threads=4,
+                    ffmpeg_params=ffmpeg_params,
+                    encoder=encoder,
+                    encoder_options=encoder_options,
+                    progress=progress
+                )
+                
+                if work_dir:
+                    progress.set_stage('audio')
+                    audio_path = self.write_timeline_audio(audio_items, audio_offsets, str(work_dir / "audio.m4a"),
+                                                           duration=compositor.duration)
+                    progress.set_stage('mux')
+                    mux_audio(video_path, audio_path, output_path)
+            finally:
+                if work_dir:
+                    shutil.rmtree(work_dir, ignore_errors=True)
             
             print("清理临时资源...")
             # 释放资源
@@ -419,7 +1573,10 @@ class VideoService:
             for clip in clips:
                 if hasattr(clip, 'close'):
                     clip.close()
+            for clip in original_clips:
+                self.release_clip(clip)
             
+            self.cache_output(cache_key, output_path)
             print(f"视频生成完成: {output_path}")
             print("="*50 + "\n")
             
@@ -433,13 +1590,26 @@ class VideoService:
                         clip.close()
                     except:
                         pass
+            for clip in original_clips:
+                self.release_clip(clip)
             
             print(f"生成视频时出错: {str(e)}")
             traceback.print_exc()
             raise
     
-    def preview_clip(self, item: dict, output_filename: str) -> str:
-        """预览单个片段"""
+    def preview_clip(self, item: dict, output_filename: str,
+                     resolution: Optional[Tuple[int, int]] = None) -> str:
+        """
+        预览单个片段
+        
+        Args:
+            item: 项目
+            output_filename: 输出文件名
+            resolution: 输出分辨率，为None时保持图片原始尺寸
+            
+        Returns:
+            预览文件路径
+        """
         try:
             # 确保item中的路径是字符串
             preview_item = item.copy()
@@ -458,26 +1628,57 @@ class VideoService:
             if not output_filename:
                 output_filename = f"preview_{image_filename}_{uuid.uuid4()}.mp4"
             
-            # 创建片段
-            clip = self.create_clip(preview_item)
-            
             # 获取视频目录
             video_dir = self.path_utils.get_output_dir()
             os.makedirs(video_dir, exist_ok=True)
             output_path = video_dir / output_filename
             
+            # 相同的图片、音频和动画已经预览过时直接复用
+            preview_item = self.resolve_item(preview_item)
+            cache_key = None
+            if self.render_cache:
+                cache_key = self.render_cache.make_key({
+                    'kind': 'preview',
+                    'item': self.get_item_cache_parts(
+                        dict(preview_item, duration=self.get_item_duration(preview_item)), include_audio=True),
+                    'resolution': resolution,
+                    'fps': self.default_fps,
+                    'profile': self.get_encoder_profile(None, self.encoder, self.encoder_options)
+                })
+                if self.render_cache.get(cache_key, dest=output_path, link=False):
+                    print(f"预览命中渲染缓存: {output_path}")
+                    return str(output_path)
+            
+            # 创建片段
+            clip = self.create_clip(preview_item, resolution)
+            
+            # 无运动的片段直接按静态画面快速编码
+            audio_path = preview_item.get("audio_path") if clip.audio is not None else None
+            if self.is_static_item(preview_item):
+                self.write_still_video(clip.get_frame(0), clip.duration, str(output_path), audio_path)
+                clip.close()
+                self.cache_output(cache_key, str(output_path))
+                return str(output_path)
+            
+            # 由ffmpeg原生渲染的片段直接导出
+            if getattr(clip, 'segment_path', None):
+                self.export_segment(clip, str(output_path), audio_path)
+                self.release_clip(clip)
+                self.cache_output(cache_key, str(output_path))
+                return str(output_path)
+            
             # 写入预览文件
-            clip.write_videofile(
-                str(output_path), 
-                codec='libx264',
+            self.write_clip(
+                clip,
+                str(output_path),
                 fps=self.default_fps,
                 threads=min(4, os.cpu_count() or 2),
-                preset='medium',
-                audio_codec='aac' if clip.audio is not None else None
+                preset='medium'
             )
             
             # 关闭剪辑
             clip.close()
+            self.cache_output(cache_key, str(output_path))
             
             # 返回预览文件路径
             return str(output_path)
@@ -500,7 +1701,9 @@ class VideoService:
     
     def combine_videos(self, video_paths: List[str], output_path: str,
                       transition: str = "淡入淡出", transition_duration: float = 0.7,
-                      output_fps: Optional[int] = None, output_quality: str = "medium") -> str:
+                      output_fps: Optional[int] = None, output_quality: str = "medium",
+                      encoder: Optional[str] = None,
+                      progress_callback: Optional[Callable[[Dict], None]] = None) -> str:
         """
         将多段视频按顺序合并成一个视频，支持转场效果
         
@@ -511,12 +1714,17 @@ class VideoService:
             transition_duration: 转场持续时间（秒）
             output_fps: 输出视频帧率，None表示与第一个视频保持一致
             output_quality: 输出质量 (low, medium, high)
+            encoder: 编码后端 ('moviepy', 'ffmpeg_pipe')，默认使用 self.encoder
+            progress_callback: 进度回调，见 create_video
             
         Returns:
             生成的视频文件路径
         """
         if not video_paths:
             raise ValueError("没有提供要合并的视频")
+        validate_encoder_options(encoder or self.encoder, self.encoder_options)
+        progress = RenderProgress(progress_callback)
+        progress.set_stage('prepare')
         
         # 生成基于日期时间的视频文件名
         now = datetime.datetime.now()
@@ -548,29 +1756,23 @@ class VideoService:
             print(f"输出质量: {output_quality}")
             print("="*50 + "\n")
             
-            # 加载所有视频
+            # 先探测所有视频的时长和帧率（不打开解码器），文件缺失时在加载任何视频之前报错
             for i, video_path in enumerate(video_paths):
-                print(f"\n{'*'*30}")
-                print(f"加载视频 {i+1}/{len(video_paths)}...")
-                
                 if not os.path.exists(video_path):
                     raise FileNotFoundError(f"视频文件未找到: {video_path}")
-                
-                # 加载视频
-                video = VideoFileClip(video_path)
-                
-                # 获取视频文件名
-                video_filename = os.path.basename(video_path)
-                
-                print(f"视频 {i+1} ({video_filename}) 加载完成，持续时间: {video.duration:.2f}秒，帧率: {video.fps}")
+                info = self.media_probe.probe(video_path)
+                print(f"视频 {i+1} ({os.path.basename(video_path)}) 持续时间: {info.get('duration', 0):.2f}秒，"
+                      f"帧率: {info.get('fps')}")
                 
                 # 设置输出帧率（只有第一个视频需要）
-                if i == 0 and output_fps is None:
-                    output_fps = video.fps
+                if i == 0 and output_fps is None and info.get('fps'):
+                    output_fps = info['fps']
                     print(f"使用第一个视频的帧率作为输出帧率: {output_fps}")
-                
-                video_clips.append(video)
-                print(f"{'*'*30}\n")
+            
+            # 加载所有视频
+            for i, video_path in enumerate(video_paths):
+                print(f"加载视频 {i+1}/{len(video_paths)}...")
+                video_clips.append(VideoFileClip(video_path))
             
             # 如果指定了输出帧率，确保所有视频使用相同的帧率
             if output_fps:
@@ -618,13 +1820,14 @@ class VideoService:
                 print(f"使用比特率: {bitrate}")
             
             # 写入视频文件
-            final_clip.write_videofile(
+            self.write_clip(
+                final_clip,
                 output_path,
-                codec='libx264',
-                audio_codec='aac',
-                bitrate=bitrate,
                 fps=output_fps or self.default_fps,
-                threads=4
+                bitrate=bitrate,
+                threads=4,
+                encoder=encoder,
+                progress=progress
             )
             
             print("清理临时资源...")
@@ -649,4 +1852,47 @@ class VideoService:
             
             print(f"视频合并出错: {str(e)}")
             traceback.print_exc()
-            raise 
\ No newline at end of file
+            raise 
+
+
+# 分段渲染进程共享的已写入帧数计数器（由 render_segments 在创建进程池时传入）
+_segment_frame_counter = None
+# 分段渲染进程中的视频服务，每个进程只创建一次
+_segment_service: Optional[VideoService] = None
+
+
+def _init_segment_worker(frame_counter, render_settings: Dict) -> None:
+    """进程池初始化函数：保存共享的帧计数器，并按主进程的渲染设置创建视频服务"""
+    global _segment_frame_counter, _segment_service
+    _segment_frame_counter = frame_counter
+    _segment_service = VideoService.from_render_settings(render_settings)
+
+
+def _count_segment_frames(frames: int) -> None:
+    with _segment_frame_counter.get_lock():
+        _segment_frame_counter.value += frames
+
+
+def _render_segment_worker(segment: Dict, output_path: str, resolution: Optional[Tuple[int, int]],
+                           fps: int, bitrate: Optional[str], threads: Optional[int]) -> str:
+    """进程池工作函数：在独立进程中渲染一个时间轴分段"""
+    service = _segment_service
+    if _segment_frame_counter is None:
+        return service.render_segment(segment, output_path, resolution, fps, bitrate, threads)
+    
+    counted = [0]
+    
+    def count_frames(frames: int) -> None:
+        counted[0] += frames
+        _count_segment_frames(frames)
+    
+    service.frame_callback = count_frames
+    try:
+        result = service.render_segment(segment, output_path, resolution, fps, bitrate, threads)
+    finally:
+        service.frame_callback = None
+    # 由ffmpeg原生渲染或命中缓存的分段没有逐帧计数，完成时一次计入
+    start, end = segment['frame_range']
+    if end - start > counted[0]:
+        _count_segment_frames(end - start - counted[0])
+    return result
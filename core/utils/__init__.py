@@ -1,3 +1,26 @@
+import importlib
+
 from core.utils.path_utils import PathUtils
+from core.utils.ffmpeg_utils import FFmpegUtils
+from core.utils.media_probe import MediaProbe
+from core.utils.rate_limiter import RateLimiter
+from core.utils.system_resources import SystemResources
+
+# 依赖 numpy 的工具类按需导入（PEP 562）
+_lazy_exports = {
+    'FrameBufferPool': 'core.utils.frame_buffer_pool',
+}
+
+__all__ = ['PathUtils', 'FFmpegUtils', 'FrameBufferPool', 'MediaProbe', 'RateLimiter', 'SystemResources']
+
+
+def __getattr__(name):
+    if name in _lazy_exports:
+        value = getattr(importlib.import_module(_lazy_exports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ['PathUtils']
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_exports))
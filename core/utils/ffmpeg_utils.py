@@ -0,0 +1,55 @@
+import os
+import subprocess
+from pathlib import Path
+from typing import List, Union
+
+
+class FFmpegUtils:
+    """
+    FFmpeg工具类，统一ffmpeg可执行文件的查找和命令执行
+    """
+
+    @staticmethod
+    def get_ffmpeg_binary() -> str:
+        """获取ffmpeg可执行文件路径，与moviepy使用同一个ffmpeg"""
+        try:
+            from moviepy.config import get_setting
+            return get_setting("FFMPEG_BINARY")
+        except Exception:
+            return os.environ.get("FFMPEG_BINARY", "ffmpeg")
+
+    @staticmethod
+    def run(args: List[Union[str, Path]]) -> None:
+        """
+        执行ffmpeg命令
+
+        Args:
+            args: ffmpeg参数（不含可执行文件本身）
+
+        Raises:
+            RuntimeError: ffmpeg执行失败时抛出，包含错误输出
+        """
+        cmd = [FFmpegUtils.get_ffmpeg_binary(), '-y', '-hide_banner', '-loglevel', 'error']
+        cmd += [str(arg) for arg in args]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            error = result.stderr.decode('utf-8', errors='ignore').strip()
+            raise RuntimeError(f"ffmpeg执行失败: {error}")
+
+    @staticmethod
+    def write_concat_list(list_path: Path, file_paths: List[Union[str, Path]]) -> Path:
+        """
+        写入ffmpeg concat分离器使用的文件列表
+
+        Args:
+            list_path: 列表文件路径
+            file_paths: 需要拼接的文件路径列表
+
+        Returns:
+            列表文件路径
+        """
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for file_path in file_paths:
+                escaped = str(Path(file_path).resolve()).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        return list_path
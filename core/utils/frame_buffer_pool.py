@@ -0,0 +1,67 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class FrameBufferPool:
+    """
+    帧缓冲池，为逐帧渲染提供可重复使用的预分配缓冲区
+
+    每种形状维护一个固定大小的环形缓冲区，get() 依次返回其中的缓冲区，
+    稳定渲染时每帧不再分配新的数组。
+    返回的缓冲区在之后又有 slots 次同形状的 get() 时会被复用，
+    需要更长时间保留帧的调用方（如缓存帧）必须自行复制。
+    """
+
+    def __init__(self, slots: int = 4):
+        """
+        Args:
+            slots: 每种形状的缓冲区数量
+        """
+        self.slots = max(2, slots)
+        self._rings: Dict[Tuple[Tuple[int, ...], str], List[np.ndarray]] = {}
+        self._positions: Dict[Tuple[Tuple[int, ...], str], int] = {}
+
+    def get(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """
+        获取一个指定形状的缓冲区（内容未初始化）
+
+        Args:
+            shape: 数组形状
+            dtype: 数据类型
+
+        Returns:
+            预分配的缓冲区
+        """
+        key = (tuple(int(n) for n in shape), np.dtype(dtype).str)
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = []
+            self._positions[key] = 0
+        position = self._positions[key]
+        if len(ring) < self.slots:
+            ring.append(np.empty(key[0], dtype=dtype))
+            buffer = ring[-1]
+        else:
+            buffer = ring[position]
+        self._positions[key] = (position + 1) % self.slots
+        return buffer
+
+    def like(self, array: np.ndarray) -> np.ndarray:
+        """获取与 array 形状和类型相同的缓冲区"""
+        return self.get(array.shape, array.dtype)
+
+    def clear(self) -> None:
+        """释放所有缓冲区"""
+        self._rings.clear()
+        self._positions.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """缓冲池占用的内存（字节）"""
+        return sum(buffer.nbytes for ring in self._rings.values() for buffer in ring)
+
+
+def get_buffer(pool: Optional[FrameBufferPool], shape: Tuple[int, ...], dtype=np.uint8) -> Optional[np.ndarray]:
+    """从缓冲池获取缓冲区；没有缓冲池时返回None（由OpenCV/NumPy自行分配输出）"""
+    return pool.get(shape, dtype) if pool is not None else None
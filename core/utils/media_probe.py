@@ -0,0 +1,411 @@
+import atexit
+import json
+import os
+import struct
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .path_utils import PathUtils
+
+
+# MPEG音频帧头中的码率表（kbps），按 (版本, 层) 索引；版本 1 为MPEG1，2 为MPEG2/2.5
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# 查找MP3首帧和 Xing/Info/VBRI 头时读取的文件前缀大小（字节）
+MP3_PROBE_BYTES = 64 * 1024
+
+# 采样率表，按帧头中的版本位索引（0: MPEG2.5, 2: MPEG2, 3: MPEG1）
+MP3_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+
+class MediaProbe:
+    """
+    媒体探测：读取音视频的时长等元数据，不打开解码器
+
+    WAV 由 wave 模块读取文件头，MP3 由帧头（Xing/Info/VBRI 头或逐帧遍历）计算，
+    MP4 直接读取 moov 盒子（含样本表中的帧数和关键帧位置），其他格式调用一次ffmpeg解析。
+    结果按 路径+文件大小+修改时间 缓存在内存和磁盘索引中，
+    文件未变化时不再读取文件，进程重启后仍然有效。
+    """
+
+    # 直接读取 moov 盒子的容器格式
+    MP4_EXTENSIONS = ('.mp4', '.m4v', '.mov')
+
+    def __init__(self, index_path: Optional[Union[str, Path]] = None, max_entries: int = 10000,
+                 save_interval: float = 2.0):
+        """
+        Args:
+            index_path: 磁盘索引文件路径，默认为 data/cache/media_probe.json
+            max_entries: 索引最多保存的条目数，超出时丢弃最早写入的条目
+            save_interval: 两次写入磁盘索引的最小间隔（秒），进程退出时会写入剩余的修改
+        """
+        self.index_path = Path(index_path) if index_path else PathUtils.get_data_dir() / 'cache' / 'media_probe.json'
+        self.max_entries = max_entries
+        self.save_interval = save_interval
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    # === 公共接口 ===
+
+    def probe(self, path: Union[str, Path]) -> Dict:
+        """
+        获取媒体文件的元数据
+
+        Args:
+            path: 媒体文件路径
+
+        Returns:
+            元数据字典，至少包含 duration（秒）；音频包含 sample_rate、channels，
+            视频包含 fps、width、height，MP4 视频还包含 frames（帧数）和 keyframes（关键帧的帧序号）
+
+        Raises:
+            FileNotFoundError: 文件不存在时抛出
+        """
+        path = os.path.abspath(str(path))
+        stat = os.stat(path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        with self._lock:
+            entry = self._load().get(path)
+            if entry and entry.get('signature') == signature:
+                return dict(entry['info'])
+
+        info = self._probe_file(path)
+        with self._lock:
+            entries = self._load()
+            entries.pop(path, None)
+            entries[path] = {'signature': signature, 'info': info}
+            while len(entries) > self.max_entries:
+                entries.pop(next(iter(entries)))
+            self._dirty = True
+            if time.time() - self._last_save >= self.save_interval:
+                self._save()
+        return dict(info)
+
+    def get_duration(self, path: Union[str, Path]) -> float:
+        """
+        获取媒体文件时长（秒），无法解析时返回0
+
+        Args:
+            path: 媒体文件路径
+
+        Returns:
+            时长（秒）
+        """
+        try:
+            return float(self.probe(path).get('duration') or 0.0)
+        except Exception as e:
+            print(f"读取媒体时长失败: {path}: {str(e)}")
+            return 0.0
+
+    def flush(self) -> None:
+        """把未保存的修改写入磁盘索引"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def clear(self) -> None:
+        """清空内存和磁盘索引"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+            if self.index_path.exists():
+                os.remove(self.index_path)
+
+    # === 磁盘索引 ===
+
+    def _load(self) -> Dict[str, Dict]:
+        """首次使用时加载磁盘索引（调用方持有锁）"""
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                pass
+        return self._entries
+
+    def _save(self) -> None:
+        """原子地写入磁盘索引（调用方持有锁）"""
+        try:
+            os.makedirs(self.index_path.parent, exist_ok=True)
+            tmp_path = self.index_path.with_name(f"{self.index_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+        except OSError as e:
+            print(f"保存媒体探测索引失败: {str(e)}")
+        self._last_save = time.time()
+
+    # === 解析 ===
+
+    def _probe_file(self, path: str) -> Dict:
+        """按扩展名选择解析方式，直接解析失败时回退到ffmpeg"""
+        ext = os.path.splitext(path)[1].lower()
+        try:
+            if ext == '.wav':
+                return self._probe_wav(path)
+            if ext == '.mp3':
+                info = self._probe_mp3(path)
+                if info:
+                    return info
+            if ext in self.MP4_EXTENSIONS:
+                info = self._probe_mp4(path)
+                if info:
+                    return info
+        except (wave.Error, EOFError, OSError, ValueError, IndexError, struct.error):
+            pass
+        return self._probe_ffmpeg(path)
+
+    @staticmethod
+    def _probe_wav(path: str) -> Dict:
+        """读取WAV文件头"""
+        with wave.open(path, 'rb') as wav:
+            sample_rate = wav.getframerate()
+            return {
+                'format': 'wav',
+                'duration': wav.getnframes() / sample_rate if sample_rate else 0.0,
+                'sample_rate': sample_rate,
+                'channels': wav.getnchannels(),
+            }
+
+    @staticmethod
+    def _parse_mp3_header(data: bytes, pos: int) -> Optional[Dict]:
+        """解析 pos 处的MPEG音频帧头，不是有效帧头时返回None"""
+        if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+            return None
+        header = int.from_bytes(data[pos:pos + 4], 'big')
+        version_bits = (header >> 19) & 0x3
+        layer = 4 - ((header >> 17) & 0x3)
+        bitrate_index = (header >> 12) & 0xF
+        sample_rate_index = (header >> 10) & 0x3
+        if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+            return None
+
+        version = 1 if version_bits == 3 else 2
+        bitrate = MP3_BITRATES[(version, layer)][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version_bits][sample_rate_index]
+        padding = (header >> 9) & 0x1
+        channels = 1 if ((header >> 6) & 0x3) == 3 else 2
+
+        if layer == 1:
+            samples = 384
+            length = (12 * bitrate // sample_rate + padding) * 4
+        else:
+            samples = 1152 if layer == 2 or version == 1 else 576
+            length = samples // 8 * bitrate // sample_rate + padding
+        return {'version': version, 'layer': layer, 'sample_rate': sample_rate,
+                'channels': channels, 'samples': samples, 'length': length}
+
+    @classmethod
+    def _probe_mp3(cls, path: str) -> Optional[Dict]:
+        """
+        由帧头计算MP3时长
+
+        优先读取首帧中的 Xing/Info/VBRI 头得到总帧数，否则逐帧跳读帧头累加采样数，
+        都不需要把整个文件读入内存。
+        """
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+
+            # 跳过ID3v2标签
+            pos = 0
+            tag_header = f.read(10)
+            if tag_header[:3] == b'ID3' and len(tag_header) >= 10:
+                pos = 10 + ((tag_header[6] & 0x7F) << 21 | (tag_header[7] & 0x7F) << 14 |
+                            (tag_header[8] & 0x7F) << 7 | (tag_header[9] & 0x7F))
+                if tag_header[5] & 0x10:
+                    pos += 10
+
+            # 只读取一段前缀，找到第一个有效帧（下一帧头也有效，避免误判）
+            f.seek(pos)
+            data = f.read(MP3_PROBE_BYTES)
+            offset = 0
+            first = None
+            while offset < len(data) - 4:
+                first = cls._parse_mp3_header(data, offset)
+                if first:
+                    next_offset = offset + first['length']
+                    if pos + next_offset >= size or next_offset + 4 > len(data) or \
+                            cls._parse_mp3_header(data, next_offset):
+                        break
+                first = None
+                offset += 1
+            if first is None:
+                return None
+
+            info = {'format': 'mp3', 'sample_rate': first['sample_rate'], 'channels': first['channels']}
+
+            # Xing/Info 头位于边信息之后，VBRI 头固定在帧头后32字节
+            side_info = (32 if first['channels'] == 2 else 17) if first['version'] == 1 else \
+                (17 if first['channels'] == 2 else 9)
+            tag = offset + 4 + side_info
+            frame_count = None
+            if data[tag:tag + 4] in (b'Xing', b'Info') and int.from_bytes(data[tag + 4:tag + 8], 'big') & 0x1:
+                frame_count = int.from_bytes(data[tag + 8:tag + 12], 'big')
+            elif data[offset + 36:offset + 40] == b'VBRI':
+                frame_count = int.from_bytes(data[offset + 50:offset + 54], 'big')
+            if frame_count:
+                info['duration'] = frame_count * first['samples'] / first['sample_rate']
+                return info
+
+            # 没有总帧数时逐帧跳读帧头累加采样数
+            pos += offset
+            total_samples = 0
+            while pos + 4 <= size:
+                f.seek(pos)
+                frame = cls._parse_mp3_header(f.read(4), 0)
+                if frame is None or frame['length'] <= 0:
+                    break
+                total_samples += frame['samples']
+                pos += frame['length']
+            info['duration'] = total_samples / first['sample_rate']
+            return info
+
+    @staticmethod
+    def _mp4_boxes(f, start: int, end: int):
+        """遍历 [start, end) 范围内的MP4盒子，产生 (类型, 内容起点, 盒子终点)"""
+        pos = start
+        while pos + 8 <= end:
+            f.seek(pos)
+            size, kind = struct.unpack('>I4s', f.read(8))
+            header = 8
+            if size == 1:
+                size = struct.unpack('>Q', f.read(8))[0]
+                header = 16
+            elif size == 0:
+                size = end - pos
+            if size < header:
+                return
+            yield kind, pos + header, pos + size
+            pos += size
+
+    @classmethod
+    def _find_mp4_box(cls, f, start: int, end: int, path: List[bytes]) -> Optional[tuple]:
+        """按路径（如 [b'mdia', b'minf']）查找嵌套的盒子，返回 (内容起点, 终点)"""
+        for kind, box_start, box_end in cls._mp4_boxes(f, start, end):
+            if kind == path[0]:
+                if len(path) == 1:
+                    return box_start, box_end
+                return cls._find_mp4_box(f, box_start, box_end, path[1:])
+        return None
+
+    @staticmethod
+    def _read_mp4_times(f, start: int) -> tuple:
+        """读取 mvhd/mdhd 盒子中的 (时间刻度, 时长)，两者的版本0和版本1布局不同"""
+        f.seek(start)
+        version = f.read(1)[0]
+        if version == 1:
+            f.seek(start + 20)
+            return struct.unpack('>IQ', f.read(12))
+        f.seek(start + 12)
+        return struct.unpack('>II', f.read(8))
+
+    @classmethod
+    def _probe_mp4(cls, path: str) -> Optional[Dict]:
+        """
+        直接读取MP4的 moov 盒子：时长（mvhd）、视频的帧率、尺寸、帧数和关键帧，以及音频采样率
+
+        帧率由视频轨的时间刻度和每帧时长（stts）计算，可变帧率时取平均值；
+        封闭GOP的关键帧之前解码的帧都在它之前显示，关键帧的解码序号即显示序号。
+        没有 moov 或样本表为空（如分片MP4）时返回None，由ffmpeg解析。
+        """
+        with open(path, 'rb') as f:
+            moov = cls._find_mp4_box(f, 0, os.fstat(f.fileno()).st_size, [b'moov'])
+            if moov is None:
+                return None
+            mvhd = cls._find_mp4_box(f, *moov, [b'mvhd'])
+            if mvhd is None:
+                return None
+            timescale, duration = cls._read_mp4_times(f, mvhd[0])
+            if not timescale:
+                return None
+            info = {'format': 'mp4', 'duration': duration / timescale}
+
+            for kind, trak_start, trak_end in cls._mp4_boxes(f, *moov):
+                if kind != b'trak':
+                    continue
+                hdlr = cls._find_mp4_box(f, trak_start, trak_end, [b'mdia', b'hdlr'])
+                mdhd = cls._find_mp4_box(f, trak_start, trak_end, [b'mdia', b'mdhd'])
+                stbl = cls._find_mp4_box(f, trak_start, trak_end, [b'mdia', b'minf', b'stbl'])
+                if hdlr is None or mdhd is None or stbl is None:
+                    continue
+                f.seek(hdlr[0] + 8)
+                handler = f.read(4)
+                stsd = cls._find_mp4_box(f, *stbl, [b'stsd'])
+                if stsd is None:
+                    continue
+
+                if handler == b'soun' and 'sample_rate' not in info:
+                    # 音频样本描述：采样率为16.16定点数，位于条目起点后32字节
+                    f.seek(stsd[0] + 8 + 32)
+                    info['sample_rate'] = struct.unpack('>I', f.read(4))[0] >> 16
+                elif handler == b'vide' and 'fps' not in info:
+                    # 视频样本描述：宽高位于条目起点后32字节
+                    f.seek(stsd[0] + 8 + 32)
+                    info['width'], info['height'] = struct.unpack('>HH', f.read(4))
+
+                    stsz = cls._find_mp4_box(f, *stbl, [b'stsz'])
+                    stts = cls._find_mp4_box(f, *stbl, [b'stts'])
+                    if stsz is None or stts is None:
+                        return None
+                    f.seek(stsz[0] + 8)
+                    frames = struct.unpack('>I', f.read(4))[0]
+                    if not frames:
+                        return None
+                    track_timescale, _ = cls._read_mp4_times(f, mdhd[0])
+                    f.seek(stts[0] + 4)
+                    count = struct.unpack('>I', f.read(4))[0]
+                    entries = struct.unpack(f'>{2 * count}I', f.read(8 * count))
+                    total_ticks = sum(entries[i] * entries[i + 1] for i in range(0, len(entries), 2))
+                    if not track_timescale or not total_ticks:
+                        return None
+                    if count == 1:
+                        fps = track_timescale / entries[1]
+                    else:
+                        fps = frames * track_timescale / total_ticks
+                    info['fps'] = fps
+                    info['frames'] = frames
+
+                    stss = cls._find_mp4_box(f, *stbl, [b'stss'])
+                    if stss is None:
+                        # 没有关键帧表时每一帧都是关键帧
+                        info['keyframes'] = list(range(frames))
+                    else:
+                        f.seek(stss[0] + 4)
+                        count = struct.unpack('>I', f.read(4))[0]
+                        info['keyframes'] = [number - 1 for number in
+                                             struct.unpack(f'>{count}I', f.read(4 * count))]
+            return info
+
+    @staticmethod
+    def _probe_ffmpeg(path: str) -> Dict:
+        """调用一次ffmpeg解析媒体信息（其他格式或文件头无法直接解析时）"""
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+        infos = ffmpeg_parse_infos(path)
+        info = {'format': 'ffmpeg', 'duration': float(infos.get('duration') or 0.0)}
+        if infos.get('video_found'):
+            info['fps'] = infos.get('video_fps')
+            info['width'], info['height'] = infos.get('video_size') or (None, None)
+        if infos.get('audio_found'):
+            info['sample_rate'] = infos.get('audio_fps')
+        return info
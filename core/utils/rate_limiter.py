@@ -0,0 +1,44 @@
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    线程安全的速率限制器：多个线程共享，保证请求按不超过指定速率依次放行
+
+    每次 acquire() 预约下一个可用时间点并等待到该时间，
+    空闲一段时间后最多允许 burst 个请求立即通过。
+    """
+
+    def __init__(self, rate: Optional[float], burst: int = 1):
+        """
+        Args:
+            rate: 每秒最多放行的请求数，None或不大于0时不限速
+            burst: 空闲后允许立即通过的请求数
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        等待直到可以发出下一个请求
+
+        Returns:
+            实际等待的时间（秒）
+        """
+        if not self.rate or self.rate <= 0:
+            return 0.0
+        interval = 1.0 / self.rate
+        with self._lock:
+            now = time.monotonic()
+            # 空闲时最多积累 burst 个请求的额度
+            slot = max(self._next, now - (self.burst - 1) * interval)
+            self._next = slot + interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+            return wait
+        return 0.0
@@ -0,0 +1,82 @@
+import os
+from typing import Optional
+
+
+class SystemResources:
+    """
+    系统资源工具类：获取当前进程可用的CPU核心数和内存，并据此估算可同时执行的渲染任务数
+
+    在容器中运行时优先使用 cgroup 的CPU和内存限制。
+    """
+
+    @staticmethod
+    def cpu_count() -> int:
+        """当前进程可用的CPU核心数（考虑CPU亲和性和 cgroup 配额）"""
+        try:
+            count = len(os.sched_getaffinity(0))
+        except (AttributeError, OSError):
+            count = os.cpu_count() or 1
+        # cgroup v2 的CPU配额，格式为 "<quota> <period>" 或 "max <period>"
+        try:
+            with open('/sys/fs/cgroup/cpu.max') as f:
+                quota, period = f.read().split()[:2]
+            if quota != 'max':
+                count = min(count, max(1, int(int(quota) / int(period))))
+        except (OSError, ValueError):
+            pass
+        return max(1, count)
+
+    @staticmethod
+    def total_memory() -> Optional[int]:
+        """当前进程可用的物理内存（字节），无法获取时返回None"""
+        try:
+            total = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+        except (AttributeError, ValueError, OSError):
+            total = None
+        # cgroup v2 的内存限制
+        try:
+            with open('/sys/fs/cgroup/memory.max') as f:
+                limit = f.read().strip()
+            if limit != 'max':
+                total = min(total, int(limit)) if total else int(limit)
+        except (OSError, ValueError):
+            pass
+        return total
+
+    @staticmethod
+    def process_rss(pid: Optional[int] = None) -> Optional[int]:
+        """
+        进程当前占用的物理内存（字节）
+
+        Args:
+            pid: 进程ID，None表示当前进程
+
+        Returns:
+            常驻内存大小，无法获取时（非Linux系统）返回None
+        """
+        try:
+            with open(f"/proc/{pid or 'self'}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+        return None
+
+    @staticmethod
+    def render_slots(cores_per_slot: float = 4, memory_per_slot_mb: float = 1536) -> int:
+        """
+        估算可同时执行的渲染任务数
+
+        Args:
+            cores_per_slot: 每个渲染任务占用的CPU核心数
+            memory_per_slot_mb: 每个渲染任务占用的内存（MB）
+
+        Returns:
+            渲染任务数（至少为1）
+        """
+        slots = SystemResources.cpu_count() // max(1, cores_per_slot)
+        total = SystemResources.total_memory()
+        if total and memory_per_slot_mb > 0:
+            slots = min(slots, total // int(memory_per_slot_mb * 1024 * 1024))
+        return max(1, int(slots))
@@ -1,14 +1,16 @@
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional
 from pathlib import Path
 import os
 
-from core.services.audio_service import AudioService
 from core.models.image_item import ImageItem
 
+if TYPE_CHECKING:
+    from core.services.audio_service import AudioService
+
 class AudioController:
     """音频控制器，处理音频生成相关的业务逻辑"""
     
-    def __init__(self, audio_service: AudioService):
+    def __init__(self, audio_service: 'AudioService'):
         """
         初始化音频控制器
         
@@ -52,43 +54,59 @@ class AudioController:
             print(f"生成音频失败: {str(e)}")
             return False
     
-    def batch_generate_audio(self, items: List[ImageItem]) -> Dict[str, bool]:
+    def batch_generate_audio(self, items: List[ImageItem],
+                             progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, bool]:
         """
-        批量生成音频
+        批量生成音频（多个项目并发合成）
         
         Args:
             items: 图片项目列表
+            progress_callback: 每个项目完成时调用 progress_callback(已完成数, 总数)
             
         Returns:
             字典，键为项目ID，值为是否成功生成音频
         """
-        results = {}
+        results = {item.id: False for item in items}
+        items = [item for item in items if item.text.strip()]
+        if not items:
+            return results
+        
+        requests = [{
+            'text': item.text,
+            # 默认文件名使用ID，优先使用图片名称
+            'filename': f"{item.id}.mp3",
+            'image_path': str(item.image_path)
+        } for item in items]
+        
+        def on_progress(completed, total, index, audio_path):
+            if progress_callback:
+                progress_callback(completed, total)
+        
+        audio_paths = self.audio_service.batch_generate_speech(requests, on_progress)
+        for item, audio_path in zip(items, audio_paths):
+            if audio_path:
+                item.audio_path = Path(audio_path)
+            results[item.id] = audio_path is not None
         
-        for item in items:
-            success = self.generate_audio_for_item(item)
-            results[item.id] = success
-            
         return results
     
-    def check_and_generate_missing_audio(self, items: List[ImageItem]) -> Dict[str, bool]:
+    def check_and_generate_missing_audio(self, items: List[ImageItem],
+                                         progress_callback: Optional[Callable[[int, int], None]] = None
+                                         ) -> Dict[str, bool]:
         """
         检查并生成缺失的音频
         
         Args:
             items: 图片项目列表
+            progress_callback: 每个项目完成时调用 progress_callback(已完成数, 总数)
             
         Returns:
             字典，键为项目ID，值为是否成功生成音频
         """
-        results = {}
-        
-        for item in items:
-            # 检查是否有文本但没有音频或音频不存在
-            if item.text.strip() and (not item.audio_path or not item.audio_path.exists()):
-                success = self.generate_audio_for_item(item)
-                results[item.id] = success
-        
-        return results
+        # 检查是否有文本但没有音频或音频不存在
+        missing = [item for item in items
+                   if item.text.strip() and (not item.audio_path or not item.audio_path.exists())]
+        return self.batch_generate_audio(missing, progress_callback)
     
     def preview_audio(self, item: ImageItem) -> bool:
         """
@@ -1,17 +1,21 @@
-from typing import List, Dict, Optional, Union, Tuple
+from typing import TYPE_CHECKING, List, Dict, Optional, Union, Tuple
 from pathlib import Path
 import os
+import json
+import hashlib
 
-from core.services.video_service import VideoService
-from core.services.audio_service import AudioService
 from core.models.image_item import ImageItem
 from core.utils.path_utils import PathUtils
 from desktop.controllers.audio_controller import AudioController
 
+if TYPE_CHECKING:
+    from core.services.video_service import VideoService
+    from core.services.audio_service import AudioService
+
 class VideoController:
     """视频控制器，处理视频生成相关的业务逻辑"""
     
-    def __init__(self, video_service: VideoService, audio_service: AudioService):
+    def __init__(self, video_service: 'VideoService', audio_service: 'AudioService'):
         """
         初始化视频控制器
         
@@ -26,94 +30,140 @@ class VideoController:
         
         # 存储最近生成的视频路径
         self.last_video_path = None
-        # 存储已生成的片段，格式：{图片路径: 视频片段路径}
+        # 存储已生成的片段，格式：{片段内容键: 视频片段路径}
         self.generated_clips = {}
+        # 片段的默认分辨率：与最近一次导出的分辨率一致，预览生成的片段可以在导出时直接复用
+        self.clip_resolution = None
+    
+    def _get_clip_key(self, item: ImageItem, resolution: Optional[Tuple[int, int]] = None) -> str:
+        """
+        根据决定片段内容的全部输入生成片段键
+        
+        图片、音频（路径、大小和修改时间）、时长、动画设置、分辨率和片段编码方式任意一项变化，
+        都会得到不同的键，旧片段自然失效。
+        
+        Args:
+            item: 图片项目
+            resolution: 片段分辨率，为None时保持图片原始尺寸
+            
+        Returns:
+            片段键（12位十六进制）
+        """
+        def file_signature(path):
+            if not path or not os.path.exists(str(path)):
+                return None
+            stat = os.stat(str(path))
+            return [os.path.abspath(str(path)), stat.st_size, stat.st_mtime_ns]
+        
+        content = {
+            'image': file_signature(item.image_path),
+            'audio': file_signature(item.audio_path),
+            'duration': item.duration,
+            'animation': item.animation,
+            'resolution': list(resolution) if resolution else None,
+            'profile': self.video_service.get_clip_file_profile()
+        }
+        canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
     
-    def _get_clip_filename(self, item: ImageItem) -> str:
+    def _get_clip_filename(self, item: ImageItem, resolution: Optional[Tuple[int, int]] = None) -> str:
         """
-        根据图片生成统一的片段文件名
+        根据图片和片段内容键生成统一的片段文件名
         
         Args:
             item: 图片项目
+            resolution: 片段分辨率
             
         Returns:
             生成的文件名
         """
         image_filename = os.path.splitext(os.path.basename(str(item.image_path)))[0]
-        return f"{image_filename}_clip.mp4"
+        return f"{image_filename}_{self._get_clip_key(item, resolution)}_clip.mp4"
     
-    def _get_clip_filepath(self, item: ImageItem) -> str:
+    def _get_clip_filepath(self, item: ImageItem, resolution: Optional[Tuple[int, int]] = None) -> str:
         """
         获取片段的完整文件路径
         
         Args:
             item: 图片项目
+            resolution: 片段分辨率
             
         Returns:
             片段文件的完整路径
         """
-        filename = self._get_clip_filename(item)
+        filename = self._get_clip_filename(item, resolution)
         return str(self.path_utils.get_output_dir() / filename)
     
-    def is_clip_generated(self, item: ImageItem) -> bool:
+    def get_generated_clip(self, item: ImageItem, resolution: Optional[Tuple[int, int]] = None) -> Optional[str]:
         """
-        检查片段是否已经生成
+        获取与项目当前内容一致的已生成片段
         
         Args:
             item: 图片项目
+            resolution: 片段分辨率，为None时使用 clip_resolution
             
         Returns:
-            如果片段已生成则返回True，否则返回False
+            片段文件路径，未生成时返回None
         """
-        # 获取图片路径的字符串表示
-        image_path_str = str(item.image_path)
+        resolution = resolution or self.clip_resolution
+        clip_key = self._get_clip_key(item, resolution)
         
         # 检查缓存中是否有该片段
-        if image_path_str in self.generated_clips:
-            clip_path = self.generated_clips[image_path_str]
-            if os.path.exists(clip_path):
-                return True
+        clip_path = self.generated_clips.get(clip_key)
+        if clip_path and os.path.exists(clip_path):
+            return clip_path
         
         # 检查文件系统中是否存在该片段
-        clip_path = self._get_clip_filepath(item)
+        clip_path = self._get_clip_filepath(item, resolution)
         if os.path.exists(clip_path):
-            # 存在则更新缓存并返回True
-            self.generated_clips[image_path_str] = clip_path
-            return True
+            # 存在则更新缓存
+            self.generated_clips[clip_key] = clip_path
+            return clip_path
+        
+        return None
+    
+    def is_clip_generated(self, item: ImageItem, resolution: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        检查片段是否已经生成
+        
+        Args:
+            item: 图片项目
+            resolution: 片段分辨率
             
-        return False
+        Returns:
+            如果片段已生成则返回True，否则返回False
+        """
+        return self.get_generated_clip(item, resolution) is not None
     
-    def generate_clip(self, item: ImageItem) -> str:
+    def generate_clip(self, item: ImageItem, resolution: Optional[Tuple[int, int]] = None) -> str:
         """
         生成单个视频片段，如已存在则直接返回
         
         Args:
             item: 图片项目
+            resolution: 片段分辨率，为None时使用 clip_resolution（未导出过时保持图片原始尺寸）
             
         Returns:
             生成的视频片段路径
         """
+        resolution = resolution or self.clip_resolution
         try:
-            # 获取图片路径的字符串表示
-            image_path_str = str(item.image_path)
-            
-            # 检查是否已生成该片段
-            if self.is_clip_generated(item):
-                print(f"片段已存在，直接使用: {self.generated_clips[image_path_str]}")
-                return self.generated_clips[image_path_str]
-            
-            # 检查并生成音频（如果有文本但没有音频）
+            # 检查并生成音频（如果有文本但没有音频），音频是片段内容键的一部分
             if item.text.strip() and not item.has_audio:
                 self.audio_controller.generate_audio_for_item(item)
             
-            # 生成以图片名称为基础的输出文件名
-            output_filename = self._get_clip_filename(item)
+            # 检查是否已生成该片段
+            clip_path = self.get_generated_clip(item, resolution)
+            if clip_path:
+                print(f"片段已存在，直接使用: {clip_path}")
+                return clip_path
             
-            # 生成视频片段
-            output_path = self.video_service.preview_clip(item.to_dict(), output_filename)
+            # 生成以图片名称和内容键为基础的输出文件，导出完整视频时作为 clip_path 直接复用
+            output_path = self.video_service.render_clip_file(
+                item.to_dict(), self._get_clip_filepath(item, resolution), resolution)
             
             # 缓存生成的片段路径
-            self.generated_clips[image_path_str] = output_path
+            self.generated_clips[self._get_clip_key(item, resolution)] = output_path
             
             return output_path
             
@@ -132,14 +182,9 @@ class VideoController:
             是否成功播放
         """
         try:
-            # 检查是否已生成该片段
-            if not self.is_clip_generated(item):
-                # 没有生成则先生成片段
-                clip_path = self.generate_clip(item)
-            else:
-                # 已生成则直接获取路径
-                clip_path = self.generated_clips[str(item.image_path)]
-                
+            # 已生成则直接使用，否则先生成片段
+            clip_path = self.generate_clip(item)
+            
             # 使用默认播放器预览
             return self.video_service.open_with_default_player(clip_path)
             
@@ -167,15 +212,24 @@ class VideoController:
             # 检查并生成缺失的音频
             self._ensure_audio_for_items(items)
             
-            # 检查并生成缺失的片段
-            self._ensure_clips_for_items(items)
+            # 检查并生成缺失的片段（按最终输出分辨率），之后预览的片段也使用该分辨率
+            resolution = settings.get("video_resolution", None)
+            self.clip_resolution = resolution
+            self._ensure_clips_for_items(items, resolution)
             
             # 创建输出目录
             output_dir = self.path_utils.get_output_dir()
             
+            # 最终视频直接由已生成的片段文件组装，只重新渲染转场部分
+            video_items = []
+            for item in items:
+                item_dict = item.to_dict()
+                item_dict["clip_path"] = self.get_generated_clip(item, resolution)
+                video_items.append(item_dict)
+            
             # 生成视频
             output_path = self.video_service.create_video(
-                [item.to_dict() for item in items],
+                video_items,
                 str(output_dir / "final_video.mp4"),
                 settings["transition"],
                 settings["transition_duration"],
@@ -229,17 +283,18 @@ class VideoController:
         # 使用音频控制器检查并生成缺失的音频
         self.audio_controller.check_and_generate_missing_audio(items)
     
-    def _ensure_clips_for_items(self, items: List[ImageItem]) -> None:
+    def _ensure_clips_for_items(self, items: List[ImageItem], resolution: Optional[Tuple[int, int]] = None) -> None:
         """
         确保所有项目都有对应的视频片段，如不存在则自动生成
         
         Args:
             items: 图片项目列表
+            resolution: 片段分辨率
         """
         for i, item in enumerate(items):
-            if not self.is_clip_generated(item):
+            if not self.is_clip_generated(item, resolution):
                 print(f"正在生成缺失的片段 {i+1}/{len(items)}...")
-                self.generate_clip(item)
+                self.generate_clip(item, resolution)
             else:
                 print(f"片段 {i+1}/{len(items)} 已存在，跳过生成")
         
@@ -261,6 +316,4 @@ class VideoController:
         # 应用到item
         item.animation = animation_settings
         
-        # 动画设置更改后，将相应的已生成片段标记为无效
-        if str(item.image_path) in self.generated_clips:
-            del self.generated_clips[str(item.image_path)] 
\ No newline at end of file
+        # 动画设置是片段内容键的一部分，更改后旧片段自然不再被使用 
\ No newline at end of file
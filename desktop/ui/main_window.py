@@ -20,10 +20,7 @@ import datetime
 
 # 导入核心模块
 from core.models.image_item import ImageItem
-from core.services.audio_service import AudioService
-from core.services.video_service import VideoService
-from core.services.animation_service import AnimationService
-from core.services.transition_service import TransitionService
+from core.services.container import ServiceContainer
 from core.utils.path_utils import PathUtils
 
 # 导入控制器
@@ -46,12 +43,11 @@ class AudioGenerationThread(QThread):
     
     def run(self):
         try:
-            # 批量生成语音
-            results = self.audio_controller.batch_generate_audio(self.items)
-            
-            # 发出进度信号
-            completed = sum(1 for success in results.values() if success)
-            self.progress.emit(completed)
+            # 批量生成语音，每完成一个项目发出一次进度信号（没有文本的项目直接计为完成）
+            skipped = sum(1 for item in self.items if not item.text.strip())
+            self.progress.emit(skipped)
+            self.audio_controller.batch_generate_audio(
+                self.items, lambda completed, total: self.progress.emit(skipped + completed))
             
             self.finished.emit(True)
         except Exception as e:
@@ -67,15 +63,14 @@ class MainWindow(QMainWindow):
         # 初始化数据
         self.image_items: List[ImageItem] = []
         
-        # 初始化服务
-        self.animation_service = AnimationService()
-        self.transition_service = TransitionService()
-        self.audio_service = AudioService()
-        self.video_service = VideoService()
-        
-        # 初始化控制器
-        self.audio_controller = AudioController(self.audio_service)
-        self.video_controller = VideoController(self.video_service, self.audio_service)
+        # 初始化服务和控制器：依赖 moviepy、OpenCV 的服务在第一次使用时才创建，窗口可以立即显示
+        self.services = ServiceContainer()
+        self.services.register('animation', 'core.services.animation_service:AnimationService')
+        self.services.register('transition', 'core.services.transition_service:TransitionService')
+        self.services.register('audio', 'core.services.audio_service:AudioService')
+        self.services.register('video', 'core.services.video_service:VideoService')
+        self.services.register('audio_controller', lambda: AudioController(self.audio_service))
+        self.services.register('video_controller', lambda: VideoController(self.video_service, self.audio_service))
         
         # 创建主窗口部件
         main_widget = QWidget()
@@ -130,6 +125,30 @@ class MainWindow(QMainWindow):
         # 状态栏
         self.statusBar().showMessage("就绪")
     
+    @property
+    def animation_service(self):
+        return self.services.get('animation')
+    
+    @property
+    def transition_service(self):
+        return self.services.get('transition')
+    
+    @property
+    def audio_service(self):
+        return self.services.get('audio')
+    
+    @property
+    def video_service(self):
+        return self.services.get('video')
+    
+    @property
+    def audio_controller(self) -> AudioController:
+        return self.services.get('audio_controller')
+    
+    @property
+    def video_controller(self) -> VideoController:
+        return self.services.get('video_controller')
+    
     def add_images(self):
         """添加图片"""
         files, _ = QFileDialog.getOpenFileNames(
@@ -350,9 +369,9 @@ class MainWindow(QMainWindow):
             self.disable_ui_during_processing(True)
             
             # 检查是否已生成该片段
-            if self.video_controller.is_clip_generated(item):
+            clip_path = self.video_controller.get_generated_clip(item)
+            if clip_path:
                 # 如果已生成，显示使用已有片段的消息
-                clip_path = self.video_controller.generated_clips[str(item.image_path)]
                 self.statusBar().showMessage(f"使用已生成的片段：{clip_path}")
             else:
                 # 如果未生成，则生成新片段
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+动画变换基准测试
+
+对比旧的两次warpAffine（先缩放、再平移）与合成仿射矩阵的单次warpAffine，
+报告每个"缩放+平移"预设的帧率与画面差异（PSNR）。
+重采样次数减半，理论加速比为2x，判定时允许5%的计时误差。
+
+用法:
+    python scripts/bench_animation.py [--width 1920] [--height 1080] [--frames 90] [--repeat 3]
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from core.services.animation_service import AnimationService
+
+
+# 判定阈值
+SPEEDUP_TOLERANCE = 0.05
+MIN_PSNR = 35.0
+
+
+def legacy_transform(frame, scale, x, y):
+    """旧实现：分别执行缩放和位移两次warpAffine"""
+    h, w = frame.shape[:2]
+    if x != 0 or y != 0:
+        border_scale = max(1.0, 1.0 + 2 * abs(x), 1.0 + 2 * abs(y))
+        effective_scale = scale * border_scale
+    else:
+        effective_scale = scale
+    M_scale = np.float32([
+        [effective_scale, 0, w * (1 - effective_scale) / 2],
+        [0, effective_scale, h * (1 - effective_scale) / 2]
+    ])
+    M_translate = np.float32([
+        [1, 0, x * w],
+        [0, 1, y * h]
+    ])
+    if scale != 1.0:
+        frame = cv2.warpAffine(frame, M_scale, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
+    if x != 0 or y != 0:
+        frame = cv2.warpAffine(frame, M_translate, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
+    return frame
+
+
+def fused_transform(animation_service, frame, scale, x, y):
+    """新实现：合成仿射矩阵，单次warpAffine"""
+    h, w = frame.shape[:2]
+    if scale == 1.0 and x == 0 and y == 0:
+        return frame
+    M = animation_service.compose_affine_matrix(w, h, scale, x, y)
+    return cv2.warpAffine(frame, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REFLECT)
+
+
+def load_test_image(width, height):
+    """加载测试图片，不存在时生成带纹理的随机图像"""
+    image_path = Path(__file__).parent.parent / 'api' / 'test_images' / 'test.jpg'
+    image = cv2.imread(str(image_path)) if image_path.exists() else None
+    if image is None:
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return cv2.resize(image, (width, height), interpolation=cv2.INTER_CUBIC)
+
+
+def psnr(a, b):
+    """计算两帧之间的峰值信噪比"""
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    if mse == 0:
+        return float('inf')
+    return 10 * np.log10(255.0 ** 2 / mse)
+
+
+def frame_params(settings, curve_func, i, frames):
+    """计算第i帧的缩放与位移"""
+    start_scale, end_scale = settings['scale']
+    (sx, sy), (ex, ey) = settings['position']
+    value = curve_func(i / max(1, frames - 1))
+    return (start_scale + (end_scale - start_scale) * value,
+            sx + (ex - sx) * value,
+            sy + (ey - sy) * value)
+
+
+def best_of(repeat, render):
+    """重复渲染多次，返回最佳帧率和渲染结果，降低计时抖动"""
+    best_fps, frames = 0.0, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = render()
+        best_fps = max(best_fps, len(frames) / (time.perf_counter() - start))
+    return best_fps, frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description='动画变换基准测试')
+    parser.add_argument('--width', type=int, default=1920, help='帧宽度')
+    parser.add_argument('--height', type=int, default=1080, help='帧高度')
+    parser.add_argument('--frames', type=int, default=90, help='每个预设渲染的帧数')
+    parser.add_argument('--repeat', type=int, default=3, help='计时重复次数（取最佳值）')
+    args = parser.parse_args()
+
+    animation_service = AnimationService()
+    frame = load_test_image(args.width, args.height)
+    presets = {name: settings for name, settings in animation_service.preset_animations.items()
+               if name.startswith('缩放+')}
+
+    print(f"分辨率: {args.width}x{args.height}, 每个预设 {args.frames} 帧")
+    print(f"{'预设':<24}{'旧fps':>10}{'新fps':>10}{'加速比':>10}{'最小PSNR':>12}")
+
+    all_passed = True
+    for name, settings in presets.items():
+        curve_func = animation_service.get_curve_function(settings.get('curve', '线性'))
+        params = [frame_params(settings, curve_func, i, args.frames) for i in range(args.frames)]
+
+        legacy_fps, legacy_frames = best_of(args.repeat, lambda: [legacy_transform(frame, *p) for p in params])
+        fused_fps, fused_frames = best_of(args.repeat, lambda: [fused_transform(animation_service, frame, *p) for p in params])
+
+        # 只比较中心区域，边缘反射填充在两种实现中的插值方式不同
+        margin_y, margin_x = args.height // 20, args.width // 20
+        min_psnr = min(psnr(a[margin_y:-margin_y, margin_x:-margin_x], b[margin_y:-margin_y, margin_x:-margin_x])
+                       for a, b in zip(legacy_frames, fused_frames))
+        speedup = fused_fps / legacy_fps
+        passed = speedup >= 2.0 * (1 - SPEEDUP_TOLERANCE) and min_psnr >= MIN_PSNR
+        all_passed = all_passed and passed
+
+        print(f"{name:<24}{legacy_fps:>10.1f}{fused_fps:>10.1f}{speedup:>9.2f}x{min_psnr:>11.1f}dB"
+              f"  {'通过' if passed else '未达标'}")
+
+    print("结论: " + ("全部达标（加速比≥2x，允许5%计时误差；PSNR≥35dB）" if all_passed else "存在未达标的预设"))
+    return 0 if all_passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+帧缓冲池内存基准测试
+
+合成一个20个片段、每个连接点都有转场的视频（依次使用所有转场效果），
+分别在关闭和开启帧缓冲池的子进程中逐帧渲染，报告峰值RSS、耗时和输出是否一致。
+另外用 tracemalloc 对开头几个片段重新渲染一遍，统计每帧新分配的内存峰值（稳定状态下应接近0）。
+只测量逐帧合成，不包含编码。
+
+用法:
+    python scripts/bench_memory.py [--clips 20] [--width 1280] [--height 720] [--duration 1.5]
+"""
+
+import sys
+import json
+import time
+import hashlib
+import argparse
+import resource
+import tracemalloc
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# 统计逐帧分配时渲染的片段数
+SAMPLE_CLIPS = 4
+
+
+def peak_rss_mb():
+    """当前进程的峰值RSS（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以字节为单位，Linux 以KB为单位
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_images(work_dir, count, width, height):
+    """生成带纹理的测试图片"""
+    paths = []
+    for i in range(count):
+        rng = np.random.default_rng(i)
+        small = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+        path = Path(work_dir) / f"bench_{i}.png"
+        Image.fromarray(small).resize((width, height), Image.BICUBIC).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def run_child(args):
+    """子进程：按指定设置渲染所有帧，输出JSON结果"""
+    from core.services.video_service import VideoService
+    from core.services.timeline_compositor import TimelineCompositor
+    from core.utils import FrameBufferPool
+
+    video_service = VideoService()
+    video_service.render_cache = None
+    # 使用OpenCV逐帧动画，覆盖动画重采样的缓冲区
+    video_service.animation_backend = 'opencv'
+    video_service.frame_buffer_pooling = args.pooling
+
+    names = [name for name in video_service.transition_service.transitions if name not in ("无", "随机")]
+    animations = [name for name in video_service.animation_service.preset_animations if name != "静止"]
+    resolution = (args.width, args.height)
+
+    baseline_rss = peak_rss_mb()
+    clips = [video_service.create_clip({
+        'id': str(i),
+        'image_path': path,
+        'duration': args.duration,
+        'animation': animations[i % len(animations)]
+    }, resolution) for i, path in enumerate(args.images)]
+    blends = [video_service.transition_service.get_blend_function(names[i % len(names)])
+              for i in range(len(clips) - 1)]
+    pool = FrameBufferPool() if args.pooling else None
+    clip = TimelineCompositor(clips, blends, args.transition_duration, video_service.default_fps, pool=pool).to_clip()
+
+    digest = hashlib.sha256()
+    frames = 0
+    start = time.perf_counter()
+    for t in np.arange(0, clip.duration, 1.0 / video_service.default_fps):
+        digest.update(clip.get_frame(t))
+        frames += 1
+    elapsed = time.perf_counter() - start
+    peak_rss = peak_rss_mb()
+
+    # 对开头几个片段重新渲染，统计每帧新分配的内存（第一个转场窗口预热缓冲区，只统计之后的帧）
+    sample_count = min(len(clips), SAMPLE_CLIPS)
+    sample = TimelineCompositor(clips[:sample_count], blends[:sample_count - 1], args.transition_duration,
+                                video_service.default_fps, pool=FrameBufferPool() if args.pooling else None)
+    sample_times = np.arange(0, args.duration * sample_count, 1.0 / video_service.default_fps)
+    warmup = int(args.duration * 2 * video_service.default_fps)
+    allocations = []
+    tracemalloc.start()
+    for i, t in enumerate(sample_times):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        sample.make_frame(t)
+        if i >= warmup:
+            allocations.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    print(json.dumps({
+        'frames': frames,
+        'seconds': elapsed,
+        'baseline_rss_mb': baseline_rss,
+        'peak_rss_mb': peak_rss,
+        'alloc_per_frame_mb': float(np.mean(allocations)) / (1024 * 1024) if allocations else 0.0,
+        'digest': digest.hexdigest(),
+        'pool_mb': pool.nbytes / (1024 * 1024) if pool else 0.0
+    }))
+
+
+def run_mode(args, images, pooling):
+    """在独立子进程中运行一次，保证峰值RSS互不影响"""
+    command = [sys.executable, __file__, '--child', '--images', *images,
+               '--width', str(args.width), '--height', str(args.height),
+               '--duration', str(args.duration), '--transition-duration', str(args.transition_duration)]
+    if pooling:
+        command.append('--pooling')
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='帧缓冲池内存基准测试')
+    parser.add_argument('--clips', type=int, default=20, help='片段数量')
+    parser.add_argument('--width', type=int, default=1280, help='输出宽度')
+    parser.add_argument('--height', type=int, default=720, help='输出高度')
+    parser.add_argument('--duration', type=float, default=1.5, help='每个片段的时长（秒）')
+    parser.add_argument('--transition-duration', type=float, default=0.7, help='转场时长（秒）')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--pooling', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--images', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        images = make_images(work_dir, args.clips, args.width, args.height)
+        results = {pooling: run_mode(args, images, pooling) for pooling in (False, True)}
+
+    print(f"{args.clips}个片段, {args.width}x{args.height}, 每个片段 {args.duration}秒, "
+          f"转场 {args.transition_duration}秒, 共 {results[False]['frames']} 帧")
+    print(f"{'模式':<12}{'峰值RSS(MB)':>14}{'渲染增量(MB)':>14}{'每帧分配(MB)':>14}"
+          f"{'耗时(秒)':>10}{'fps':>8}{'缓冲池(MB)':>12}")
+    for pooling, label in ((False, '逐帧分配'), (True, '帧缓冲池')):
+        result = results[pooling]
+        print(f"{label:<12}{result['peak_rss_mb']:>14.1f}"
+              f"{result['peak_rss_mb'] - result['baseline_rss_mb']:>14.1f}{result['alloc_per_frame_mb']:>14.2f}"
+              f"{result['seconds']:>10.2f}{result['frames'] / result['seconds']:>8.1f}{result['pool_mb']:>12.1f}")
+
+    identical = results[False]['digest'] == results[True]['digest']
+    print("输出一致性: " + ("逐帧完全一致" if identical else "输出不一致"))
+    return 0 if identical else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+媒体探测基准测试
+
+生成一批带旁白音频的项目，对比规划时间轴（读取每个片段的时长）的耗时：
+旧实现为每个音频打开一个 AudioFileClip（启动一个ffmpeg读取进程），
+新实现由 MediaProbe 读取文件头，分别测量首次探测（冷）和磁盘索引命中（热）。
+
+用法:
+    python scripts/bench_probe.py [--items 200] [--format mp3] [--legacy-items 20]
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+# 将项目根目录添加到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from moviepy.editor import AudioFileClip
+
+from core.services.video_service import VideoService
+from core.utils.ffmpeg_utils import FFmpegUtils
+from core.utils.media_probe import MediaProbe
+
+
+def make_audio_files(work_dir, count, audio_format):
+    """生成一段测试音频，再复制为 count 个不同的文件"""
+    source = Path(work_dir) / f"source.{audio_format}"
+    FFmpegUtils.run(['-f', 'lavfi', '-i', 'sine=frequency=440:duration=3', '-ar', '24000', '-ac', '1', source])
+    paths = []
+    for i in range(count):
+        path = Path(work_dir) / f"narration_{i:04d}.{audio_format}"
+        shutil.copyfile(source, path)
+        paths.append(str(path))
+    return paths
+
+
+def legacy_duration(audio_path):
+    """旧实现：打开 AudioFileClip 读取时长"""
+    clip = AudioFileClip(audio_path)
+    try:
+        return clip.duration
+    finally:
+        clip.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='媒体探测基准测试')
+    parser.add_argument('--items', type=int, default=200, help='项目数量')
+    parser.add_argument('--format', default='mp3', choices=['mp3', 'wav', 'm4a'], help='音频格式')
+    parser.add_argument('--legacy-items', type=int, default=20, help='旧实现实际测量的项目数（按比例推算全部耗时）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        audio_paths = make_audio_files(work_dir, args.items, args.format)
+        items = [{'image_path': '', 'audio_path': path, 'duration': 5} for path in audio_paths]
+        index_path = Path(work_dir) / 'media_probe.json'
+
+        legacy_count = max(1, min(args.legacy_items, args.items))
+        start = time.perf_counter()
+        legacy = [legacy_duration(path) for path in audio_paths[:legacy_count]]
+        legacy_seconds = (time.perf_counter() - start) * args.items / legacy_count
+
+        video_service = VideoService()
+        video_service.media_probe = MediaProbe(index_path=index_path)
+        start = time.perf_counter()
+        cold = [video_service.get_item_duration(item) for item in items]
+        cold_seconds = time.perf_counter() - start
+        video_service.media_probe.flush()
+
+        # 新进程的情形：重新加载磁盘索引
+        video_service.media_probe = MediaProbe(index_path=index_path)
+        start = time.perf_counter()
+        warm = [video_service.get_item_duration(item) for item in items]
+        warm_seconds = time.perf_counter() - start
+
+    max_diff = max(abs(a - b) for a, b in zip(legacy, cold))
+    print(f"{args.items}个项目, 音频格式 {args.format}")
+    print(f"{'实现':<20}{'耗时(毫秒)':>12}{'每项(毫秒)':>12}")
+    for label, seconds in ((f'AudioFileClip(推算)', legacy_seconds), ('MediaProbe 冷', cold_seconds),
+                           ('MediaProbe 索引命中', warm_seconds)):
+        print(f"{label:<20}{seconds * 1000:>12.1f}{seconds * 1000 / args.items:>12.3f}")
+    print(f"时长最大差异: {max_diff * 1000:.1f}毫秒（moviepy 的时长精确到10毫秒）")
+    print(f"冷/热结果一致: {cold == warm}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+启动时间基准测试
+
+在全新的Python进程中测量各入口的冷启动时间（导入并完成初始化，不含解释器自身的启动），
+并检查启动后是否已经加载了 moviepy、OpenCV、numpy 等渲染依赖：
+    - api: 导入 api.app、创建应用并响应一次 /api/health（不启动渲染工作进程）
+    - api 首次渲染加载: 启动后第一次获取视频服务的耗时（渲染依赖推迟到这里加载）
+    - desktop: 导入 desktop.main 并创建主窗口（需要 PyQt6，使用 offscreen 平台）
+    - eager 导入: 直接导入 VideoService，相当于旧的启动方式需要付出的导入开销
+启动时间超过 --budget 秒的入口判定为失败。
+
+用法:
+    python scripts/bench_startup.py [--repeat 5] [--budget 1.0]
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# 启动时不应加载的渲染依赖
+HEAVY_MODULES = ['moviepy.editor', 'cv2', 'numpy', 'PIL.Image']
+
+# 在子进程中执行的测量代码，{body} 为入口的导入和初始化，{after} 为启动完成后额外测量的步骤
+CHILD_TEMPLATE = '''
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{body}
+startup = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+start = time.perf_counter()
+{after}
+after = time.perf_counter() - start
+print("BENCH " + json.dumps({{"startup": startup, "after": after, "loaded": loaded}}))
+'''
+
+ENTRIES = {
+    'api': (
+        "import api.app\n"
+        "app = api.app.create_app()\n"
+        "app.test_client().get('/api/health')",
+        "from api.services import services\n"
+        "services.get('video')"
+    ),
+    'desktop': (
+        "from PyQt6.QtWidgets import QApplication\n"
+        "import desktop.main\n"
+        "qt_app = QApplication([])\n"
+        "window = desktop.main.MainWindow()",
+        "window.video_service"
+    ),
+    'eager': (
+        "from core.services.video_service import VideoService\n"
+        "VideoService()",
+        "pass"
+    ),
+}
+
+
+def run_entry(name, repeat):
+    """在 repeat 个全新进程中测量入口，返回各次的测量结果；入口不可用时返回错误信息"""
+    body, after = ENTRIES[name]
+    code = CHILD_TEMPLATE.format(root=str(ROOT_DIR), heavy=HEAVY_MODULES, body=body, after=after)
+    env = dict(os.environ, RENDER_WORKER_POOL='0', QT_QPA_PLATFORM='offscreen')
+    results = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', code], cwd=str(ROOT_DIR), env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        lines = [line for line in proc.stdout.decode('utf-8', errors='ignore').splitlines()
+                 if line.startswith('BENCH ')]
+        if proc.returncode != 0 or not lines:
+            error = proc.stderr.decode('utf-8', errors='ignore').strip().splitlines()
+            return None, error[-1] if error else f"退出码 {proc.returncode}"
+        results.append(json.loads(lines[-1][len('BENCH '):]))
+    return results, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动时间基准测试')
+    parser.add_argument('--repeat', type=int, default=5, help='每个入口测量的进程数')
+    parser.add_argument('--budget', type=float, default=1.0, help='api 和 desktop 的启动时间上限（秒）')
+    args = parser.parse_args()
+
+    print(f"{'入口':<10}{'启动中位数(毫秒)':>18}{'最大(毫秒)':>12}{'首次渲染加载(毫秒)':>20}  已加载的渲染依赖")
+    failed = False
+    for name in ENTRIES:
+        results, error = run_entry(name, args.repeat)
+        if results is None:
+            print(f"{name:<10}跳过: {error}")
+            continue
+        startup = [r['startup'] * 1000 for r in results]
+        after = [r['after'] * 1000 for r in results]
+        loaded = ', '.join(results[-1]['loaded']) or '无'
+        after_text = f"{statistics.median(after):.1f}" if name != 'eager' else '-'
+        print(f"{name:<10}{statistics.median(startup):>18.1f}{max(startup):>12.1f}{after_text:>20}  {loaded}")
+        if name != 'eager' and statistics.median(startup) > args.budget * 1000:
+            failed = True
+            print(f"  超过启动时间上限 {args.budget:.1f}秒")
+    print("结论: " + ("失败" if failed else "通过"))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+动画矩阵表与逐帧计算的一致性测试
+
+参考实现是改为查表之前 process_frame 中逐帧计算进度、曲线值并合成仿射矩阵的代码。
+"""
+
+import numpy as np
+import pytest
+
+from core.services.animation_service import AnimationService
+
+
+def reference_matrix(width, height, scale, offset_x, offset_y, source_size=None):
+    """原来的逐帧仿射矩阵合成"""
+    effective_scale = 1.0
+    if scale != 1.0:
+        effective_scale = scale
+        if offset_x != 0 or offset_y != 0:
+            border_scale = max(1.0, 1.0 + 2 * abs(offset_x), 1.0 + 2 * abs(offset_y))
+            effective_scale = scale * border_scale
+
+    ratio_x, ratio_y = 1.0, 1.0
+    if source_size:
+        ratio_x = width / source_size[0]
+        ratio_y = height / source_size[1]
+
+    return np.float32([
+        [effective_scale * ratio_x, 0, width * (1 - effective_scale) / 2 + offset_x * width],
+        [0, effective_scale * ratio_y, height * (1 - effective_scale) / 2 + offset_y * height]
+    ])
+
+
+def reference_table(service, settings, duration, output_size, source_size, fps):
+    """原来的逐帧计算：每个输出帧时间 t=i/fps 单独求值"""
+    start_scale, end_scale = settings['scale']
+    (start_x, start_y), (end_x, end_y) = settings['position']
+    curve_func = service.get_curve_function(settings['curve'])
+    width, height = output_size
+
+    matrices, identity = [], []
+    for t in np.arange(0, duration, 1.0 / fps):
+        progress = min(1.0, t / duration) if duration > 0 else 1.0
+        curve_value = curve_func(progress)
+        scale = start_scale + (end_scale - start_scale) * curve_value
+        x = start_x + (end_x - start_x) * curve_value
+        y = start_y + (end_y - start_y) * curve_value
+        identity.append(scale == 1.0 and x == 0 and y == 0 and tuple(source_size) == tuple(output_size))
+        matrices.append(reference_matrix(width, height, scale, x, y, source_size))
+    return np.array(matrices), np.array(identity)
+
+
+@pytest.fixture(scope='module')
+def service():
+    return AnimationService()
+
+
+@pytest.mark.parametrize('preset', ['缩放-放大', '缩小+平移-左右', '缩放-剧烈', '跳动'])
+@pytest.mark.parametrize('curve', ['线性', '缓入缓出', '强缓出', '平滑弹入'])
+def test_transform_table_matches_per_frame(service, preset, curve):
+    settings = dict(service.get_animation_settings(preset), curve=curve)
+    output_size, source_size, fps, duration = (320, 180), (400, 300), 30, 2.37
+
+    matrices, identity = service.build_transform_table(settings, duration, output_size, source_size, fps)
+    expected_matrices, expected_identity = reference_table(service, settings, duration, output_size,
+                                                           source_size, fps)
+
+    assert matrices.shape == expected_matrices.shape
+    np.testing.assert_array_equal(matrices, expected_matrices)
+    np.testing.assert_array_equal(identity, expected_identity)
+
+
+def test_identity_frames_only_without_motion_and_resize(service):
+    settings = {'scale': [1.0, 1.0], 'position': [(0, 0), (0, 0)], 'curve': '线性'}
+
+    _, identity = service.build_transform_table(settings, 1.0, (64, 48), (64, 48), 30)
+    assert identity.all()
+
+    _, identity = service.build_transform_table(settings, 1.0, (64, 48), (128, 96), 30)
+    assert not identity.any()
+
+
+def test_compose_affine_matrices_matches_scalar(service):
+    rng = np.random.RandomState(0)
+    scales = np.concatenate([[1.0, 1.0], rng.uniform(0.9, 1.3, 30)])
+    offsets_x = np.concatenate([[0.0, 0.05], rng.uniform(-0.05, 0.05, 30)])
+    offsets_y = np.concatenate([[0.0, 0.0], rng.uniform(-0.05, 0.05, 30)])
+
+    matrices = service.compose_affine_matrices(1280, 720, scales, offsets_x, offsets_y, (1920, 1080))
+
+    for matrix, scale, x, y in zip(matrices, scales, offsets_x, offsets_y):
+        np.testing.assert_array_equal(matrix, reference_matrix(1280, 720, scale, x, y, (1920, 1080)))
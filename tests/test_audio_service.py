@@ -0,0 +1,113 @@
+"""AudioService 批量合成的重试和并发上限测试（使用不访问网络的占位后端）"""
+
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from core.services.audio_service import AudioService
+from core.services.tts_backends import StubBackend
+from core.utils.path_utils import PathUtils
+
+
+class FlakyBackend(StubBackend):
+    """每句前 failures 次请求失败的占位后端，记录请求次数和最大并发数"""
+
+    name = 'flaky'
+    remote = True
+
+    def __init__(self, failures, **options):
+        super().__init__(**options)
+        self.failures = failures
+        self.attempts = Counter()
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def render(self, text, output_path, lang, voice, speed):
+        with self.lock:
+            self.attempts[text] += 1
+            attempt = self.attempts[text]
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(0.01)
+            if attempt <= self.failures:
+                raise RuntimeError(f"请求失败: {text}")
+            super().render(text, output_path, lang, voice, speed)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(PathUtils, 'get_data_dir', staticmethod(lambda: tmp_path))
+    service = AudioService()
+    service.rate_limiter = None
+    service.retry_backoff = 0.0
+    service.max_retries = 2
+    service.max_concurrent_requests = 2
+    service.batch_workers = 3
+    service.chunk_workers = 4
+    return service
+
+
+def use_backend(service, backend):
+    service._backends[backend.name] = backend
+    service.backend = backend.name
+    return backend
+
+
+ITEMS = [{'text': f"第{i}段第一句。第{i}段第二句。第{i}段第三句。", 'filename': f"item_{i}.wav", 'format': 'wav'}
+         for i in range(4)]
+
+
+def test_each_request_retried_once_per_failure(service):
+    backend = use_backend(service, FlakyBackend(failures=1))
+
+    results = service.batch_generate_speech(ITEMS)
+
+    assert all(results)
+    assert len(backend.attempts) == 12
+    assert set(backend.attempts.values()) == {2}
+
+
+def test_retries_are_not_nested(service):
+    backend = use_backend(service, FlakyBackend(failures=100))
+
+    results = service.batch_generate_speech(ITEMS[:2])
+
+    assert results == [None, None]
+    # 每句最多 max_retries + 1 次请求，批量层不再整体重试
+    assert backend.attempts
+    assert max(backend.attempts.values()) == service.max_retries + 1
+
+
+def test_concurrent_requests_bounded(service):
+    backend = use_backend(service, FlakyBackend(failures=0))
+
+    service.batch_generate_speech(ITEMS)
+
+    assert backend.peak <= service.max_concurrent_requests
+
+
+def test_chunks_are_not_split_again(service):
+    backend = use_backend(service, FlakyBackend(failures=0))
+    service.chunk_max_chars = 30
+    service.chunk_workers = 1
+    # '5;,' 是切分出的一块，再次切分会得到 ['5;', ',']；合成各块时不能再切分，
+    # 否则会在唯一的分句线程中向同一线程池提交任务并一直等待
+    assert service.split_sentences('5;,\n6。', 30) == ['5;,', '6。']
+    assert service.split_sentences('5;,', 30) == ['5;', ',']
+
+    results = []
+    worker = threading.Thread(target=lambda: results.extend(
+        service.batch_generate_speech([{'text': '5;,\n6。', 'filename': 'item.wav', 'format': 'wav'}])))
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_alive()
+    assert all(results)
+    assert set(backend.attempts) == {'5;,', '6。'}
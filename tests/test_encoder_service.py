@@ -0,0 +1,51 @@
+"""编码后端参数测试"""
+
+import pytest
+
+from core.services.encoder_service import MoviepyEncoder, validate_encoder_options
+
+
+class RecordingClip:
+    """记录 write_videofile 参数的假片段"""
+
+    def __init__(self, size=(64, 48)):
+        self.size = size
+        self.audio = None
+        self.kwargs = None
+
+    def write_videofile(self, output_path, **kwargs):
+        self.kwargs = kwargs
+
+
+def test_moviepy_encoder_applies_options():
+    clip = RecordingClip()
+    MoviepyEncoder(preset='slow', crf=18, pix_fmt='yuv444p', threads=3).write(
+        clip, 'out.mp4', 30, threads=8, preset='medium')
+
+    assert clip.kwargs['preset'] == 'slow'
+    assert clip.kwargs['threads'] == 3
+    assert clip.kwargs['ffmpeg_params'] == ['-crf', '18', '-pix_fmt', 'yuv444p']
+
+
+def test_moviepy_encoder_bitrate_overrides_crf():
+    clip = RecordingClip(size=(65, 48))
+    MoviepyEncoder(crf=18, pix_fmt='yuv420p').write(clip, 'out.mp4', 30, bitrate='2500k',
+                                                    ffmpeg_params=['-vf', 'null'])
+
+    assert clip.kwargs['bitrate'] == '2500k'
+    # 奇数尺寸不能使用 yuv420p，交给moviepy的默认处理
+    assert clip.kwargs['ffmpeg_params'] == ['-vf', 'null']
+
+
+def test_moviepy_encoder_defaults_unchanged():
+    clip = RecordingClip()
+    MoviepyEncoder().write(clip, 'out.mp4', 30, threads=4, preset='fast')
+
+    assert clip.kwargs['preset'] == 'fast'
+    assert clip.kwargs['threads'] == 4
+    assert clip.kwargs['ffmpeg_params'] is None
+
+
+def test_unknown_option_rejected():
+    with pytest.raises(ValueError, match='crf'):
+        validate_encoder_options('moviepy', {'queue_size': 4})
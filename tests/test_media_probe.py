@@ -0,0 +1,64 @@
+"""MediaProbe 直接读取MP4 moov 盒子的测试"""
+
+import struct
+
+from core.utils.media_probe import MediaProbe
+
+
+def box(kind, *children):
+    payload = b''.join(children)
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def full_box(kind, payload):
+    return box(kind, b'\0\0\0\0' + payload)
+
+
+def track(handler, timescale, duration, sample_entry, stbl_children=()):
+    stsd = full_box(b'stsd', struct.pack('>I', 1) + sample_entry)
+    mdhd = full_box(b'mdhd', struct.pack('>IIII', 0, 0, timescale, duration) + b'\0' * 4)
+    hdlr = full_box(b'hdlr', b'\0' * 4 + handler + b'\0' * 12)
+    return box(b'trak', box(b'mdia', mdhd, hdlr, box(b'minf', box(b'stbl', stsd, *stbl_children))))
+
+
+def write_mp4(path, keyframes=True):
+    # 视频轨：30000/1001 帧率、60帧、640x360，每30帧一个关键帧
+    visual = box(b'avc1', b'\0' * 6 + struct.pack('>H', 1) + b'\0' * 16
+                 + struct.pack('>HH', 640, 360) + b'\0' * 50)
+    stts = full_box(b'stts', struct.pack('>III', 1, 60, 1001))
+    stsz = full_box(b'stsz', struct.pack('>II', 0, 60) + b'\0' * 240)
+    stbl = [stts, stsz]
+    if keyframes:
+        stbl.append(full_box(b'stss', struct.pack('>III', 2, 1, 31)))
+    video = track(b'vide', 30000, 60060, visual, stbl)
+    # 音频轨：采样率为16.16定点数
+    sound = box(b'mp4a', b'\0' * 6 + struct.pack('>H', 1) + b'\0' * 8
+                + struct.pack('>HHHHI', 2, 16, 0, 0, 44100 << 16))
+    audio = track(b'soun', 44100, 88200, sound)
+    mvhd = full_box(b'mvhd', struct.pack('>IIII', 0, 0, 1000, 2002) + b'\0' * 80)
+    # moov 位于 mdat 之后（未做 faststart 的文件）
+    path.write_bytes(box(b'ftyp', b'isom' + b'\0' * 4) + box(b'mdat', b'\0' * 64)
+                     + box(b'moov', mvhd, audio, video))
+    return str(path)
+
+
+def test_probe_mp4_reads_moov(tmp_path):
+    info = MediaProbe._probe_mp4(write_mp4(tmp_path / 'a.mp4'))
+    assert info['format'] == 'mp4'
+    assert info['duration'] == 2.002
+    assert info['fps'] == 30000 / 1001
+    assert (info['width'], info['height']) == (640, 360)
+    assert info['frames'] == 60
+    assert info['keyframes'] == [0, 30]
+    assert info['sample_rate'] == 44100
+
+
+def test_probe_mp4_without_sync_table_treats_every_frame_as_keyframe(tmp_path):
+    info = MediaProbe._probe_mp4(write_mp4(tmp_path / 'a.mp4', keyframes=False))
+    assert info['keyframes'] == list(range(60))
+
+
+def test_probe_mp4_without_moov_returns_none(tmp_path):
+    path = tmp_path / 'a.mp4'
+    path.write_bytes(box(b'ftyp', b'isom' + b'\0' * 4) + box(b'mdat', b'\0' * 64))
+    assert MediaProbe._probe_mp4(str(path)) is None
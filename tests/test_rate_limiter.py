@@ -0,0 +1,79 @@
+"""RateLimiter 的放行间隔测试（使用假时钟，不真正等待）"""
+
+import threading
+
+import pytest
+
+from core.utils import rate_limiter
+from core.utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.lock = threading.Lock()
+
+    def monotonic(self):
+        with self.lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_requests_are_spaced_by_interval(clock):
+    limiter = RateLimiter(4.0)
+    waits = [limiter.acquire() for _ in range(5)]
+    assert waits[0] == 0.0
+    assert waits[1:] == pytest.approx([0.25] * 4)
+    assert clock.now == pytest.approx(101.0)
+
+
+def test_burst_after_idle(clock):
+    limiter = RateLimiter(2.0, burst=3)
+    limiter.acquire()
+    clock.now += 10.0
+    waits = [limiter.acquire() for _ in range(4)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.5)
+
+
+def test_shared_between_threads_reserves_distinct_slots(monkeypatch):
+    # 每个线程预约的时间点互不相同且间隔不小于 1/rate
+    now = [0.0]
+    lock = threading.Lock()
+    slots = []
+
+    def monotonic():
+        return now[0]
+
+    def sleep(seconds):
+        with lock:
+            slots.append(now[0] + seconds)
+
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', sleep)
+
+    limiter = RateLimiter(10.0)
+    threads = [threading.Thread(target=limiter.acquire) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(slots) == pytest.approx([0.1 * i for i in range(1, 8)])
+
+
+def test_unlimited_never_waits(clock):
+    limiter = RateLimiter(None)
+    assert [limiter.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert clock.now == 100.0
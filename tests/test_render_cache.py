@@ -0,0 +1,61 @@
+"""RenderCache 的LRU淘汰与取出测试"""
+
+import os
+
+from core.services.render_cache import RenderCache
+
+
+def write_file(path, size):
+    path.write_bytes(b'x' * size)
+    return path
+
+
+def test_put_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(tmp_path / 'cache', max_bytes=250)
+    for name in 'abc':
+        cache.put(name * 8, write_file(tmp_path / f'{name}.mp4', 100))
+
+    # a 最久未使用，写入 c 时超出预算被淘汰
+    assert cache.get('a' * 8) is None
+    assert cache.get('b' * 8) is not None
+    assert cache.get('c' * 8) is not None
+    assert cache.evictions == 1
+    assert cache.stats()['size_bytes'] == 200
+
+    # 访问过的 b 比 c 新，再写入 d 时淘汰 c
+    cache.get('b' * 8)
+    cache.put('d' * 8, write_file(tmp_path / 'd.mp4', 100))
+    assert cache.get('c' * 8) is None
+    assert cache.get('b' * 8) is not None
+    assert cache.get('d' * 8) is not None
+    assert cache.stats()['entries'] == 2
+
+
+def test_put_keeps_new_entry_larger_than_budget(tmp_path):
+    cache = RenderCache(tmp_path / 'cache', max_bytes=50)
+    cache.put('a' * 8, write_file(tmp_path / 'a.mp4', 100))
+    assert cache.get('a' * 8) is not None
+
+
+def test_checkout_survives_eviction(tmp_path):
+    cache = RenderCache(tmp_path / 'cache', max_bytes=150)
+    cache.put('a' * 8, write_file(tmp_path / 'a.mp4', 100))
+
+    dest = tmp_path / 'job' / 'a.mp4'
+    dest.parent.mkdir()
+    assert cache.get('a' * 8, dest=dest) == str(dest)
+
+    cache.put('b' * 8, write_file(tmp_path / 'b.mp4', 100))
+    assert cache.get('a' * 8) is None
+    assert dest.read_bytes() == b'x' * 100
+    assert cache.get('a' * 8, dest=tmp_path / 'job' / 'missing.mp4') is None
+    assert cache.hits == 1
+
+
+def test_index_notices_external_deletes(tmp_path):
+    cache = RenderCache(tmp_path / 'cache', max_bytes=1000)
+    path = cache.put('a' * 8, write_file(tmp_path / 'a.mp4', 100))
+    os.remove(path)
+
+    assert cache.get('a' * 8) is None
+    assert cache.stats()['size_bytes'] == 0
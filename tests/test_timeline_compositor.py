@@ -0,0 +1,57 @@
+"""TimelineCompositor 结尾帧复用测试"""
+
+import numpy as np
+import pytest
+from moviepy.editor import VideoClip
+
+from core.services.timeline_compositor import TimelineCompositor
+
+FPS = 30
+
+
+def counting_clip(duration, value, calls):
+    """每帧像素值随时间变化的片段，并记录取帧的时间"""
+    def make_frame(t):
+        calls.append(t)
+        return np.full((8, 8, 3), int(round(value + t * FPS)) % 256, dtype=np.uint8)
+    clip = VideoClip(make_frame, duration=duration)
+    calls.clear()
+    return clip
+
+
+def crossfade(frame1, frame2, progress, pool=None):
+    return (frame1 * (1 - progress) + frame2 * progress).astype(np.uint8)
+
+
+@pytest.mark.parametrize('transition_duration', [0.5, 0.47, 0.3333])
+def test_tail_frames_computed_once(transition_duration):
+    calls1, calls2 = [], []
+    clips = [counting_clip(2.05, 0, calls1), counting_clip(1.52, 100, calls2)]
+    compositor = TimelineCompositor(clips, [crossfade], transition_duration, FPS)
+
+    clip = compositor.to_clip(include_audio=False)
+    calls1.clear()
+    frames = list(clip.iter_frames(fps=FPS))
+
+    assert len(frames) == len(np.arange(0, compositor.duration, 1.0 / FPS))
+    # 前一个片段的每个源帧只计算一次，即使转场时长不是整数帧
+    assert len(calls1) == len(set(calls1)) == len(np.arange(0, 2.05, 1.0 / FPS))
+    # 转场结束后结尾帧全部回收
+    assert not compositor._tails
+    assert compositor._free_tail_buffers
+
+
+def test_tail_lookup_uses_nearest_recorded_frame():
+    calls1, calls2 = [], []
+    clips = [counting_clip(1.0, 0, calls1), counting_clip(1.0, 100, calls2)]
+    compositor = TimelineCompositor(clips, [lambda frame1, frame2, progress, pool=None: frame1.copy()],
+                                    0.45, FPS)
+
+    clip = compositor.to_clip(include_audio=False)
+    calls1.clear()
+    frames = list(clip.iter_frames(fps=FPS))
+
+    # 13.5帧的转场窗口输出14帧，依次复用前一个片段最后14个已输出的帧
+    window = [int(frame[0, 0, 0]) for frame in frames[30:30 + 14]]
+    assert window == list(range(16, 30))
+    assert len(calls1) == 30
@@ -0,0 +1,111 @@
+"""
+预计算转场内核与原逐帧实现的一致性测试
+
+参考实现是改用 transition_kernels 之前 TransitionService 中的逐帧代码。
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from core.services import transition_kernels
+from core.services.transition_service import TransitionService
+from core.utils.frame_buffer_pool import FrameBufferPool
+
+PROGRESSES = [i / 30 for i in range(30)]
+
+
+def reference_blinds(frame1, frame2, progress):
+    h = frame1.shape[0]
+    result = frame1.copy()
+    num_blinds = 20
+    blind_height = h // num_blinds
+    for i in range(num_blinds):
+        y_start = i * blind_height
+        y_end = min((i + 1) * blind_height, h)
+        blind_progress = min(1, progress * 2 - i / num_blinds)
+        if blind_progress > 0:
+            result[y_start:y_end, :] = cv2.addWeighted(
+                frame1[y_start:y_end, :], 1 - blind_progress,
+                frame2[y_start:y_end, :], blind_progress,
+                0
+            )
+    return result
+
+
+def reference_warp_dissolve(frame1, frame2, progress):
+    h, w = frame1.shape[:2]
+    map_x = np.zeros((h, w), np.float32)
+    map_y = np.zeros((h, w), np.float32)
+    for y in range(h):
+        for x in range(w):
+            map_x[y, x] = x + 10 * np.sin(y / 30 + progress * 10) * (1 - progress)
+            map_y[y, x] = y + 10 * np.cos(x / 30 + progress * 10) * (1 - progress)
+    warped1 = cv2.remap(frame1, map_x, map_y, cv2.INTER_LINEAR)
+    return cv2.addWeighted(warped1, 1 - progress, frame2, progress, 0)
+
+
+def reference_flash(frame1, frame2, progress):
+    if progress < 0.5:
+        white_intensity = progress * 2
+        return cv2.addWeighted(frame1, 1 - white_intensity, np.ones_like(frame1) * 255, white_intensity, 0)
+    white_intensity = 2 - progress * 2
+    return cv2.addWeighted(frame2, 1 - white_intensity, np.ones_like(frame2) * 255, white_intensity, 0)
+
+
+def random_frames(height, width, seed=0):
+    rng = np.random.RandomState(seed)
+    return (rng.randint(0, 256, (height, width, 3)).astype(np.uint8),
+            rng.randint(0, 256, (height, width, 3)).astype(np.uint8))
+
+
+@pytest.fixture(scope='module')
+def service():
+    return TransitionService()
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    transition_kernels.clear_caches()
+    yield
+    transition_kernels.clear_caches()
+
+
+@pytest.mark.parametrize('height', [20, 47, 180])
+def test_blinds_match_reference(service, height):
+    frame1, frame2 = random_frames(height, 32)
+    for progress in PROGRESSES:
+        np.testing.assert_array_equal(service._blend_blinds(frame1, frame2, progress),
+                                      reference_blinds(frame1, frame2, progress))
+
+
+def test_blinds_short_frames_open_row_by_row(service):
+    # 原实现在不足20行时出错；现在每一行各为一条百叶窗
+    frame1, frame2 = random_frames(12, 16)
+    np.testing.assert_array_equal(service._blend_blinds(frame1, frame2, 0.0), frame1)
+    np.testing.assert_array_equal(service._blend_blinds(frame1, frame2, 0.99), frame2)
+
+    alpha = transition_kernels.blind_row_alpha(12, 0.25)
+    np.testing.assert_allclose(alpha, np.clip(0.5 - np.arange(12) / 20, 0, 1))
+
+
+def test_warp_dissolve_matches_reference(service):
+    frame1, frame2 = random_frames(48, 64)
+    for progress in PROGRESSES[::3]:
+        np.testing.assert_array_equal(service._blend_warp_dissolve(frame1, frame2, progress),
+                                      reference_warp_dissolve(frame1, frame2, progress))
+
+
+def test_warp_dissolve_with_buffer_pool(service):
+    frame1, frame2 = random_frames(48, 64)
+    pool = FrameBufferPool()
+    for progress in PROGRESSES[::5]:
+        np.testing.assert_array_equal(service._blend_warp_dissolve(frame1, frame2, progress, pool),
+                                      reference_warp_dissolve(frame1, frame2, progress))
+
+
+def test_flash_matches_reference(service):
+    frame1, frame2 = random_frames(36, 64)
+    for progress in PROGRESSES:
+        np.testing.assert_array_equal(service._blend_flash(frame1, frame2, progress),
+                                      reference_flash(frame1, frame2, progress))
@@ -8,6 +8,7 @@ import request from '../utils/request'
  * @param {number} data.transition_duration - 转场时长
  * @param {number} data.output_fps - 输出帧率
  * @param {string} data.output_quality - 输出质量
+ * @param {boolean} [data.async] - 为 true 时提交为后台任务，返回任务ID
  * @returns {Promise} - 返回创建结果
  */
 export function createVideo(data) {
@@ -18,6 +19,57 @@ export function createVideo(data) {
   })
 }
 
+/**
+ * 查询渲染任务状态
+ * @param {string} jobId - 任务ID
+ * @returns {Promise} - 返回任务状态
+ */
+export function getJob(jobId) {
+  return request({
+    url: `/api/video/jobs/${jobId}`,
+    method: 'get'
+  })
+}
+
+/**
+ * 通过 Server-Sent Events 跟踪渲染任务，直到任务结束
+ * @param {string} jobId - 任务ID
+ * @param {Function} onProgress - 进度回调，参数为任务状态（stage, frames_done, frames_total, fps, eta, progress）
+ * @returns {Promise} - 任务成功时返回渲染结果，失败时抛出错误
+ */
+export function watchJob(jobId, onProgress) {
+  const baseUrl = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000'
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${baseUrl}/api/video/jobs/${jobId}/events`)
+    source.addEventListener('progress', event => {
+      onProgress && onProgress(JSON.parse(event.data))
+    })
+    source.addEventListener('done', event => {
+      source.close()
+      const job = JSON.parse(event.data)
+      onProgress && onProgress(job)
+      if (job.state === 'succeeded') {
+        resolve(job.result)
+      } else {
+        reject(new Error(job.error || '视频渲染失败'))
+      }
+    })
+    source.onerror = () => {
+      // 连接中断时改为查询一次任务状态
+      source.close()
+      getJob(jobId).then(job => {
+        if (job.state === 'succeeded') {
+          resolve(job.result)
+        } else if (job.state === 'failed') {
+          reject(new Error(job.error || '视频渲染失败'))
+        } else {
+          watchJob(jobId, onProgress).then(resolve, reject)
+        }
+      }, reject)
+    }
+  })
+}
+
 /**
  * 获取视频列表
  * @returns {Promise} - 返回视频列表
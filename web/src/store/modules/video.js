@@ -20,6 +20,8 @@ export const useVideoStore = defineStore('video', {
     loading: false,
     // 创建中状态
     creating: false,
+    // 渲染进度（stage, frames_done, frames_total, fps, eta, progress）
+    renderProgress: null,
     // 错误信息
     error: null
   }),
@@ -158,13 +160,22 @@ export const useVideoStore = defineStore('video', {
         this.creating = true
         this.error = null
         
-        // 准备请求数据
+        // 准备请求数据（提交为后台任务，以便跟踪渲染进度）
         const requestData = {
           images: this.videoImages,
-          ...this.videoConfig
+          ...this.videoConfig,
+          async: true
         }
         
-        const result = await video.createVideo(requestData)
+        this.renderProgress = null
+        let result = await video.createVideo(requestData)
+        
+        // 后台渲染任务：跟踪进度直到渲染完成
+        if (result && result.job_id && !result.video_path) {
+          result = await video.watchJob(result.job_id, job => {
+            this.renderProgress = job
+          })
+        }
         
         // 创建成功后刷新视频列表
         await this.fetchVideos()
@@ -184,6 +195,7 @@ export const useVideoStore = defineStore('video', {
         throw error
       } finally {
         this.creating = false
+        this.renderProgress = null
       }
     },
     